@@ -0,0 +1,153 @@
+"""
+Importación masiva de box scores (una jornada completa en CSV o JSON)
+
+Cada fila tiene la forma de JornadaStatsRequest más el playerId:
+    playerId, jornada, fecha, rival, local, resultado, victoria, stats
+En CSV las estadísticas van en columnas planas (puntos, rebotes...). En JSON
+puede ser una lista de filas o un objeto con los datos comunes del partido
+(jornada, fecha, rival...) y la lista de filas en "players".
+
+La valoración y los puntos fantasy de todas las filas válidas se calculan a
+la vez con operaciones por columnas de NumPy (misma fórmula y mismo orden de
+operaciones que calcular_valoracion_acb; los puntos fantasy con las reglas
+compiladas de scoring_rules).
+"""
+
+import csv
+import io
+import json
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+STAT_COLUMNS = [
+    "minutosJugados", "puntos", "asistencias", "rebotes", "rebotesOfensivos",
+    "rebotesDefensivos", "robos", "tapones", "perdidas", "faltas",
+    "tiros2Anotados", "tiros2Intentados", "tiros3Anotados", "tiros3Intentados",
+    "tirosLibresAnotados", "tirosLibresIntentados"
+]
+MATCH_FIELDS = ["jornada", "fecha", "rival", "local", "resultado", "victoria"]
+SHOT_PAIRS = [
+    ("tiros2Anotados", "tiros2Intentados"),
+    ("tiros3Anotados", "tiros3Intentados"),
+    ("tirosLibresAnotados", "tirosLibresIntentados")
+]
+
+_TRUE = {"1", "true", "si", "sí", "s", "yes", "y", "x"}
+_FALSE = {"0", "false", "no", "n", ""}
+
+
+class RowError(ValueError):
+    """Fila inválida (se informa y se sigue con las demás)"""
+
+
+def parse_rows(content: str, fmt: str, defaults: Optional[Dict] = None) -> List[Dict]:
+    """
+    Convierte el archivo en filas {playerId, jornada, ..., stats: {...}}
+    `defaults` rellena los datos del partido que no vengan en cada fila
+    """
+    defaults = dict(defaults or {})
+    if fmt == "json":
+        data = json.loads(content)
+        if isinstance(data, dict):
+            defaults.update({k: v for k, v in data.items() if k in MATCH_FIELDS})
+            data = data.get("players", [])
+        rows = []
+        for item in data:
+            row = {**defaults, **{k: v for k, v in item.items() if k != "stats"}}
+            # Las estadísticas pueden venir anidadas en "stats" o planas
+            row["stats"] = {**{k: v for k, v in item.items() if k in STAT_COLUMNS}, **item.get("stats", {})}
+            rows.append(row)
+        return rows
+
+    if fmt == "csv":
+        rows = []
+        for record in csv.DictReader(io.StringIO(content)):
+            record = {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in record.items() if k}
+            row = {**defaults, **{k: v for k, v in record.items() if k not in STAT_COLUMNS and v != ""}}
+            row["stats"] = {k: v for k, v in record.items() if k in STAT_COLUMNS}
+            rows.append(row)
+        return rows
+
+    raise ValueError(f"Formato no soportado: {fmt} (csv o json)")
+
+
+def _to_int(value, field: str) -> int:
+    if value is None or value == "":
+        return 0
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{field} no es numérico: {value!r}")
+    if number != int(number) or number < 0:
+        raise RowError(f"{field} debe ser un entero >= 0: {value!r}")
+    return int(number)
+
+
+def _to_bool(value, field: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise RowError(f"{field} no es booleano: {value!r}")
+
+
+def validate_row(row: Dict) -> Dict:
+    """
+    Normaliza una fila o lanza RowError
+    """
+    player_id = str(row.get("playerId") or "").strip()
+    if not player_id:
+        raise RowError("Falta playerId")
+    jornada = _to_int(row.get("jornada"), "jornada")
+    if jornada < 1:
+        raise RowError("Falta jornada (entero >= 1)")
+    for field in ("fecha", "rival"):
+        if not str(row.get(field) or "").strip():
+            raise RowError(f"Falta {field}")
+
+    stats = {column: _to_int(row["stats"].get(column), column) for column in STAT_COLUMNS}
+    for made, attempted in SHOT_PAIRS:
+        if stats[made] > stats[attempted]:
+            raise RowError(f"{made} ({stats[made]}) mayor que {attempted} ({stats[attempted]})")
+
+    return {
+        "playerId": player_id,
+        "jornada": jornada,
+        "fecha": str(row["fecha"]).strip(),
+        "rival": str(row["rival"]).strip(),
+        "local": _to_bool(row.get("local", True), "local"),
+        "resultado": str(row.get("resultado") or ""),
+        "victoria": _to_bool(row.get("victoria", False), "victoria"),
+        "stats": stats
+    }
+
+
+def compute_scores(rows: List[Dict], rules) -> Tuple[List[float], List[float]]:
+    """
+    Valoración ACB y puntos fantasy (según `rules`, un ScoringRules) de todas las filas a la vez
+    """
+    if not rows:
+        return [], []
+    m = np.array([[row["stats"][c] for c in STAT_COLUMNS] for row in rows], dtype=np.float64)
+    col = {name: m[:, i] for i, name in enumerate(STAT_COLUMNS)}
+    victoria = np.array([row["victoria"] for row in rows], dtype=bool)
+
+    tiros_anotados = col["tiros2Anotados"] + col["tiros3Anotados"]
+    tiros_fallados = (
+        (col["tiros2Intentados"] - col["tiros2Anotados"]) +
+        (col["tiros3Intentados"] - col["tiros3Anotados"])
+    )
+    tl_fallados = col["tirosLibresIntentados"] - col["tirosLibresAnotados"]
+    valoracion = (
+        col["puntos"] + col["rebotes"] + col["asistencias"] + col["robos"] + col["tapones"] +
+        tiros_anotados - tiros_fallados - col["perdidas"] - tl_fallados - col["faltas"]
+    )
+
+    fantasy = rules.evaluate(col, victoria)
+
+    # round() de Python (el mismo redondeo que las funciones por fila)
+    return [round(v, 2) for v in valoracion.tolist()], [round(v, 2) for v in fantasy.tolist()]
@@ -0,0 +1,113 @@
+"""
+Inventario de cartas compacto
+
+Antes cada usuario guardaba cardIds: una lista con un ID por copia (las
+repetidas incluidas) que se reescribía entera en cada apertura de sobres.
+El formato nuevo es cardCounts: {cardId: copias} más recentCardIds, las
+últimas RECENT_CARDS cartas obtenidas en orden de llegada
+- Su tamaño crece con las cartas distintas (como mucho el catálogo), no con
+  las aperturas
+- Añadir cartas es un Increment atómico por carta distinta obtenida
+- Los documentos antiguos se migran en su primera escritura de cartas (o con
+  scripts/migrate_card_inventory.py)
+La API sigue respondiendo cardIds (lista expandida): el frontend no cambia.
+Las copias salen agrupadas por carta (en el orden del mapa, que Firestore
+devuelve ordenado por clave) y las cartas recientes al final en su orden,
+que es lo único que usa el frontend ("últimas cartas" de la portada).
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from storage.base import DELETE_FIELD, Increment
+
+# Cartas obtenidas que se recuerdan en orden de llegada
+RECENT_CARDS = 20
+
+# IDs que pueden ir en una ruta de campo con puntos ("cardCounts.card_001")
+_SIMPLE_ID = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def compact(card_ids: Iterable[str]) -> Dict[str, int]:
+    """
+    {cardId: copias} a partir de una lista de IDs (orden de primera aparición)
+    """
+    return dict(Counter(card_ids))
+
+
+def inventory_fields(card_ids: List[str]) -> Dict:
+    """
+    Campos del formato compacto para una lista completa de IDs en orden de llegada
+    """
+    return {"cardCounts": compact(card_ids), "recentCardIds": list(card_ids[-RECENT_CARDS:])}
+
+
+def expand(card_counts: Dict[str, int], recent: Iterable[str] = ()) -> List[str]:
+    """
+    Lista de IDs con un elemento por copia: las copias agrupadas por carta en
+    el orden del mapa y, al final, las cartas recientes en orden de llegada
+    """
+    remaining = Counter({card_id: int(count) for card_id, count in card_counts.items() if count > 0})
+    tail = []
+    for card_id in reversed(list(recent)):
+        if remaining[card_id] > 0:
+            remaining[card_id] -= 1
+            tail.append(card_id)
+    tail.reverse()
+    return [card_id for card_id, count in remaining.items() for _ in range(count)] + tail
+
+
+def card_counts(user: Dict) -> Dict[str, int]:
+    """
+    Inventario del usuario en formato compacto, venga en el formato que venga
+    """
+    counts = Counter(user.get("cardIds") or [])
+    for card_id, count in (user.get("cardCounts") or {}).items():
+        counts[card_id] += count
+    return {card_id: count for card_id, count in counts.items() if count > 0}
+
+
+def card_ids(user: Dict) -> List[str]:
+    """
+    cardIds de las respuestas de la API (un ID por copia)
+    Los documentos sin migrar conservan su orden original
+    """
+    if "cardCounts" not in user:
+        return list(user.get("cardIds") or [])
+    return expand(card_counts(user), user.get("recentCardIds") or [])
+
+
+def owns(user: Dict, card_id: str) -> bool:
+    return (user.get("cardCounts") or {}).get(card_id, 0) > 0 or card_id in (user.get("cardIds") or [])
+
+
+def add_cards_update(user: Dict, new_card_ids: List[str]) -> Dict:
+    """
+    Campos del update que añade cartas al inventario del usuario
+    - Formato nuevo: un Increment por carta distinta, sin reescribir el resto
+    - Documento antiguo: se migra en la misma escritura (cardCounts completo, sin cardIds)
+    """
+    previous = user.get("cardIds") or user.get("recentCardIds") or []
+    recent = (list(previous) + list(new_card_ids))[-RECENT_CARDS:]
+    added = Counter(new_card_ids)
+    if "cardIds" in user or not all(_SIMPLE_ID.match(card_id) for card_id in added):
+        counts = Counter(card_counts(user))
+        counts.update(added)
+        return {"cardCounts": dict(counts), "recentCardIds": recent, "cardIds": DELETE_FIELD}
+    update = {f"cardCounts.{card_id}": Increment(count) for card_id, count in added.items()}
+    update["recentCardIds"] = recent
+    return update
+
+
+def migration_update(user: Dict) -> Optional[Dict]:
+    """
+    Update que pasa un documento antiguo al formato compacto (None si ya lo está)
+    """
+    if "cardIds" not in user:
+        return None
+    return {
+        "cardCounts": card_counts(user),
+        "recentCardIds": list(user["cardIds"][-RECENT_CARDS:]),
+        "cardIds": DELETE_FIELD
+    }
@@ -1,42 +1,83 @@
 """
 Firebase Service - Integración con Firebase Authentication + Firestore
 Mantiene la ARQUITECTURA DE IDS: solo almacena IDs, no datos de cartas
+El acceso a datos pasa por el backend de storage/ (Firestore, memoria o SQLite)
 """
 
-import firebase_admin
-from firebase_admin import credentials, firestore, auth
 import os
 import json
+import asyncio
+import bisect
+import functools
+import heapq
+import pathlib
+import secrets
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Callable, Any
 
-# Inicializar Firebase Admin SDK
-# Soporta dos métodos de configuración:
-# 1. Variable de entorno FIREBASE_CONFIG con JSON como string
-# 2. Archivo JSON en firebase_config/ (fallback)
-import pathlib
+import numpy as np
 
-firebase_config_env = os.getenv("FIREBASE_CONFIG")
+import storage
+import box_score
+import card_inventory
+import leaderboard
+import lineup_scoring
+from session_store import SessionStore, SignedSessionTokens, run_sweeper
+from user_cache import UserCache
+from write_buffer import WriteBehindBuffer
+from pack_engine import BY_SIZE, PackEngine
+from player_form import calcular_forma
+from scoring_rules import ScoringRules
+from player_stats import PlayerStatsColumns
+from storage import DELETE_FIELD, SERVER_TIMESTAMP, ArrayUnion, DocumentAlreadyExists, EmailAlreadyExists
+from storage.base import MISSING
 
-if firebase_config_env:
-    # Cargar desde variable de entorno
-    try:
-        config_dict = json.loads(firebase_config_env)
-        cred = credentials.Certificate(config_dict)
-        print("✅ Firebase config cargada desde variable de entorno FIREBASE_CONFIG")
-    except json.JSONDecodeError as e:
-        print(f"❌ Error al parsear FIREBASE_CONFIG: {e}")
-        raise Exception("FIREBASE_CONFIG contiene JSON inválido")
-else:
-    # Cargar desde archivo (método tradicional)
-    config_path = pathlib.Path(__file__).parent / "firebase_config" / "fantasy-de-dalt-firebase-adminsdk-fbsvc-061b5456f9.json"
-    cred = credentials.Certificate(str(config_path))
-    print(f"✅ Firebase config cargada desde archivo: {config_path}")
-
-firebase_admin.initialize_app(cred)
-
-# Cliente de Firestore
-db = firestore.client()
+# Backend de almacenamiento (STORAGE_BACKEND: firestore | memory | sqlite)
+# Firebase Admin solo se inicializa si el backend elegido es firestore
+store = storage.create_store()
+print(f"🗄️  Backend de almacenamiento: {store.name}")
+
+# =============================================================================
+# EJECUCIÓN FUERA DEL EVENT LOOP
+# El SDK de Firestore y Firebase Auth son síncronos: cada llamada se ejecuta en
+# un pool de hilos acotado para no bloquear el event loop de uvicorn
+# =============================================================================
+
+FIRESTORE_MAX_WORKERS = int(os.getenv("FIRESTORE_MAX_WORKERS", "32"))
+
+_executor = ThreadPoolExecutor(
+    max_workers=FIRESTORE_MAX_WORKERS,
+    thread_name_prefix="firestore"
+)
+
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Ejecuta una llamada bloqueante (Firestore / Firebase Auth) en el pool de hilos
+    y espera su resultado sin bloquear el event loop
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+async def run_store(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Ejecuta una operación del backend de almacenamiento
+    Solo pasa por el pool de hilos si el backend hace I/O bloqueante
+    """
+    if store.blocking:
+        return await run_blocking(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+def shutdown_executor():
+    """
+    Cierra el pool de hilos esperando a que terminen las llamadas en curso
+    """
+    _executor.shutdown(wait=True)
+    store.close()
 
 # =============================================================================
 # COLECCIONES
@@ -44,7 +85,86 @@ db = firestore.client()
 
 USERS_COLLECTION = "users"
 PLAYERS_COLLECTION = "players"
-# Colecciones: users (usuarios) y players (jugadores reales con estadísticas)
+PLAYER_JORNADAS_COLLECTION = "playerJornadas"
+USERNAMES_COLLECTION = "usernames"
+USER_EMAILS_COLLECTION = "userEmails"
+PACK_OPENINGS_COLLECTION = "packOpenings"
+# Colecciones: users (usuarios), players (jugadores reales con su resumen de
+# temporada), playerJornadas (un documento por jugador y jornada: "{playerId}#{n}")
+# usernames / userEmails (reservas: username o email normalizado -> {uid})
+# y packOpenings (cada apertura de sobres con la semilla de cada sobre)
+
+# Usuarios anteriores a las reservas: si falta la reserva se busca con una query
+# (USER_INDEX_FALLBACK=0 la desactiva una vez ejecutado backfill_user_index.py)
+USER_INDEX_FALLBACK = os.getenv("USER_INDEX_FALLBACK", "1") != "0"
+
+# Campos consultados con where/order_by (los backends locales los indexan)
+store.ensure_index(USERS_COLLECTION, "username")
+store.ensure_index(USERS_COLLECTION, "email")
+store.ensure_index(USERS_COLLECTION, "points")
+store.ensure_index(PLAYERS_COLLECTION, "activo")
+store.ensure_index(PLAYER_JORNADAS_COLLECTION, "playerId")
+store.ensure_index(PLAYER_JORNADAS_COLLECTION, "jornada")
+store.ensure_index(PACK_OPENINGS_COLLECTION, "userId")
+
+# Campos que leen la reconstrucción de clasificaciones y la puntuación de
+# jornadas (proyección: el resto del documento, cartas y códigos canjeados, no
+# se transfiere). /api/rankings no lee usuarios: sale de las clasificaciones en memoria
+LEADERBOARD_FIELDS = ("username", "points", "jornadaPoints")
+SCORING_FIELDS = LEADERBOARD_FIELDS + ("lineupIds",)
+
+# Escrituras por lote en las operaciones masivas (límite de un WriteBatch de Firestore)
+WRITE_BATCH_SIZE = 500
+
+# =============================================================================
+# ESCRITURAS DIFERIDAS (WRITE-BEHIND)
+# Campos no críticos (lastLogin...) que pueden llegar al backend con un
+# segundo de retraso: se combinan por documento y se envían en lotes
+# =============================================================================
+
+WRITE_BEHIND_INTERVAL = float(os.getenv("WRITE_BEHIND_INTERVAL_MS", "1000")) / 1000
+WRITE_BEHIND_MAX_ENTRIES = int(os.getenv("WRITE_BEHIND_MAX_ENTRIES", "500"))
+
+async def _flush_deferred(writes: List[tuple]) -> int:
+    """
+    Envía las escrituras diferidas en lotes; si un lote falla (p. ej. un
+    usuario borrado) sus escrituras se reintentan una a una
+    Devuelve cuántas se aplicaron
+    """
+    total = 0
+    for offset in range(0, len(writes), WRITE_BATCH_SIZE):
+        chunk = writes[offset:offset + WRITE_BATCH_SIZE]
+        try:
+            await run_store(store.batch_write, chunk)
+            applied = chunk
+        except Exception as e:
+            print(f"⚠️ Lote diferido fallido ({str(e)}), reintentando una a una")
+            applied = []
+            for write in chunk:
+                try:
+                    await run_store(store.batch_write, [write])
+                    applied.append(write)
+                except Exception as e:
+                    print(f"❌ Escritura diferida descartada {write[1]}/{write[2]}: {str(e)}")
+        for _, collection, doc_id, data in applied:
+            if collection == USERS_COLLECTION:
+                user_cache.apply(doc_id, data)
+        total += len(applied)
+    return total
+
+deferred_writes = WriteBehindBuffer(_flush_deferred, WRITE_BEHIND_INTERVAL, WRITE_BEHIND_MAX_ENTRIES)
+
+def defer_user_write(user_id: str, data: Dict):
+    """
+    Encola un update del usuario (se confirma en el siguiente envío del buffer)
+    """
+    deferred_writes.add(USERS_COLLECTION, user_id, data)
+
+def get_write_buffer_stats() -> Dict:
+    """
+    Profundidad de la cola y latencia de envío del buffer de escrituras diferidas
+    """
+    return deferred_writes.stats()
 
 # =============================================================================
 # POOL DE IDS DE CARTAS
@@ -79,134 +199,256 @@ CARDS_BY_POSITION = {
     "Pívot": ["card_005"]  # Alejandro de Haro
 }
 
+# Tipos de sobre: un hueco por carta, con el peso de cada pool en ese hueco
+# (BY_SIZE = peso proporcional al tamaño del pool, como elegir de la lista concatenada)
+STANDARD_SLOT = {"common": 60, "rare": 25, "epic": 12, "legendary": 3}
+
+PACK_DEFINITIONS = {
+    # Bienvenida: 5 cartas, una de cada posición
+    "welcome": [
+        {"Base": 1}, {"Escolta": 1}, {"Alero": 1}, {"Ala-Pívot": 1}, {"Pívot": 1}
+    ],
+    # Estándar: 2 cartas por rareza (60% común, 25% rara, 12% épica, 3% legendaria)
+    "standard": [STANDARD_SLOT, STANDARD_SLOT],
+    # Legendario: 3 cartas especiales
+    "legendary": [
+        {"common": BY_SIZE, "rare": BY_SIZE},
+        {"epic": BY_SIZE, "legendary": BY_SIZE},
+        {"legendary": 1}
+    ]
+}
+
+# Compilado una sola vez al importar
+# Cada sobre se abre con su propia semilla, que se guarda con la apertura
+# (packOpenings): pack_engine.open(tipo, semilla) reproduce sus cartas
+pack_engine = PackEngine(
+    PACK_DEFINITIONS,
+    {**CARD_ID_POOLS, **CARDS_BY_POSITION},
+    default_type="standard"
+)
+
+def new_pack_seed() -> int:
+    """
+    Semilla de un sobre: 63 bits para que quepa en un entero de Firestore (int64)
+    """
+    return secrets.randbits(63)
+
 # =============================================================================
 # FUNCIONES DE USUARIOS
 # =============================================================================
 
-async def get_user_by_username(username: str) -> Optional[Dict]:
+# Caché de documentos de usuario (USER_CACHE_TTL=0 la desactiva)
+user_cache = UserCache(
+    ttl=float(os.getenv("USER_CACHE_TTL", "10")),
+    max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", "50000"))
+)
+
+def _with_id(doc_id: str, data: Optional[Dict], key: str = "_id") -> Optional[Dict]:
     """
-    Obtiene un usuario por username
-    1 query a Firestore
+    Añade el ID del documento a sus datos
     """
-    users_ref = db.collection(USERS_COLLECTION)
-    query = users_ref.where("username", "==", username.lower()).limit(1)
-    docs = query.stream()
+    if data is None:
+        return None
+    data[key] = doc_id
+    return data
+
+async def _first_user(field: str, value: str) -> Optional[Dict]:
+    """
+    Devuelve el primer usuario cuyo campo coincide con el valor
+    """
+    docs = await run_store(store.query, USERS_COLLECTION, [(field, "==", value)], limit=1)
     
-    for doc in docs:
-        user_data = doc.to_dict()
-        user_data["_id"] = doc.id
-        return user_data
+    for doc_id, user_data in docs:
+        return _with_id(doc_id, user_data)
+    
+    return None
+
+def _index_key(value: str) -> str:
+    """
+    ID del documento de reserva de un username o email: sin espacios, en
+    minúsculas y sin "/" (no se admite en IDs de documento de Firestore)
+    """
+    return value.strip().lower().replace("%", "%25").replace("/", "%2F")
+
+def _user_index_writes(user_id: str, user: Dict, op: str = "create") -> List[tuple]:
+    """
+    Escrituras de las reservas de username y email de un usuario
+    """
+    writes = []
+    if user.get("username"):
+        writes.append((op, USERNAMES_COLLECTION, _index_key(user["username"]), {"uid": user_id}))
+    if user.get("email"):
+        writes.append((op, USER_EMAILS_COLLECTION, _index_key(user["email"]), {"uid": user_id}))
+    return writes
+
+async def _user_by_index(collection: str, field: str, value: str) -> Optional[Dict]:
+    """
+    Busca un usuario por su reserva (lectura por ID) y luego por ID (caché)
+    Sin reserva, y con USER_INDEX_FALLBACK, recurre a la query por el campo
+    """
+    reservation = await run_store(store.get, collection, _index_key(value))
+    if reservation is not None:
+        return await get_user_by_id(reservation["uid"])
     
+    if USER_INDEX_FALLBACK:
+        return await _first_user(field, value.lower())
     return None
 
+async def get_user_by_username(username: str) -> Optional[Dict]:
+    """
+    Obtiene un usuario por username
+    1 lectura de la reserva + get_user_by_id (0 si está en caché)
+    """
+    return await _user_by_index(USERNAMES_COLLECTION, "username", username)
+
 async def get_user_by_id(user_id: str) -> Optional[Dict]:
     """
     Obtiene un usuario por ID
-    1 query a Firestore
+    0 queries si está en caché, 1 query a Firestore si no
     """
-    doc_ref = db.collection(USERS_COLLECTION).document(user_id)
-    doc = doc_ref.get()
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
     
-    if doc.exists:
-        user_data = doc.to_dict()
-        user_data["_id"] = doc.id
-        return user_data
-    
-    return None
+    version = user_cache.version(user_id)
+    user_data = _with_id(user_id, await run_store(store.get, USERS_COLLECTION, user_id))
+    if user_data is not None:
+        user_cache.put(user_id, user_data, version)
+    return user_data
+
+async def _update_user(user_id: str, data: Dict):
+    """
+    Escribe campos del usuario y refleja el cambio en la caché
+    """
+    await run_store(store.update, USERS_COLLECTION, user_id, data)
+    user_cache.apply(user_id, data)
+
+def get_user_cache_stats() -> Dict:
+    """
+    Contadores de la caché de usuarios: tamaño, aciertos y fallos
+    """
+    return user_cache.stats()
 
 async def get_user_by_email(email: str) -> Optional[Dict]:
     """
     Obtiene un usuario por email desde Firestore
-    1 query a Firestore
+    1 lectura de la reserva + get_user_by_id (0 si está en caché)
     """
-    users_ref = db.collection(USERS_COLLECTION)
-    query = users_ref.where("email", "==", email.lower()).limit(1)
-    docs = query.stream()
-    
-    for doc in docs:
-        user_data = doc.to_dict()
-        user_data["_id"] = doc.id
-        return user_data
+    return await _user_by_index(USER_EMAILS_COLLECTION, "email", email)
+
+# Estado de las cuentas de Firebase Auth (existe y no está deshabilitada),
+# cacheado AUTH_CHECK_TTL segundos: los logins repetidos no consultan Auth
+AUTH_CHECK_TTL = float(os.getenv("AUTH_CHECK_TTL", "300"))
+AUTH_CHECK_MAX_ENTRIES = int(os.getenv("AUTH_CHECK_MAX_ENTRIES", "50000"))
+_auth_checks: "OrderedDict[str, tuple]" = OrderedDict()  # {uid: (activa, comprobada_en)}
+
+def _remember_auth_check(uid: str, active: bool):
+    _auth_checks[uid] = (active, time.monotonic())
+    _auth_checks.move_to_end(uid)
+    while len(_auth_checks) > AUTH_CHECK_MAX_ENTRIES:
+        _auth_checks.popitem(last=False)
+
+async def auth_account_active(uid: str) -> bool:
+    """
+    Comprueba que la cuenta de Firebase Auth existe y no está deshabilitada
+    0 llamadas si se comprobó hace menos de AUTH_CHECK_TTL, 1 si no
+    """
+    cached = _auth_checks.get(uid)
+    if cached is not None and time.monotonic() - cached[1] < AUTH_CHECK_TTL:
+        _auth_checks.move_to_end(uid)
+        return cached[0]
     
-    return None
+    active = await run_store(store.auth_user_active, uid)
+    _remember_auth_check(uid, active)
+    return active
 
-async def verify_user_login(email: str, password: str) -> Optional[Dict]:
+async def verify_user_login(user: Dict, password: str) -> bool:
+    """
+    Verifica las credenciales contra el documento de usuario ya cargado
+    - Usuarios con Firebase Auth: la contraseña NO se valida aquí (tampoco se
+      hacía antes: Firebase Admin SDK no puede verificar contraseñas). Solo se
+      comprueba que el documento es el de su cuenta de Auth (authUid == _id, que
+      no es una credencial) y que la cuenta sigue existiendo y está habilitada
+      (comprobación cacheada, ver auth_account_active). La autenticación real
+      debe hacerse con Firebase Auth en el frontend
+    - Usuarios antiguos sin Firebase Auth (demo): password del documento
+    """
+    if user.get("authUid"):
+        return user["authUid"] == user["_id"] and await auth_account_active(user["authUid"])
+    return user.get("password") == password
+
+def record_login(user_id: str):
     """
-    Verifica las credenciales del usuario usando Firebase Authentication
-    Nota: Firebase Admin SDK no puede verificar contraseñas directamente,
-    por lo que usamos un enfoque híbrido:
-    1. Buscamos el usuario por email en Firestore
-    2. Para producción, se debe usar Firebase Auth en el frontend
+    Actualiza la última conexión sin esperar a la escritura (buffer diferido)
     """
-    try:
-        # Obtener usuario de Firebase Auth por email
-        firebase_user = auth.get_user_by_email(email)
-        
-        # Obtener datos del usuario de Firestore
-        user_data = await get_user_by_id(firebase_user.uid)
-        
-        if user_data:
-            # Actualizar última conexión
-            doc_ref = db.collection(USERS_COLLECTION).document(firebase_user.uid)
-            doc_ref.update({"lastLogin": firestore.SERVER_TIMESTAMP})
-            
-            return user_data
-        
-        return None
-        
-    except auth.UserNotFoundError:
-        return None
-    except Exception as e:
-        print(f"❌ Error en login: {str(e)}")
-        return None
+    defer_user_write(user_id, {"lastLogin": SERVER_TIMESTAMP})
 
 async def create_user(username: str, password: str, email: str) -> Dict:
     """
     Crea un nuevo usuario en Firebase Authentication Y Firestore
     1. Crea usuario en Firebase Authentication
     2. Crea documento en Firestore con colección VACÍA (sin cartas iniciales)
+       junto con las reservas de username y email (un solo lote atómico)
     """
-    # Verificar si el usuario ya existe en Firestore
+    # Comprobación rápida para no crear la cuenta de Auth en vano
+    # (la garantía la da la reserva del paso 2)
     existing_user = await get_user_by_username(username)
     if existing_user:
         raise Exception("El nombre de usuario ya está en uso")
     
     try:
         # 1. Crear usuario en Firebase Authentication
-        firebase_user = auth.create_user(
-            email=email,
-            password=password,
-            display_name=username
-        )
+        uid = await run_store(store.auth_create_user, email, password, username)
         
-        print(f"✅ Usuario creado en Firebase Auth: {firebase_user.uid}")
+        print(f"✅ Usuario creado en Firebase Auth: {uid}")
         
         # 2. Crear documento en Firestore usando el UID de Firebase Auth
         # Usuario inicia con colección VACÍA
         user_data = {
             "username": username.lower(),
             "email": email,
-            "cardIds": [],  # Colección vacía - el usuario debe canjear códigos
+            "cardCounts": {},  # Colección vacía - el usuario debe canjear códigos
+            "recentCardIds": [],
             "lineupIds": [],  # Alineación vacía
             "unopenedPacks": [],  # Sobres sin abrir
             "points": 0,
             "rank": 0,
             "redeemedCodes": [],
-            "createdAt": firestore.SERVER_TIMESTAMP,
-            "lastLogin": firestore.SERVER_TIMESTAMP,
-            "authUid": firebase_user.uid  # Vinculamos con Firebase Auth
+            "createdAt": SERVER_TIMESTAMP,
+            "lastLogin": SERVER_TIMESTAMP,
+            "authUid": uid  # Vinculamos con Firebase Auth
         }
         
         # Usar el UID de Firebase Auth como ID del documento en Firestore
-        doc_ref = db.collection(USERS_COLLECTION).document(firebase_user.uid)
-        doc_ref.set(user_data)
-        user_data["_id"] = firebase_user.uid
+        # Las reservas se crean solo si no existen: si otro registro simultáneo
+        # se quedó con el username o el email, el lote entero falla
+        try:
+            await run_store(
+                store.batch_write,
+                [("set", USERS_COLLECTION, uid, user_data)] + _user_index_writes(uid, user_data)
+            )
+        except DocumentAlreadyExists:
+            await run_store(store.auth_delete_user, uid)
+            raise
+        user_cache.invalidate(uid)
+        _remember_auth_check(uid, True)
+        user_data["_id"] = uid
+        
+        try:
+            await add_user_to_leaderboards(uid, user_data["username"])
+        except Exception as e:
+            # El usuario ya existe: entrará en la clasificación con la próxima jornada puntuada
+            print(f"⚠️  No se pudo añadir {uid} a la clasificación: {str(e)}")
         
-        print(f"✅ Usuario creado en Firestore con colección vacía: {firebase_user.uid}")
+        print(f"✅ Usuario creado en Firestore con colección vacía: {uid}")
         
         return user_data
         
-    except auth.EmailAlreadyExistsError:
+    except EmailAlreadyExists:
+        raise Exception("El email ya está registrado")
+    except DocumentAlreadyExists:
+        if await run_store(store.get, USERNAMES_COLLECTION, _index_key(username)) is not None:
+            raise Exception("El nombre de usuario ya está en uso")
         raise Exception("El email ya está registrado")
     except Exception as e:
         print(f"❌ Error creando usuario: {str(e)}")
@@ -214,11 +456,10 @@ async def create_user(username: str, password: str, email: str) -> Dict:
 
 async def update_user_cards(user_id: str, card_ids: List[str]) -> bool:
     """
-    Actualiza las cartas del usuario (SOLO IDs)
+    Sustituye las cartas del usuario (SOLO IDs, se guardan como {cardId: copias})
     1 query a Firestore
     """
-    doc_ref = db.collection(USERS_COLLECTION).document(user_id)
-    doc_ref.update({"cardIds": card_ids})
+    await _update_user(user_id, {**card_inventory.inventory_fields(card_ids), "cardIds": DELETE_FIELD})
     return True
 
 async def update_user_lineup(user_id: str, lineup_ids: Dict) -> bool:
@@ -227,8 +468,7 @@ async def update_user_lineup(user_id: str, lineup_ids: Dict) -> bool:
     Guarda diccionario con keys de posición y valores con {id, playerId, multiplicador}
     1 query a Firestore
     """
-    doc_ref = db.collection(USERS_COLLECTION).document(user_id)
-    doc_ref.update({"lineupIds": lineup_ids})
+    await _update_user(user_id, {"lineupIds": lineup_ids})
     return True
 
 async def add_unopened_pack(user_id: str, pack_type: str) -> bool:
@@ -236,13 +476,12 @@ async def add_unopened_pack(user_id: str, pack_type: str) -> bool:
     Añade un sobre sin abrir al inventario del usuario
     1 query a Firestore
     """
-    doc_ref = db.collection(USERS_COLLECTION).document(user_id)
     pack_data = {
         "type": pack_type,
         "timestamp": datetime.now().isoformat()  # Usar ISO string en lugar de SERVER_TIMESTAMP
     }
-    doc_ref.update({
-        "unopenedPacks": firestore.ArrayUnion([pack_data])
+    await _update_user(user_id, {
+        "unopenedPacks": ArrayUnion([pack_data])
     })
     return True
 
@@ -251,28 +490,117 @@ async def remove_unopened_pack(user_id: str, pack_index: int) -> bool:
     Remueve un sobre del inventario de sobres sin abrir
     1 query a Firestore - requiere leer primero
     """
-    doc_ref = db.collection(USERS_COLLECTION).document(user_id)
-    doc = doc_ref.get()
+    user_data = await run_store(store.get, USERS_COLLECTION, user_id)
     
-    if doc.exists:
-        user_data = doc.to_dict()
+    if user_data:
         unopened_packs = user_data.get("unopenedPacks", [])
         
         if 0 <= pack_index < len(unopened_packs):
             unopened_packs.pop(pack_index)
-            doc_ref.update({"unopenedPacks": unopened_packs})
+            await _update_user(user_id, {"unopenedPacks": unopened_packs})
             return True
     
     return False
 
+# Presupuesto de latencia de la apertura de sobres (transacción completa)
+PACK_OPEN_BUDGET_MS = float(os.getenv("PACK_OPEN_BUDGET_MS", "250"))
+
+def _open_packs(transaction, user_id: str, select: Callable[[List[Dict]], Optional[List[int]]],
+                generate_pack: Callable[[str, int], List[str]]) -> Optional[Dict]:
+    """
+    Cuerpo común de las transacciones de apertura de sobres
+    `select` recibe los sobres sin abrir y devuelve los índices a abrir (None = inválido)
+    `generate_pack(tipo, semilla)` genera las cartas; la semilla de cada sobre
+    se guarda en packOpenings en la misma transacción
+    """
+    user_data = transaction.get(USERS_COLLECTION, user_id)
+    if not user_data:
+        return None
+    
+    unopened_packs = user_data.get("unopenedPacks", [])
+    indexes = select(unopened_packs)
+    if not indexes:
+        return None
+    
+    opened = []
+    audit = []
+    added = []
+    for index in indexes:
+        pack_type = unopened_packs[index].get("type", "standard")
+        seed = new_pack_seed()
+        new_card_ids = generate_pack(pack_type, seed)
+        added.extend(new_card_ids)
+        opened.append({"packType": pack_type, "newCardIds": new_card_ids})
+        audit.append({"packType": pack_type, "seed": seed, "cardIds": new_card_ids})
+    
+    opened_indexes = set(indexes)
+    # Solo los contadores de las cartas obtenidas (Increment), no el inventario entero
+    changes = card_inventory.add_cards_update(user_data, added)
+    changes["unopenedPacks"] = [pack for i, pack in enumerate(unopened_packs) if i not in opened_indexes]
+    transaction.update(USERS_COLLECTION, user_id, changes)
+    transaction.set(PACK_OPENINGS_COLLECTION, secrets.token_hex(16), {
+        "userId": user_id,
+        "openedAt": SERVER_TIMESTAMP,
+        "packs": audit
+    })
+    
+    return {"packs": opened, "changes": changes}
+
+async def _run_pack_transaction(user_id: str, select: Callable[[List[Dict]], Optional[List[int]]],
+                                generate_pack: Callable[[str, int], List[str]]) -> Optional[List[Dict]]:
+    """
+    Ejecuta la transacción de apertura, mide su latencia y actualiza la caché
+    """
+    start = time.perf_counter()
+    result = await run_store(
+        store.run_transaction,
+        lambda transaction: _open_packs(transaction, user_id, select, generate_pack)
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if elapsed_ms > PACK_OPEN_BUDGET_MS:
+        print(f"⚠️  Apertura de sobres lenta: {elapsed_ms:.0f} ms (presupuesto {PACK_OPEN_BUDGET_MS:.0f} ms)")
+    
+    if result is None:
+        return None
+    
+    user_cache.apply(user_id, result["changes"])
+    return result["packs"]
+
+async def open_unopened_pack(user_id: str, pack_index: int,
+                             generate_pack: Callable[[str, int], List[str]]) -> Optional[Dict]:
+    """
+    Abre un sobre del inventario en una única transacción:
+    lee el usuario, genera las cartas, suma sus copias a cardCounts y quita el sobre
+    1 lectura + 1 escritura atómicas (más el registro de la apertura con su
+    semilla): dos aperturas simultáneas no pierden cartas ni quitan el sobre equivocado
+    Devuelve {packType, newCardIds} o None si el índice no es válido
+    """
+    def _select(unopened_packs: List[Dict]) -> Optional[List[int]]:
+        return [pack_index] if 0 <= pack_index < len(unopened_packs) else None
+    
+    packs = await _run_pack_transaction(user_id, _select, generate_pack)
+    return packs[0] if packs else None
+
+async def open_unopened_packs(user_id: str, generate_pack: Callable[[str, int], List[str]],
+                              count: Optional[int] = None) -> Optional[List[Dict]]:
+    """
+    Abre varios sobres (los `count` más antiguos, o todos) en una única transacción
+    Todas las cartas nuevas y todos los sobres quitados van en una sola escritura
+    Devuelve [{packType, newCardIds}, ...] o None si no hay sobres que abrir
+    """
+    def _select(unopened_packs: List[Dict]) -> Optional[List[int]]:
+        total = len(unopened_packs) if count is None else min(count, len(unopened_packs))
+        return list(range(total)) if total > 0 else None
+    
+    return await _run_pack_transaction(user_id, _select, generate_pack)
+
 async def add_redeemed_code(user_id: str, code: str) -> bool:
     """
     Añade un código a la lista de códigos canjeados
     1 query a Firestore
     """
-    doc_ref = db.collection(USERS_COLLECTION).document(user_id)
-    doc_ref.update({
-        "redeemedCodes": firestore.ArrayUnion([code])
+    await _update_user(user_id, {
+        "redeemedCodes": ArrayUnion([code])
     })
     return True
 
@@ -286,6 +614,7 @@ CODES_JSON_PATH = pathlib.Path(__file__).parent / "codes.json"
 def load_codes() -> Dict:
     """
     Carga los códigos desde el archivo JSON
+    Indexados por código en mayúsculas
     """
     try:
         if CODES_JSON_PATH.exists():
@@ -295,7 +624,7 @@ def load_codes() -> Dict:
                 for code, data in codes_data.items():
                     if isinstance(data.get("validUntil"), str):
                         data["validUntil"] = datetime.fromisoformat(data["validUntil"])
-                return codes_data
+                return {code.upper(): data for code, data in codes_data.items()}
         else:
             print(f"⚠️  Archivo de códigos no encontrado: {CODES_JSON_PATH}")
             return {}
@@ -306,7 +635,9 @@ def load_codes() -> Dict:
 def save_codes(codes: Dict) -> bool:
     """
     Guarda los códigos en el archivo JSON
+    Escritura atómica: archivo temporal + rename, los lectores nunca ven un JSON a medias
     """
+    tmp_path = None
     try:
         # Convertir datetime a strings ISO antes de guardar
         codes_to_save = {}
@@ -316,22 +647,84 @@ def save_codes(codes: Dict) -> bool:
                 data_copy["validUntil"] = data_copy["validUntil"].isoformat()
             codes_to_save[code] = data_copy
         
-        with open(CODES_JSON_PATH, 'w', encoding='utf-8') as f:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=CODES_JSON_PATH.parent,
+            prefix=f".{CODES_JSON_PATH.name}.",
+            suffix=".tmp"
+        )
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
             json.dump(codes_to_save, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, CODES_JSON_PATH)
+        tmp_path = None
+        
+        code_registry.replace(codes)
         return True
     except Exception as e:
         print(f"❌ Error guardando códigos: {str(e)}")
         return False
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+class CodeRegistry:
+    """
+    Registro en memoria de los códigos canjeables
+    Se construye una vez y solo se vuelve a leer codes.json cuando cambian su
+    mtime o su tamaño (edición manual) o cuando un endpoint de admin escribe
+    """
+    
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self._codes: Dict[str, Dict] = {}
+        self._signature = None
+        self._lock = threading.Lock()
+    
+    def _file_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    
+    def _codes_snapshot(self) -> Dict[str, Dict]:
+        """
+        Devuelve el diccionario vigente, recargándolo si el archivo cambió
+        """
+        signature = self._file_signature()
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._codes = load_codes()
+                    self._signature = signature
+        return self._codes
+    
+    def replace(self, codes: Dict):
+        """
+        Sustituye el contenido tras una escritura propia (sin volver a parsear)
+        """
+        with self._lock:
+            self._codes = {code.upper(): data.copy() for code, data in codes.items()}
+            self._signature = self._file_signature()
+    
+    def get(self, code: str) -> Optional[Dict]:
+        data = self._codes_snapshot().get(code.upper())
+        return data.copy() if data is not None else None
+    
+    def all(self) -> Dict[str, Dict]:
+        return {code: data.copy() for code, data in self._codes_snapshot().items()}
+
+code_registry = CodeRegistry(CODES_JSON_PATH)
 
 def get_code(code: str) -> Optional[Dict]:
     """
-    Obtiene información de un código desde el archivo JSON
+    Obtiene información de un código desde el registro en memoria
     """
-    codes = load_codes()
     code_upper = code.upper()
+    code_data = code_registry.get(code_upper)
     
-    if code_upper in codes:
-        code_data = codes[code_upper].copy()
+    if code_data is not None:
         code_data["code"] = code_upper
         
         # Verificar si está activo
@@ -343,15 +736,15 @@ def get_code(code: str) -> Optional[Dict]:
 
 def get_all_codes() -> Dict:
     """
-    Obtiene todos los códigos del archivo JSON
+    Obtiene todos los códigos del registro en memoria
     """
-    return load_codes()
+    return code_registry.all()
 
 def add_code(code: str, pack_type: str, valid_until: datetime, description: str = "", active: bool = True) -> bool:
     """
     Añade un nuevo código al archivo JSON
     """
-    codes = load_codes()
+    codes = code_registry.all()
     code_upper = code.upper()
     
     if code_upper in codes:
@@ -371,7 +764,7 @@ def update_code(code: str, pack_type: Optional[str] = None, valid_until: Optiona
     """
     Actualiza un código existente en el archivo JSON
     """
-    codes = load_codes()
+    codes = code_registry.all()
     code_upper = code.upper()
     
     if code_upper not in codes:
@@ -392,7 +785,7 @@ def delete_code(code: str) -> bool:
     """
     Elimina un código del archivo JSON
     """
-    codes = load_codes()
+    codes = code_registry.all()
     code_upper = code.upper()
     
     if code_upper not in codes:
@@ -405,47 +798,124 @@ def delete_code(code: str) -> bool:
 # SESIONES (EN MEMORIA - NO SE GUARDAN EN FIRESTORE)
 # =============================================================================
 
-# Diccionario en memoria para sesiones activas {token: {userId, expiresAt}}
-active_sessions = {}
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "100000"))
+SESSION_TTL_DAYS = float(os.getenv("SESSION_TTL_DAYS", "7"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+
+# Modo de sesiones:
+# - memory: tokens aleatorios guardados en este proceso (un solo worker)
+# - stateless: tokens firmados con HMAC, válidos en cualquier worker/réplica
+#   que comparta SESSION_SECRET
+SESSION_MODE = os.getenv("SESSION_MODE", "memory").lower()
+REVOKED_SESSIONS_COLLECTION = "revokedSessions"
+
+if SESSION_MODE not in ("memory", "stateless"):
+    raise Exception("SESSION_MODE debe ser 'memory' o 'stateless'")
+
+# Sesiones activas {token: {userId, expiresAt}} con límite LRU y barrido por TTL
+active_sessions = SessionStore(
+    max_sessions=SESSION_MAX_ENTRIES,
+    ttl=timedelta(days=SESSION_TTL_DAYS)
+)
+
+signed_tokens: Optional[SignedSessionTokens] = None
+if SESSION_MODE == "stateless":
+    session_secret = os.getenv("SESSION_SECRET")
+    if not session_secret:
+        print("❌ SESSION_MODE=stateless requiere SESSION_SECRET")
+        raise Exception("SESSION_SECRET no configurado")
+    signed_tokens = SignedSessionTokens(
+        session_secret.encode("utf-8"),
+        ttl=timedelta(days=SESSION_TTL_DAYS)
+    )
+    store.ensure_index(REVOKED_SESSIONS_COLLECTION, "exp")
+
+def issue_session_token(user_id: str) -> str:
+    """
+    Emite un token firmado que lleva el userId y la expiración (modo stateless)
+    """
+    return signed_tokens.issue(user_id)
 
 def create_session(user_id: str, token: str) -> bool:
     """
     Crea una sesión en memoria (no en Firestore)
+    En modo stateless no hay nada que guardar: el token ya contiene la sesión
     """
-    active_sessions[token] = {
-        "userId": user_id,
-        "expiresAt": datetime.now() + timedelta(days=7)
-    }
+    if signed_tokens is None:
+        active_sessions.create(user_id, token)
     return True
 
 def get_session(token: str) -> Optional[Dict]:
     """
     Obtiene una sesión desde memoria (no Firestore)
+    En modo stateless se valida la firma y la lista de revocaciones
     """
-    if token in active_sessions:
-        session = active_sessions[token]
-        
-        # Verificar si ha expirado
-        if datetime.now() > session["expiresAt"]:
-            del active_sessions[token]
-            return None
-        
-        return session
-    
-    return None
+    if signed_tokens is not None:
+        return signed_tokens.verify(token)
+    return active_sessions.get(token)
 
 def delete_session(token: str) -> bool:
     """
     Elimina una sesión de memoria (no de Firestore)
+    En modo stateless el token se añade a la lista de revocaciones
     """
-    if token in active_sessions:
-        del active_sessions[token]
+    if signed_tokens is not None:
+        signed_tokens.revoke(token)
+    else:
+        active_sessions.delete(token)
     return True
 
+def revoke_user_sessions(user_id: str) -> int:
+    """
+    Cierra todas las sesiones de un usuario y devuelve cuántas había
+    (en modo stateless no se conoce el número de tokens emitidos: devuelve 0)
+    """
+    if signed_tokens is not None:
+        signed_tokens.revoke_user(user_id)
+        return 0
+    return active_sessions.revoke_user(user_id)
+
+def get_session_stats() -> Dict:
+    """
+    Contadores del almacén de sesiones: tamaño, expulsiones y expiraciones
+    """
+    if signed_tokens is not None:
+        return {"mode": SESSION_MODE, **signed_tokens.stats()}
+    return {"mode": SESSION_MODE, **active_sessions.stats()}
+
+async def sync_session_revocations():
+    """
+    Publica las revocaciones de este worker en el backend de almacenamiento e
+    incorpora las de los demás (modo stateless)
+    Se ejecuta en segundo plano: validar un token nunca consulta el backend
+    """
+    for entry in signed_tokens.take_pending():
+        await run_store(store.set, REVOKED_SESSIONS_COLLECTION, entry["id"], entry)
+    
+    docs = await run_store(
+        store.query, REVOKED_SESSIONS_COLLECTION, [("exp", ">", time.time())]
+    )
+    signed_tokens.merge_revocations(entry for _, entry in docs)
+    signed_tokens.prune()
+
+async def run_revocation_sync(interval: float):
+    """
+    Bucle de sincronización de revocaciones
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await sync_session_revocations()
+        except Exception as e:
+            print(f"❌ Error sincronizando revocaciones de sesión: {str(e)}")
+
 # =============================================================================
 # FUNCIONES DE CÁLCULO DE ESTADÍSTICAS
 # =============================================================================
 
+# Reglas de puntos fantasy (SCORING_RULES_PATH, por defecto scoring_rules.json)
+fantasy_rules = ScoringRules.load(os.getenv("SCORING_RULES_PATH"))
+
 def calcular_valoracion_acb(stats: Dict) -> float:
     """
     Calcula la valoración ACB de un jugador
@@ -477,37 +947,9 @@ def calcular_valoracion_acb(stats: Dict) -> float:
 def calcular_puntos_fantasy(stats: Dict, victoria: bool = False) -> float:
     """
     Calcula los puntos fantasy de un jugador
-    Sistema propio con bonificaciones por logros
-    """
-    puntos_base = (
-        stats.get("puntos", 0) * 1.0 +
-        stats.get("asistencias", 0) * 1.5 +
-        stats.get("rebotes", 0) * 1.2 +
-        stats.get("robos", 0) * 3.0 +
-        stats.get("tapones", 0) * 3.0 -
-        stats.get("perdidas", 0) * 1.0 -
-        stats.get("faltas", 0) * 0.5
-    )
-    
-    # Bonus por doble-doble (2 stats con 10+)
-    stats_10_plus = sum([
-        stats.get("puntos", 0) >= 10,
-        stats.get("rebotes", 0) >= 10,
-        stats.get("asistencias", 0) >= 10,
-        stats.get("robos", 0) >= 10,
-        stats.get("tapones", 0) >= 10
-    ])
-    
-    if stats_10_plus >= 2:
-        puntos_base += 5.0  # Doble-doble bonus
-    if stats_10_plus >= 3:
-        puntos_base += 15.0  # Triple-doble bonus (adicional)
-    
-    # Bonus por victoria
-    if victoria:
-        puntos_base += 2.0
-    
-    return round(puntos_base, 2)
+    Las reglas (pesos y bonus por logros) están en scoring_rules.json
+    """
+    return round(fantasy_rules.score(stats, victoria), 2)
 
 def calcular_promedios(stats_temporada: Dict, partidos_jugados: int) -> Dict:
     """
@@ -534,41 +976,248 @@ def calcular_promedios(stats_temporada: Dict, partidos_jugados: int) -> Dict:
         "puntosFantasy": round(stats_temporada.get("puntosFantasy", 0) / partidos_jugados, 2)
     }
 
+# Campos de statsTemporada que son suma de los de cada jornada
+STATS_SUMABLES = [
+    "minutosJugados", "puntos", "asistencias", "rebotes", "rebotesOfensivos",
+    "rebotesDefensivos", "robos", "tapones", "perdidas", "faltas",
+    "tiros2Anotados", "tiros2Intentados", "tiros3Anotados", "tiros3Intentados",
+    "tirosLibresAnotados", "tirosLibresIntentados", "valoracion", "puntosFantasy"
+]
+STATS_REDONDEADAS = ("valoracion", "puntosFantasy")
+
+def stats_temporada_vacias() -> Dict:
+    stats = {"partidosJugados": 0}
+    stats.update({key: 0.0 if key in STATS_REDONDEADAS else 0 for key in STATS_SUMABLES})
+    return stats
+
+def aplicar_delta_temporada(stats_temporada: Dict, quitar: Optional[Dict] = None,
+                            sumar: Optional[Dict] = None) -> Dict:
+    """
+    Totales de temporada tras quitar una línea de jornada y/o sumar otra
+    Coste constante: no recorre las demás jornadas
+    """
+    result = {**stats_temporada_vacias(), **stats_temporada}
+    result["partidosJugados"] += (1 if sumar is not None else 0) - (1 if quitar is not None else 0)
+    for key in STATS_SUMABLES:
+        value = result[key] + (sumar or {}).get(key, 0) - (quitar or {}).get(key, 0)
+        result[key] = round(value, 2) if key in STATS_REDONDEADAS else value
+    return result
+
+def recalcular_temporada(jornadas: List[Dict]) -> Dict:
+    """
+    Recalcula desde cero statsTemporada, promedios y mejorPartido
+    Es la referencia con la que se comparan las actualizaciones incrementales
+    """
+    stats_temporada = stats_temporada_vacias()
+    stats_temporada["partidosJugados"] = len(jornadas)
+    mejor_partido = None
+    
+    for jornada in jornadas:
+        s = jornada["stats"]
+        for key in STATS_SUMABLES:
+            stats_temporada[key] += s.get(key, 0)
+        
+        if not mejor_partido or s["valoracion"] > mejor_partido.get("valoracion", 0):
+            mejor_partido = _resumen_partido(jornada)
+    
+    for key in STATS_REDONDEADAS:
+        stats_temporada[key] = round(stats_temporada[key], 2)
+    
+    return {
+        "statsTemporada": stats_temporada,
+        "promedios": calcular_promedios(stats_temporada, stats_temporada["partidosJugados"]),
+        "mejorPartido": mejor_partido
+    }
+
+def _resumen_partido(jornada: Dict) -> Dict:
+    return {
+        "jornada": jornada["jornada"],
+        "fecha": jornada["fecha"],
+        "puntos": jornada["stats"]["puntos"],
+        "valoracion": jornada["stats"]["valoracion"]
+    }
+
+# -----------------------------------------------------------------------------
+# Índice de valoraciones: [[valoracion, jornada], ...] ordenado por valoración
+# descendente y, en empate, por jornada ascendente (el mismo criterio que el
+# recálculo completo). La cabeza es el mejor partido.
+# -----------------------------------------------------------------------------
+
+def _indice_valoraciones(jornadas: List[Dict]) -> List[List]:
+    return sorted(
+        ([j["stats"]["valoracion"], j["jornada"]] for j in jornadas),
+        key=lambda item: (-item[0], item[1])
+    )
+
+def _indice_insertar(indice: List[List], valoracion: float, jornada_num: int):
+    bisect.insort(indice, [valoracion, jornada_num], key=lambda item: (-item[0], item[1]))
+
+def _indice_quitar(indice: List[List], valoracion: float, jornada_num: int):
+    key = (-valoracion, jornada_num)
+    i = bisect.bisect_left(indice, key, key=lambda item: (-item[0], item[1]))
+    if i < len(indice) and indice[i][1] == jornada_num:
+        del indice[i]
+    else:
+        # Índice desincronizado: quitar por número de jornada
+        indice[:] = [item for item in indice if item[1] != jornada_num]
+
+def _buscar_jornada(jornadas: List[Dict], jornada_num: int) -> Optional[int]:
+    """
+    Posición de la jornada en el array (ordenado por número): búsqueda binaria,
+    con búsqueda lineal si el array no estuviera ordenado
+    """
+    i = bisect.bisect_left(jornadas, jornada_num, key=lambda j: j["jornada"])
+    if i < len(jornadas) and jornadas[i]["jornada"] == jornada_num:
+        return i
+    for i, jornada in enumerate(jornadas):
+        if jornada["jornada"] == jornada_num:
+            return i
+    return None
+
+def _mejor_partido(indice: List[List], jornadas: List[Dict]) -> Optional[Dict]:
+    if not indice:
+        return None
+    i = _buscar_jornada(jornadas, indice[0][1])
+    return _resumen_partido(jornadas[i]) if i is not None else None
+
+def _campos_cambiados(prefix: str, old: Dict, new: Dict) -> Dict:
+    """
+    Update con notación de puntos solo para los campos que cambian
+    """
+    return {f"{prefix}.{key}": value for key, value in new.items() if old.get(key, MISSING) != value}
+
 # =============================================================================
 # FUNCIONES DE JUGADORES Y ESTADÍSTICAS
 # =============================================================================
 
-async def get_all_players(active_only: bool = True) -> List[Dict]:
+# Las estadísticas de cada jornada viven en playerJornadas ("{playerId}#{n}");
+# el documento del jugador solo guarda el resumen de temporada. Los documentos
+# antiguos con jornadasStats embebido se leen igual y se migran al escribir en
+# ellos (o con scripts/migrate_player_jornadas.py)
+
+def _jornada_doc_id(player_id: str, jornada_num: int) -> str:
+    return f"{player_id}#{jornada_num}"
+
+def _jornada_entry(doc: Dict) -> Dict:
     """
-    Obtiene todos los jugadores
+    Documento de playerJornadas -> entrada de jornadasStats (sin playerId)
     """
-    players_ref = db.collection(PLAYERS_COLLECTION)
+    return {key: value for key, value in doc.items() if key != "playerId"}
+
+def _jornada_write(player_id: str, jornada: Dict) -> tuple:
+    return (
+        "set", PLAYER_JORNADAS_COLLECTION, _jornada_doc_id(player_id, jornada["jornada"]),
+        {"playerId": player_id, **jornada}
+    )
+
+def _migration_writes(player_id: str, player: Dict) -> List[tuple]:
+    """
+    Escrituras que pasan las jornadas embebidas de un documento antiguo a
+    playerJornadas (ninguna si el jugador ya está migrado)
+    """
+    if "jornadasStats" not in player:
+        return []
+    jornadas = player["jornadasStats"]
+    data = {"jornadasStats": DELETE_FIELD}
+    if player.get("valoracionesJornada") is None:
+        data["valoracionesJornada"] = _indice_valoraciones(jornadas)
+    return [_jornada_write(player_id, jornada) for jornada in jornadas] + [
+        ("update", PLAYERS_COLLECTION, player_id, data)
+    ]
+
+async def _player_jornadas(player_id: str, player: Dict, last: Optional[int] = None) -> List[Dict]:
+    """
+    Jornadas del jugador ordenadas por número: todas o solo las últimas `last`
+    """
+    if "jornadasStats" in player:  # documento sin migrar
+        jornadas = sorted(player["jornadasStats"], key=lambda x: x["jornada"])
+        return jornadas[-last:] if last else jornadas
     
-    if active_only:
-        query = players_ref.where("activo", "==", True)
+    filters = [("playerId", "==", player_id)]
+    if last:
+        docs = await run_store(store.query, PLAYER_JORNADAS_COLLECTION, filters,
+                               order_by="jornada", descending=True, limit=last)
+        docs.reverse()
     else:
-        query = players_ref
-    
-    players = []
-    for doc in query.stream():
-        player_data = doc.to_dict()
-        player_data["playerId"] = doc.id
-        players.append(player_data)
+        docs = await run_store(store.query, PLAYER_JORNADAS_COLLECTION, filters)
+        docs.sort(key=lambda item: item[1]["jornada"])
+    return [_jornada_entry(doc) for _, doc in docs]
+
+async def _attach_jornadas(players: List[tuple], filters: List = ()) -> List[tuple]:
+    """
+    Rellena jornadasStats de cada (id, jugador) con una sola query a playerJornadas
+    `filters` limita las jornadas leídas (p. ej. [("jornada", "==", n)])
+    """
+    docs = await run_store(store.query, PLAYER_JORNADAS_COLLECTION, list(filters))
+    by_player: Dict[str, List[Dict]] = {}
+    for _, doc in docs:
+        by_player.setdefault(doc.get("playerId"), []).append(_jornada_entry(doc))
     
+    for player_id, player in players:
+        if "jornadasStats" not in player:  # los documentos sin migrar ya las llevan
+            player["jornadasStats"] = sorted(by_player.get(player_id, []), key=lambda x: x["jornada"])
     return players
 
-async def get_player_by_id(player_id: str) -> Optional[Dict]:
+def _player_view(player_id: str, player: Dict, jornadas: Optional[List[Dict]]) -> Dict:
+    """
+    Respuesta de un jugador: resumen de temporada y, si se piden, sus jornadas
+    """
+    view = {key: value for key, value in player.items() if key not in ("jornadasStats", "valoracionesJornada")}
+    if jornadas is not None:
+        view["jornadasStats"] = jornadas
+    return _with_id(player_id, view, "playerId")
+
+async def get_all_players(active_only: bool = True, jornadas: Optional[int] = None) -> List[Dict]:
+    """
+    Obtiene todos los jugadores
+    jornadas: None = con todas sus jornadas, 0 = solo el resumen de temporada,
+    N = resumen más sus últimas N jornadas
+    """
+    filters = [("activo", "==", True)] if active_only else []
+    docs = await run_store(store.query, PLAYERS_COLLECTION, filters)
+    
+    if jornadas is None:
+        docs = await _attach_jornadas(docs)
+        return [_player_view(doc_id, player, player["jornadasStats"]) for doc_id, player in docs]
+    if jornadas <= 0:
+        return [_player_view(doc_id, player, None) for doc_id, player in docs]
+    
+    recientes = await asyncio.gather(*(
+        _player_jornadas(doc_id, player, jornadas) for doc_id, player in docs
+    ))
+    return [_player_view(doc_id, player, last) for (doc_id, player), last in zip(docs, recientes)]
+
+async def get_player_by_id(player_id: str, jornadas: Optional[int] = None) -> Optional[Dict]:
     """
     Obtiene un jugador por ID
+    jornadas: None = todas, 0 = solo el resumen de temporada, N = las últimas N
+    """
+    player_data = await run_store(store.get, PLAYERS_COLLECTION, player_id)
+    if player_data is None:
+        return None
+    
+    if jornadas is not None and jornadas <= 0:
+        return _player_view(player_id, player_data, None)
+    return _player_view(player_id, player_data, await _player_jornadas(player_id, player_data, jornadas))
+
+async def get_player_jornada(player_id: str, jornada_num: int) -> Optional[Dict]:
     """
-    doc_ref = db.collection(PLAYERS_COLLECTION).document(player_id)
-    doc = doc_ref.get()
+    Estadísticas de un jugador en una jornada
+    Primero el índice (jugador, jornada) de la vista de partido en caché;
+    si la jornada no está en caché, lectura directa de un documento
+    """
+    line = jornada_views.lookup(player_id, jornada_num)
+    if line is not None:
+        return line
     
-    if doc.exists:
-        player_data = doc.to_dict()
-        player_data["playerId"] = doc.id
-        return player_data
+    doc = await run_store(store.get, PLAYER_JORNADAS_COLLECTION, _jornada_doc_id(player_id, jornada_num))
+    if doc is not None:
+        return _jornada_entry(doc)
     
+    player = await run_store(store.get, PLAYERS_COLLECTION, player_id)
+    if player and "jornadasStats" in player:
+        i = _buscar_jornada(player["jornadasStats"], jornada_num)
+        return player["jornadasStats"][i] if i is not None else None
     return None
 
 async def create_player(player_data: Dict) -> str:
@@ -613,30 +1262,32 @@ async def create_player(player_data: Dict) -> str:
             "valoracion": 0.0,
             "puntosFantasy": 0.0
         },
+        "forma": calcular_forma([]),
         "mejorPartido": None,
-        "jornadasStats": [],
-        "createdAt": firestore.SERVER_TIMESTAMP
+        "valoracionesJornada": [],
+        "createdAt": SERVER_TIMESTAMP
     }
     
-    doc_ref = db.collection(PLAYERS_COLLECTION).add(new_player)
-    return doc_ref[1].id
+    player_id = await run_store(store.add, PLAYERS_COLLECTION, new_player)
+    player_stats.set_player(player_id, new_player)
+    player_rankings.invalidate()
+    return player_id
 
 async def add_jornada_stats(player_id: str, jornada_data: Dict) -> Dict:
     """
     Añade estadísticas de una jornada a un jugador
     Actualiza las estadísticas de temporada y promedios automáticamente
     """
-    player = await get_player_by_id(player_id)
+    player = await run_store(store.get, PLAYERS_COLLECTION, player_id)
     if not player:
         raise Exception(f"Jugador {player_id} no encontrado")
     
     # Verificar que la jornada no exista ya
-    jornadas_existentes = player.get("jornadasStats", [])
+    jornadas_existentes = await _player_jornadas(player_id, player)
     jornada_num = jornada_data.get("jornada")
     
-    for j in jornadas_existentes:
-        if j.get("jornada") == jornada_num:
-            raise Exception(f"Ya existen estadísticas para la jornada {jornada_num}")
+    if _buscar_jornada(jornadas_existentes, jornada_num) is not None:
+        raise Exception(f"Ya existen estadísticas para la jornada {jornada_num}")
     
     stats = jornada_data["stats"]
     
@@ -655,274 +1306,840 @@ async def add_jornada_stats(player_id: str, jornada_data: Dict) -> Dict:
         "stats": stats
     }
     
-    # Actualizar estadísticas de temporada
-    stats_temporada = player.get("statsTemporada", {})
-    stats_temporada["partidosJugados"] = stats_temporada.get("partidosJugados", 0) + 1
-    
-    for key in ["minutosJugados", "puntos", "asistencias", "rebotes", "rebotesOfensivos", 
-                "rebotesDefensivos", "robos", "tapones", "perdidas", "faltas",
-                "tiros2Anotados", "tiros2Intentados", "tiros3Anotados", "tiros3Intentados",
-                "tirosLibresAnotados", "tirosLibresIntentados"]:
-        stats_temporada[key] = stats_temporada.get(key, 0) + stats.get(key, 0)
-    
-    stats_temporada["valoracion"] = round(stats_temporada.get("valoracion", 0) + stats["valoracion"], 2)
-    stats_temporada["puntosFantasy"] = round(stats_temporada.get("puntosFantasy", 0) + stats["puntosFantasy"], 2)
-    
-    # Calcular promedios
-    promedios = calcular_promedios(stats_temporada, stats_temporada["partidosJugados"])
-    
-    # Actualizar mejor partido
-    mejor_partido = player.get("mejorPartido")
-    if not mejor_partido or stats["valoracion"] > mejor_partido.get("valoracion", 0):
-        mejor_partido = {
-            "jornada": jornada_num,
-            "fecha": jornada_data["fecha"],
-            "puntos": stats["puntos"],
-            "valoracion": stats["valoracion"]
-        }
+    # Índice de valoraciones (se construye una vez para jugadores antiguos)
+    indice = player.get("valoracionesJornada")
+    if indice is None:
+        indice = _indice_valoraciones(jornadas_existentes)
     
-    # Añadir jornada al array
+    # Añadir jornada al array y ordenar por número
     jornadas_existentes.append(nueva_jornada)
-    
-    # Ordenar jornadas por número
     jornadas_existentes.sort(key=lambda x: x["jornada"])
+    _indice_insertar(indice, stats["valoracion"], jornada_num)
     
-    # Actualizar documento
-    doc_ref = db.collection(PLAYERS_COLLECTION).document(player_id)
-    doc_ref.update({
+    # Actualizar estadísticas de temporada y promedios
+    stats_temporada = aplicar_delta_temporada(player.get("statsTemporada", {}), sumar=stats)
+    promedios = calcular_promedios(stats_temporada, stats_temporada["partidosJugados"])
+    
+    # Documento de la jornada y resumen del jugador en un solo lote
+    writes = _migration_writes(player_id, player)
+    writes.append(_jornada_write(player_id, nueva_jornada))
+    writes.append(("update", PLAYERS_COLLECTION, player_id, {
         "statsTemporada": stats_temporada,
         "promedios": promedios,
-        "mejorPartido": mejor_partido,
-        "jornadasStats": jornadas_existentes
-    })
+        "forma": calcular_forma(jornadas_existentes),
+        "mejorPartido": _mejor_partido(indice, jornadas_existentes),
+        "valoracionesJornada": indice
+    }))
+    await run_store(store.batch_write, writes)
+    player_stats.upsert(player_id, nueva_jornada)
+    player_rankings.invalidate()
+    jornada_views.invalidate(jornada_num)
     
     return {
         "valoracion": stats["valoracion"],
         "puntosFantasy": stats["puntosFantasy"],
-        "dobleDoble": sum([
-            stats.get("puntos", 0) >= 10,
-            stats.get("rebotes", 0) >= 10,
-            stats.get("asistencias", 0) >= 10,
-            stats.get("robos", 0) >= 10,
-            stats.get("tapones", 0) >= 10
-        ]) >= 2
+        # Según el bonus de las reglas, no un umbral aparte: coincide con puntosFantasy
+        "dobleDoble": fantasy_rules.achieved(stats).get("dobleDoble", False)
     }
 
+def _update_temporada(player: Dict, stats_temporada: Dict, indice: List[List],
+                      jornadas: List[Dict]) -> Dict:
+    """
+    Campos del documento que cambian tras editar o borrar una jornada
+    """
+    promedios = calcular_promedios(stats_temporada, stats_temporada["partidosJugados"])
+    mejor_partido = _mejor_partido(indice, jornadas)
+    
+    data = {}
+    data.update(_campos_cambiados("statsTemporada", player.get("statsTemporada", {}), stats_temporada))
+    data.update(_campos_cambiados("promedios", player.get("promedios", {}), promedios))
+    data.update(_campos_cambiados("forma", player.get("forma", {}), calcular_forma(jornadas)))
+    if mejor_partido != player.get("mejorPartido"):
+        data["mejorPartido"] = mejor_partido
+    if indice != player.get("valoracionesJornada"):
+        data["valoracionesJornada"] = indice
+    return data
+
 async def update_jornada_stats(player_id: str, jornada_num: int, stats_update: Dict) -> bool:
     """
     Actualiza las estadísticas de una jornada existente
-    Recalcula todas las estadísticas de temporada
+    La temporada se actualiza restando la línea antigua y sumando la nueva
     """
-    player = await get_player_by_id(player_id)
+    player = await run_store(store.get, PLAYERS_COLLECTION, player_id)
     if not player:
         return False
     
-    jornadas = player.get("jornadasStats", [])
-    jornada_encontrada = False
-    
-    for i, jornada in enumerate(jornadas):
-        if jornada["jornada"] == jornada_num:
-            # Actualizar stats
-            jornada["stats"].update(stats_update)
-            
-            # Recalcular valoración y puntos fantasy
-            jornada["stats"]["valoracion"] = calcular_valoracion_acb(jornada["stats"])
-            jornada["stats"]["puntosFantasy"] = calcular_puntos_fantasy(
-                jornada["stats"], 
-                jornada.get("victoria", False)
-            )
-            
-            jornadas[i] = jornada
-            jornada_encontrada = True
-            break
-    
-    if not jornada_encontrada:
+    jornadas = await _player_jornadas(player_id, player)
+    i = _buscar_jornada(jornadas, jornada_num)
+    if i is None:
         return False
     
-    # Recalcular todas las estadísticas de temporada
-    stats_temporada = {
-        "partidosJugados": len(jornadas),
-        "minutosJugados": 0,
-        "puntos": 0,
-        "asistencias": 0,
-        "rebotes": 0,
-        "rebotesOfensivos": 0,
-        "rebotesDefensivos": 0,
-        "robos": 0,
-        "tapones": 0,
-        "perdidas": 0,
-        "faltas": 0,
-        "tiros2Anotados": 0,
-        "tiros2Intentados": 0,
-        "tiros3Anotados": 0,
-        "tiros3Intentados": 0,
-        "tirosLibresAnotados": 0,
-        "tirosLibresIntentados": 0,
-        "valoracion": 0.0,
-        "puntosFantasy": 0.0
-    }
+    indice = player.get("valoracionesJornada")
+    if indice is None:
+        indice = _indice_valoraciones(jornadas)
+    else:
+        indice = [list(item) for item in indice]
     
-    mejor_partido = None
+    jornada = jornadas[i]
+    old_stats = jornada["stats"]
     
-    for jornada in jornadas:
-        s = jornada["stats"]
-        for key in stats_temporada.keys():
-            if key not in ["partidosJugados"]:
-                stats_temporada[key] += s.get(key, 0)
-        
-        if not mejor_partido or s["valoracion"] > mejor_partido.get("valoracion", 0):
-            mejor_partido = {
-                "jornada": jornada["jornada"],
-                "fecha": jornada["fecha"],
-                "puntos": s["puntos"],
-                "valoracion": s["valoracion"]
-            }
+    # Actualizar stats y recalcular valoración y puntos fantasy
+    new_stats = {**old_stats, **stats_update}
+    new_stats["valoracion"] = calcular_valoracion_acb(new_stats)
+    new_stats["puntosFantasy"] = calcular_puntos_fantasy(new_stats, jornada.get("victoria", False))
+    jornadas[i] = {**jornada, "stats": new_stats}
     
-    # Redondear
-    stats_temporada["valoracion"] = round(stats_temporada["valoracion"], 2)
-    stats_temporada["puntosFantasy"] = round(stats_temporada["puntosFantasy"], 2)
+    stats_temporada = aplicar_delta_temporada(player.get("statsTemporada", {}), quitar=old_stats, sumar=new_stats)
+    _indice_quitar(indice, old_stats.get("valoracion", 0), jornada_num)
+    _indice_insertar(indice, new_stats["valoracion"], jornada_num)
     
-    # Calcular promedios
-    promedios = calcular_promedios(stats_temporada, stats_temporada["partidosJugados"])
+    # Documento de la jornada y solo los campos del resumen que cambian
+    writes = _migration_writes(player_id, player)
+    writes.append(_jornada_write(player_id, jornadas[i]))
+    data = _update_temporada(player, stats_temporada, indice, jornadas)
+    if data:
+        writes.append(("update", PLAYERS_COLLECTION, player_id, data))
     
-    # Actualizar documento
-    doc_ref = db.collection(PLAYERS_COLLECTION).document(player_id)
-    doc_ref.update({
-        "statsTemporada": stats_temporada,
-        "promedios": promedios,
-        "mejorPartido": mejor_partido,
-        "jornadasStats": jornadas
-    })
+    await run_store(store.batch_write, writes)
+    player_stats.upsert(player_id, jornadas[i])
+    player_rankings.invalidate()
+    jornada_views.invalidate(jornada_num)
     
     return True
 
 async def delete_jornada_stats(player_id: str, jornada_num: int) -> bool:
     """
-    Elimina las estadísticas de una jornada y recalcula la temporada
+    Elimina las estadísticas de una jornada y descuenta su línea de la temporada
     """
-    player = await get_player_by_id(player_id)
+    player = await run_store(store.get, PLAYERS_COLLECTION, player_id)
     if not player:
         return False
     
-    jornadas = player.get("jornadasStats", [])
-    jornadas_filtradas = [j for j in jornadas if j["jornada"] != jornada_num]
-    
-    if len(jornadas_filtradas) == len(jornadas):
+    jornadas = await _player_jornadas(player_id, player)
+    i = _buscar_jornada(jornadas, jornada_num)
+    if i is None:
         return False  # No se encontró la jornada
     
-    # Recalcular estadísticas de temporada
-    if len(jornadas_filtradas) == 0:
-        # Sin jornadas, resetear stats
-        stats_temporada = {
-            "partidosJugados": 0,
-            "minutosJugados": 0,
-            "puntos": 0,
-            "asistencias": 0,
-            "rebotes": 0,
-            "rebotesOfensivos": 0,
-            "rebotesDefensivos": 0,
-            "robos": 0,
-            "tapones": 0,
-            "perdidas": 0,
-            "faltas": 0,
-            "tiros2Anotados": 0,
-            "tiros2Intentados": 0,
-            "tiros3Anotados": 0,
-            "tiros3Intentados": 0,
-            "tirosLibresAnotados": 0,
-            "tirosLibresIntentados": 0,
-            "valoracion": 0.0,
-            "puntosFantasy": 0.0
-        }
-        promedios = calcular_promedios(stats_temporada, 0)
-        mejor_partido = None
+    indice = player.get("valoracionesJornada")
+    if indice is None:
+        indice = _indice_valoraciones(jornadas)
     else:
-        # Recalcular desde cero
-        stats_temporada = {
-            "partidosJugados": len(jornadas_filtradas),
-            "minutosJugados": 0,
-            "puntos": 0,
-            "asistencias": 0,
-            "rebotes": 0,
-            "rebotesOfensivos": 0,
-            "rebotesDefensivos": 0,
-            "robos": 0,
-            "tapones": 0,
-            "perdidas": 0,
-            "faltas": 0,
-            "tiros2Anotados": 0,
-            "tiros2Intentados": 0,
-            "tiros3Anotados": 0,
-            "tiros3Intentados": 0,
-            "tirosLibresAnotados": 0,
-            "tirosLibresIntentados": 0,
-            "valoracion": 0.0,
-            "puntosFantasy": 0.0
-        }
-        
-        mejor_partido = None
-        
-        for jornada in jornadas_filtradas:
-            s = jornada["stats"]
-            for key in stats_temporada.keys():
-                if key not in ["partidosJugados"]:
-                    stats_temporada[key] += s.get(key, 0)
-            
-            if not mejor_partido or s["valoracion"] > mejor_partido.get("valoracion", 0):
-                mejor_partido = {
-                    "jornada": jornada["jornada"],
-                    "fecha": jornada["fecha"],
-                    "puntos": s["puntos"],
-                    "valoracion": s["valoracion"]
-                }
-        
-        stats_temporada["valoracion"] = round(stats_temporada["valoracion"], 2)
-        stats_temporada["puntosFantasy"] = round(stats_temporada["puntosFantasy"], 2)
-        promedios = calcular_promedios(stats_temporada, stats_temporada["partidosJugados"])
+        indice = [list(item) for item in indice]
     
-    # Actualizar documento
-    doc_ref = db.collection(PLAYERS_COLLECTION).document(player_id)
-    doc_ref.update({
-        "statsTemporada": stats_temporada,
-        "promedios": promedios,
-        "mejorPartido": mejor_partido,
-        "jornadasStats": jornadas_filtradas
-    })
+    jornada = jornadas.pop(i)
+    stats_temporada = aplicar_delta_temporada(player.get("statsTemporada", {}), quitar=jornada["stats"])
+    _indice_quitar(indice, jornada["stats"].get("valoracion", 0), jornada_num)
+    
+    writes = _migration_writes(player_id, player)
+    writes.append(("delete", PLAYER_JORNADAS_COLLECTION, _jornada_doc_id(player_id, jornada_num), {}))
+    data = _update_temporada(player, stats_temporada, indice, jornadas)
+    if data:
+        writes.append(("update", PLAYERS_COLLECTION, player_id, data))
+    
+    await run_store(store.batch_write, writes)
+    player_stats.delete(player_id, jornada_num)
+    player_rankings.invalidate()
+    jornada_views.invalidate(jornada_num)
     
     return True
 
+def _chunk_player_writes(player_writes: Dict[str, List[tuple]]):
+    """
+    Agrupa las escrituras de varios jugadores en lotes de hasta WRITE_BATCH_SIZE
+    sin partir las de un mismo jugador: (playerIds, escrituras) por lote
+    """
+    player_ids: List[str] = []
+    chunk: List[tuple] = []
+    for player_id, writes in player_writes.items():
+        if chunk and len(chunk) + len(writes) > WRITE_BATCH_SIZE:
+            yield player_ids, chunk
+            player_ids, chunk = [], []
+        player_ids.append(player_id)
+        chunk.extend(writes)
+    if chunk:
+        yield player_ids, chunk
+
+async def import_box_score(rows: List[Dict]) -> Dict:
+    """
+    Importa las estadísticas de muchas filas (jugador, jornada) a la vez
+    - Valida cada fila; las inválidas se informan sin abortar el resto
+    - Valoración y puntos fantasy de todas las filas con operaciones por columnas
+    - Solo se leen los jugadores del box score y sus jornadas (la forma y el
+      mejor partido necesitan su historial), no la colección entera
+    - Escrituras agrupadas en lotes
+    """
+    start = time.perf_counter()
+    errors: List[Dict] = []
+    
+    def _error(row_number: int, player_id: Any, message: str):
+        errors.append({"row": row_number, "playerId": player_id, "error": message})
+    
+    valid = []
+    for row_number, raw in enumerate(rows, 1):
+        try:
+            valid.append((row_number, box_score.validate_row(raw)))
+        except box_score.RowError as e:
+            _error(row_number, raw.get("playerId"), str(e))
+    
+    migrations: Dict[str, List[tuple]] = {}
+    
+    async def _load_player(player_id: str) -> tuple:
+        player = await run_store(store.get, PLAYERS_COLLECTION, player_id)
+        if player is not None:
+            migrations[player_id] = _migration_writes(player_id, player)
+            player["jornadasStats"] = await _player_jornadas(player_id, player)
+        return player_id, player
+    
+    player_ids = list(dict.fromkeys(row["playerId"] for _, row in valid))
+    players = {
+        player_id: player
+        for player_id, player in await asyncio.gather(*(_load_player(player_id) for player_id in player_ids))
+        if player is not None
+    }
+    
+    accepted = []
+    seen = set()
+    for row_number, row in valid:
+        player = players.get(row["playerId"])
+        if player is None:
+            _error(row_number, row["playerId"], "Jugador no encontrado")
+            continue
+        key = (row["playerId"], row["jornada"])
+        if key in seen or _buscar_jornada(player.get("jornadasStats", []), row["jornada"]) is not None:
+            _error(row_number, row["playerId"], f"Ya existen estadísticas para la jornada {row['jornada']}")
+            continue
+        seen.add(key)
+        accepted.append((row_number, row))
+    
+    valoraciones, puntos_fantasy = box_score.compute_scores([row for _, row in accepted], fantasy_rules)
+    
+    # Aplicar todas las filas de cada jugador sobre su documento en memoria
+    touched: Dict[str, List[int]] = {}
+    new_jornadas: Dict[str, List[Dict]] = {}
+    indices: Dict[str, List[List]] = {}
+    for (row_number, row), valoracion, fantasy in zip(accepted, valoraciones, puntos_fantasy):
+        player_id = row["playerId"]
+        player = players[player_id]
+        jornadas = player.setdefault("jornadasStats", [])
+        if player_id not in indices:
+            indice = player.get("valoracionesJornada")
+            indices[player_id] = [list(item) for item in indice] if indice is not None else _indice_valoraciones(jornadas)
+        
+        stats = {**row["stats"], "valoracion": valoracion, "puntosFantasy": fantasy}
+        nueva_jornada = {
+            "jornada": row["jornada"],
+            "fecha": row["fecha"],
+            "rival": row["rival"],
+            "local": row["local"],
+            "resultado": row["resultado"],
+            "victoria": row["victoria"],
+            "stats": stats
+        }
+        jornadas.append(nueva_jornada)
+        new_jornadas.setdefault(player_id, []).append(nueva_jornada)
+        _indice_insertar(indices[player_id], valoracion, row["jornada"])
+        player["statsTemporada"] = aplicar_delta_temporada(player.get("statsTemporada", {}), sumar=stats)
+        touched.setdefault(player_id, []).append(row_number)
+    
+    # Escrituras de cada jugador: documentos de sus jornadas nuevas y su resumen
+    player_writes: Dict[str, List[tuple]] = {}
+    for player_id in touched:
+        player = players[player_id]
+        jornadas = player["jornadasStats"]
+        jornadas.sort(key=lambda x: x["jornada"])
+        stats_temporada = player["statsTemporada"]
+        writes = migrations[player_id] + [_jornada_write(player_id, j) for j in new_jornadas[player_id]]
+        writes.append(("update", PLAYERS_COLLECTION, player_id, {
+            "statsTemporada": stats_temporada,
+            "promedios": calcular_promedios(stats_temporada, stats_temporada["partidosJugados"]),
+            "forma": calcular_forma(jornadas),
+            "mejorPartido": _mejor_partido(indices[player_id], jornadas),
+            "valoracionesJornada": indices[player_id]
+        }))
+        player_writes[player_id] = writes
+    
+    imported = len(accepted)
+    for player_ids, chunk in _chunk_player_writes(player_writes):
+        try:
+            await run_store(store.batch_write, chunk)
+            for player_id in player_ids:
+                for jornada in new_jornadas[player_id]:
+                    player_stats.upsert(player_id, jornada)
+                    jornada_views.invalidate(jornada["jornada"])
+        except Exception as e:
+            # Un lote fallido no aborta los demás: sus filas se informan como error
+            for player_id in player_ids:
+                for row_number in touched[player_id]:
+                    _error(row_number, player_id, f"Error al guardar: {e}")
+                imported -= len(touched[player_id])
+    
+    if player_writes:
+        player_rankings.invalidate()
+    
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "rows": len(rows),
+        "imported": imported,
+        "players": len(touched),
+        "errors": errors,
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+# =============================================================================
+# VISTA DE PARTIDO POR JORNADA (EN CACHÉ)
+# =============================================================================
+
+JORNADA_CACHE_TTL = float(os.getenv("JORNADA_CACHE_TTL", "60"))  # segundos
+
+class JornadaViewCache:
+    """
+    Vista de cada jornada (líneas de todos los jugadores y totales del equipo)
+    Se calcula una vez por jornada con una query a playerJornadas; las
+    escrituras de estadísticas de este worker la invalidan y el TTL recoge las
+    de otros workers. Guarda también el índice {playerId: línea} de la jornada
+    """
+    
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._views: Dict[int, Optional[Dict]] = {}
+        self._lines: Dict[int, Dict[str, Dict]] = {}
+        self._built_at: Dict[int, float] = {}
+        self._generation: Dict[int, int] = {}
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def invalidate(self, jornada: int):
+        self._generation[jornada] = self._generation.get(jornada, 0) + 1
+        self._built_at.pop(jornada, None)
+    
+    def _fresh(self, jornada: int) -> bool:
+        built_at = self._built_at.get(jornada)
+        return built_at is not None and time.monotonic() - built_at <= self.ttl
+    
+    def lookup(self, player_id: str, jornada: int) -> Optional[Dict]:
+        """
+        Línea del jugador si la jornada está en caché (None si no lo está o no jugó)
+        """
+        if not self._fresh(jornada):
+            return None
+        return self._lines[jornada].get(player_id)
+    
+    async def get(self, jornada: int) -> Optional[Dict]:
+        if self._fresh(jornada):
+            self.hits += 1
+            return self._views[jornada]
+        async with self._lock:
+            if self._fresh(jornada):
+                self.hits += 1
+                return self._views[jornada]
+            generation = self._generation.get(jornada, 0)
+            view, lines = await _build_jornada_view(jornada)
+            self.misses += 1
+            self._views[jornada] = view
+            self._lines[jornada] = lines
+            # Si hubo una escritura durante el cálculo, la siguiente petición lo repite
+            if generation == self._generation.get(jornada, 0):
+                self._built_at[jornada] = time.monotonic()
+            return view
+
+async def _build_jornada_view(jornada: int):
+    """
+    (vista de la jornada o None si nadie jugó, {playerId: línea})
+    """
+    players = await _attach_jornadas(
+        await run_store(store.query, PLAYERS_COLLECTION), [("jornada", "==", jornada)]
+    )
+    lines: Dict[str, Dict] = {}
+    rows = []
+    for player_id, player in players:
+        i = _buscar_jornada(player["jornadasStats"], jornada)
+        if i is None:
+            continue
+        line = lines[player_id] = player["jornadasStats"][i]
+        rows.append({
+            "playerId": player_id,
+            "nombre": player.get("nombre"),
+            "numero": player.get("numero"),
+            "posicion": player.get("posicion"),
+            "stats": line["stats"]
+        })
+    if not rows:
+        return None, lines
+    
+    rows.sort(key=lambda row: row["stats"].get("puntosFantasy", 0), reverse=True)
+    # Totales del equipo: la misma suma que los totales de temporada de un jugador
+    totales = recalcular_temporada(list(lines.values()))["statsTemporada"]
+    totales.pop("partidosJugados")
+    partido = next(iter(lines.values()))
+    
+    view = {
+        "jornada": jornada,
+        "fecha": partido.get("fecha"),
+        "rival": partido.get("rival"),
+        "local": partido.get("local", True),
+        "resultado": partido.get("resultado", ""),
+        "victoria": partido.get("victoria", False),
+        "jugadores": len(rows),
+        "players": rows,
+        "totales": totales
+    }
+    return view, lines
+
+jornada_views = JornadaViewCache(ttl=JORNADA_CACHE_TTL)
+
+async def get_jornada(jornada: int) -> Optional[Dict]:
+    """
+    Líneas de todos los jugadores y totales del equipo en una jornada
+    """
+    return await jornada_views.get(jornada)
+
+# Claves de ordenación del ranking de jugadores: totales de temporada y promedios
+PLAYER_RANKING_KEYS = ["puntosFantasy", "puntos", "valoracion"] + [
+    f"promedios.{key}" for key in calcular_promedios({}, 0)
+]
+
+def _player_ranking_value(player: Dict, order_by: str) -> float:
+    if order_by.startswith("promedios."):
+        return player.get("promedios", {}).get(order_by.split(".", 1)[1], 0)
+    return player.get("statsTemporada", {}).get(order_by, 0)
+
+# Estadísticas por jornada en columnas: se cargan del backend al primer uso y
+# después las escrituras de este worker las actualizan
+player_stats = PlayerStatsColumns()
+
+def _player_summaries() -> List[Dict]:
+    """
+    Resumen de temporada de cada jugador activo calculado con reducciones
+    sobre las columnas (totales con bincount)
+    Mismos campos que el ranking original: playerId, nombre, posicion,
+    statsTemporada y promedios
+    """
+    totals = player_stats.season_totals()
+    
+    summaries = []
+    for i, player_id in enumerate(player_stats.player_ids):
+        meta = player_stats.meta.get(player_id)
+        if not meta or not meta["activo"]:
+            continue
+        stats_temporada = {"partidosJugados": int(totals["partidosJugados"][i])}
+        for key in STATS_SUMABLES:
+            value = float(totals[key][i])
+            stats_temporada[key] = round(value, 2) if key in STATS_REDONDEADAS else (
+                int(value) if value.is_integer() else value
+            )
+        summaries.append({
+            "playerId": player_id,
+            "nombre": meta["nombre"],
+            "posicion": meta["posicion"],
+            "statsTemporada": stats_temporada,
+            "promedios": calcular_promedios(stats_temporada, stats_temporada["partidosJugados"])
+        })
+    return summaries
+
+class PlayerRankingCache:
+    """
+    Rankings de jugadores precalculados (top-K por cada clave de ordenación)
+    Las columnas se cargan del backend una sola vez; después solo se
+    reconstruyen desde ellas cuando una escritura invalida el ranking.
+    Límites mayores que K se resuelven con selección parcial (heap) sobre los
+    jugadores en memoria
+    """
+    
+    def __init__(self, top_k: int = 50):
+        self.top_k = top_k
+        self._players: List[Dict] = []
+        self._top: Dict[str, List[Dict]] = {}
+        self._built = False
+        self._loaded = False  # columnas cargadas desde el backend
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self.rebuilds = 0
+        self.loads = 0
+    
+    def invalidate(self):
+        self._generation += 1
+        self._built = False
+    
+    async def _ensure_built(self):
+        if self._built:
+            return
+        async with self._lock:
+            if self._built:
+                return
+            generation = self._generation
+            if not self._loaded:
+                docs = await _attach_jornadas(await run_store(store.query, PLAYERS_COLLECTION))
+                player_stats.load(docs)
+                self._loaded = True
+                self.loads += 1
+            
+            self._players = _player_summaries()
+            # nlargest equivale a sorted(reverse=True)[:k]: mismo orden en empates
+            self._top = {
+                key: heapq.nlargest(self.top_k, self._players, key=functools.partial(_player_ranking_value, order_by=key))
+                for key in PLAYER_RANKING_KEYS
+            }
+            self.rebuilds += 1
+            # Si hubo una escritura durante la reconstrucción, la siguiente petición reconstruye otra vez
+            if generation == self._generation:
+                self._built = True
+    
+    async def get(self, order_by: str, limit: int) -> List[Dict]:
+        await self._ensure_built()
+        if order_by not in PLAYER_RANKING_KEYS:
+            order_by = "puntosFantasy"
+        if limit <= self.top_k:
+            return self._top[order_by][:limit]
+        return heapq.nlargest(limit, self._players, key=functools.partial(_player_ranking_value, order_by=order_by))
+
+player_rankings = PlayerRankingCache(top_k=int(os.getenv("PLAYER_RANKING_TOP_K", "50")))
+
+def get_player_stats_info() -> Dict:
+    """
+    Tamaño del almacén columnar de estadísticas y recargas desde el backend
+    """
+    return {
+        **player_stats.memory_bytes(),
+        "players": len(player_stats.player_ids),
+        "loads": player_rankings.loads,
+        "rankingRebuilds": player_rankings.rebuilds
+    }
+
 async def get_players_ranking(limit: int = 10, order_by: str = "puntosFantasy") -> List[Dict]:
     """
     Obtiene el ranking de jugadores
+    order_by: puntosFantasy, puntos, valoracion (temporada) o promedios.<campo>
+    Se sirve desde el ranking precalculado en memoria
     """
-    players = await get_all_players(active_only=True)
-    
-    # Ordenar por el campo especificado en statsTemporada
-    if order_by == "puntosFantasy":
-        players.sort(key=lambda p: p.get("statsTemporada", {}).get("puntosFantasy", 0), reverse=True)
-    elif order_by == "puntos":
-        players.sort(key=lambda p: p.get("statsTemporada", {}).get("puntos", 0), reverse=True)
-    elif order_by == "valoracion":
-        players.sort(key=lambda p: p.get("statsTemporada", {}).get("valoracion", 0), reverse=True)
-    else:
-        players.sort(key=lambda p: p.get("statsTemporada", {}).get("puntosFantasy", 0), reverse=True)
-    
-    # Limitar resultados
-    players = players[:limit]
+    players = await player_rankings.get(order_by, max(limit, 0))
     
     # Añadir ranking
-    ranking = []
-    for i, player in enumerate(players, 1):
-        ranking.append({
-            "rank": i,
-            "playerId": player["playerId"],
-            "nombre": player["nombre"],
-            "posicion": player["posicion"],
-            "statsTemporada": player.get("statsTemporada", {}),
-            "promedios": player.get("promedios", {})
-        })
+    return [{"rank": i, **player} for i, player in enumerate(players, 1)]
+
+# =============================================================================
+# CLASIFICACIONES POR PERIODO (MATERIALIZADAS)
+# =============================================================================
+
+LEADERBOARDS_COLLECTION = "leaderboards"
+LEADERBOARD_META_DOC = "_meta"
+LEADERBOARD_CHUNK = 5000  # entradas por documento de snapshot (límite de 1 MB de Firestore)
+LEADERBOARD_REFRESH = float(os.getenv("LEADERBOARD_REFRESH", "30"))  # segundos entre comprobaciones
+
+leaderboards = leaderboard.LeaderboardSet()
+_leaderboard_checked_at = 0.0
+
+def _jornada_fechas(players: List[tuple]) -> Dict[int, str]:
+    """
+    Fecha de cada jornada (la del primer jugador con estadísticas en ella)
+    """
+    fechas: Dict[int, str] = {}
+    for _, player in players:
+        for jornada in player.get("jornadasStats", []):
+            fechas.setdefault(jornada.get("jornada"), jornada.get("fecha"))
+    return fechas
+
+async def rebuild_leaderboards():
+    """
+    Reconstruye las clasificaciones recorriendo usuarios y jugadores
+    Solo se usa si no hay snapshot (primer arranque o backend nuevo)
+    """
+    players = await _attach_jornadas(await run_store(store.query, PLAYERS_COLLECTION))
+    users = await run_store(store.query, USERS_COLLECTION, fields=LEADERBOARD_FIELDS)
+
+    scored = {j for _, u in users for j in (u.get("jornadaPoints") or {})}
+    fechas = _jornada_fechas(players)
+    for jornada in sorted(int(j) for j in scored):
+        leaderboards.register_jornada(jornada, leaderboard.period_ids(fechas.get(jornada)))
+    leaderboards.rebuild(users)
+
+    await save_leaderboards(list(leaderboards.boards))
+    print(f"🏆 Clasificaciones reconstruidas: {len(users)} usuarios, {len(leaderboards.boards)} periodos")
+
+async def save_leaderboards(period_ids: List[str]):
+    """
+    Publica el snapshot de los periodos indicados (troceado en documentos)
+    """
+    meta = await run_store(store.get, LEADERBOARDS_COLLECTION, LEADERBOARD_META_DOC) or {}
+    chunks = meta.get("chunks", {})
+    writes = []
+    for period_id in period_ids:
+        entries = list(leaderboards.board(period_id).to_entries().items())
+        parts = [entries[i:i + LEADERBOARD_CHUNK] for i in range(0, len(entries), LEADERBOARD_CHUNK)] or [[]]
+        for i, part in enumerate(parts):
+            writes.append(("set", LEADERBOARDS_COLLECTION, f"{period_id}#{i}", {"entries": dict(part)}))
+        chunks[period_id] = len(parts)
+
+    leaderboards.version = time.time()
+    writes.append(("set", LEADERBOARDS_COLLECTION, LEADERBOARD_META_DOC, {
+        "version": leaderboards.version,
+        "chunks": chunks,
+        "current": leaderboards.current,
+        "jornadaPeriods": leaderboards.jornada_periods
+    }))
+    await run_store(store.batch_write, writes)
+
+async def load_leaderboards() -> bool:
+    """
+    Carga el snapshot publicado; False si no existe
+    """
+    global _leaderboard_checked_at
+    _leaderboard_checked_at = time.monotonic()
+    meta = await run_store(store.get, LEADERBOARDS_COLLECTION, LEADERBOARD_META_DOC)
+    if meta is None:
+        return False
+    if meta["version"] == leaderboards.version:
+        return True
+
+    boards = {}
+    for period_id, count in meta["chunks"].items():
+        entries: Dict[str, List] = {}
+        for i in range(count):
+            doc = await run_store(store.get, LEADERBOARDS_COLLECTION, f"{period_id}#{i}") or {}
+            entries.update(doc.get("entries", {}))
+        boards[period_id] = leaderboard.Leaderboard.from_entries(period_id, entries)
+
+    leaderboards.boards = boards
+    leaderboards.current = meta["current"]
+    leaderboards.jornada_periods = meta["jornadaPeriods"]
+    leaderboards.version = meta["version"]
+    return True
+
+async def _refresh_leaderboards():
+    """
+    Recarga el snapshot si otro worker ha publicado uno más reciente
+    """
+    if time.monotonic() - _leaderboard_checked_at >= LEADERBOARD_REFRESH:
+        await load_leaderboards()
+
+def _add_to_season_snapshot(transaction, user_id: str, username: str) -> Optional[tuple]:
+    """
+    Añade la entrada del usuario al último documento del snapshot de temporada
+    (o a uno nuevo si está lleno) y marca una versión nueva
+    Devuelve (versión anterior, versión nueva) o None si aún no hay snapshot
+    """
+    meta = transaction.get(LEADERBOARDS_COLLECTION, LEADERBOARD_META_DOC)
+    if meta is None:
+        return None
     
-    return ranking
+    count = meta.get("chunks", {}).get(leaderboard.SEASON, 0)
+    last = transaction.get(LEADERBOARDS_COLLECTION, f"{leaderboard.SEASON}#{count - 1}") if count else None
+    version = time.time()
+    if last is not None and len(last.get("entries", {})) < LEADERBOARD_CHUNK:
+        transaction.update(LEADERBOARDS_COLLECTION, f"{leaderboard.SEASON}#{count - 1}", {
+            f"entries.{user_id}": [username, 0]
+        })
+        transaction.update(LEADERBOARDS_COLLECTION, LEADERBOARD_META_DOC, {"version": version})
+    else:
+        transaction.set(LEADERBOARDS_COLLECTION, f"{leaderboard.SEASON}#{count}", {
+            "entries": {user_id: [username, 0]}
+        })
+        transaction.update(LEADERBOARDS_COLLECTION, LEADERBOARD_META_DOC, {
+            "version": version,
+            f"chunks.{leaderboard.SEASON}": count + 1
+        })
+    return meta["version"], version
+
+async def add_user_to_leaderboards(user_id: str, username: str):
+    """
+    Un usuario nuevo aparece en la clasificación de temporada (0 puntos) sin
+    esperar a la siguiente jornada puntuada
+    Solo se escribe su entrada, no el snapshot entero
+    """
+    leaderboards.board(leaderboard.SEASON).update(user_id, username, 0)
+    versions = await run_store(
+        store.run_transaction,
+        lambda transaction: _add_to_season_snapshot(transaction, user_id, username)
+    )
+    # Si ya teníamos el snapshot anterior, el nuestro está al día: no hace falta recargar
+    if versions is not None and versions[0] == leaderboards.version:
+        leaderboards.version = versions[1]
+
+async def get_leaderboard(kind: str, offset: int = 0, limit: int = 10,
+                          start_after: Optional[str] = None) -> Dict:
+    """
+    Página de la clasificación vigente del tipo indicado (weekly, monthly, season)
+    start_after: nextCursor de la página anterior (sustituye a offset)
+    Si aún no se ha puntuado ninguna jornada del periodo: sin entradas y periodId None
+    """
+    await _refresh_leaderboards()
+    board = leaderboards.current_board(kind)
+    cursor = leaderboard.decode_cursor(start_after) if start_after else None
+    entries = board.page(offset, limit, start_after=cursor) if board else []
+    return {
+        "periodId": leaderboards.current.get(kind),
+        "total": len(board) if board else 0,
+        "entries": entries,
+        "nextCursor": leaderboard.encode_cursor(entries[-1]) if len(entries) == limit else None
+    }
+
+async def get_user_ranks(user_id: str) -> Dict:
+    """
+    Posición del usuario en la clasificación vigente de cada tipo
+    """
+    await _refresh_leaderboards()
+    result = {}
+    for kind in leaderboard.PERIOD_KINDS:
+        board = leaderboards.current_board(kind)
+        result[kind] = board.rank(user_id) if board else None
+    return result
+
+# =============================================================================
+# PUNTUACIÓN DE ALINEACIONES
+# =============================================================================
+
+async def score_jornada(jornada: int) -> Dict:
+    """
+    Puntúa la jornada para todos los usuarios con alineación
+    puntos de usuario = Σ puntosFantasy del jugador × multiplicador de la carta
+
+    Cada usuario guarda la puntuación de la jornada en jornadaPoints.<n> y su
+    total en points; recalcular una jornada sustituye su aportación anterior,
+    así que la operación es idempotente. Solo se escriben usuarios que cambian.
+    """
+    start = time.perf_counter()
+    # Solo los documentos de esta jornada, no el histórico de cada jugador
+    players = await _attach_jornadas(
+        await run_store(store.query, PLAYERS_COLLECTION), [("jornada", "==", jornada)]
+    )
+    users = await run_store(store.query, USERS_COLLECTION, fields=SCORING_FIELDS)
+
+    player_index, points = lineup_scoring.jornada_points(players, jornada)
+    slots, multipliers = lineup_scoring.lineup_matrices(users, player_index)
+    scores = lineup_scoring.score_lineups(points, slots, multipliers)
+
+    key = str(jornada)
+    stored = [u.get("jornadaPoints") or {} for _, u in users]
+    previous = np.array([p.get(key, 0) for p in stored], dtype=np.float64)
+    totals = np.round(
+        np.array([u.get("points", 0) or 0 for _, u in users], dtype=np.float64) - previous + scores, 2
+    )
+    scored = np.array([key in p for p in stored], dtype=bool)
+    changed = np.flatnonzero((scores != previous) | ~scored)
+
+    writes = [
+        ("update", USERS_COLLECTION, users[i][0], {
+            f"jornadaPoints.{key}": float(scores[i]),
+            "points": float(totals[i])
+        })
+        for i in changed.tolist()
+    ]
+    for offset in range(0, len(writes), WRITE_BATCH_SIZE):
+        chunk = writes[offset:offset + WRITE_BATCH_SIZE]
+        await run_store(store.batch_write, chunk)
+        for _, _, user_id, data in chunk:
+            user_cache.apply(user_id, data)
+
+    # Clasificaciones: solo cambian los usuarios escritos, en los periodos de esta jornada
+    await load_leaderboards()  # partir del último snapshot publicado por cualquier worker
+    periods = leaderboard.period_ids(_jornada_fechas(players).get(jornada))
+    # Repuntuar una jornada antigua no cambia los periodos vigentes
+    latest = all(int(j) <= jornada for j in leaderboards.jornada_periods)
+    leaderboards.register_jornada(jornada, periods, make_current=latest)
+    for i in changed.tolist():
+        user_id, user = users[i]
+        leaderboards.update_user(
+            user_id, user.get("username", "Usuario"), float(totals[i]),
+            {**stored[i], key: float(scores[i])}, periods.values()
+        )
+    await save_leaderboards(list(periods.values()))
+
+    elapsed = time.perf_counter() - start
+    print(f"🏀 Jornada {jornada} puntuada: {len(users)} usuarios, {len(writes)} actualizados en {elapsed:.2f}s")
+
+    return {
+        "jornada": jornada,
+        "users": len(users),
+        "updated": len(writes),
+        "seconds": round(elapsed, 3)
+    }
+
+async def rescore_season(dry_run: bool = False) -> Dict:
+    """
+    Recalcula puntosFantasy de todas las jornadas guardadas con las reglas actuales
+    - Una pasada: todas las líneas de todos los jugadores en columnas y una sola
+      evaluación vectorizada de las reglas
+    - Solo se escriben las jornadas que cambian y el resumen de sus jugadores,
+      en lotes que no parten las escrituras de un jugador
+    - Las jornadas ya puntuadas se vuelven a puntuar para los usuarios
+    """
+    start = time.perf_counter()
+    docs = await run_store(store.query, PLAYERS_COLLECTION)
+    legacy = {player_id for player_id, player in docs if "jornadasStats" in player}
+    players = dict(await _attach_jornadas(docs))
+    
+    lines = [(player_id, jornada) for player_id, player in players.items() for jornada in player["jornadasStats"]]
+    columns = {
+        stat: np.array([jornada["stats"].get(stat, 0) or 0 for _, jornada in lines], dtype=np.float64)
+        for stat in fantasy_rules.stats
+    }
+    victoria = np.array([bool(jornada.get("victoria", False)) for _, jornada in lines], dtype=bool)
+    nuevos = [round(v, 2) for v in fantasy_rules.evaluate(columns, victoria).tolist()]
+    
+    changed: Dict[str, List[Dict]] = {}
+    for (player_id, jornada), value in zip(lines, nuevos):
+        if jornada["stats"].get("puntosFantasy") != value:
+            jornada["stats"]["puntosFantasy"] = value
+            changed.setdefault(player_id, []).append(jornada)
+    
+    player_writes: Dict[str, List[tuple]] = {}
+    for player_id, jornadas_cambiadas in changed.items():
+        player = players[player_id]
+        jornadas = player["jornadasStats"]
+        if player_id in legacy:
+            # Se migra en el mismo lote, ya con los valores nuevos
+            writes = _migration_writes(player_id, player)
+        else:
+            writes = [
+                ("update", PLAYER_JORNADAS_COLLECTION, _jornada_doc_id(player_id, jornada["jornada"]),
+                 {"stats.puntosFantasy": jornada["stats"]["puntosFantasy"]})
+                for jornada in jornadas_cambiadas
+            ]
+        resumen = recalcular_temporada(jornadas)
+        writes.append(("update", PLAYERS_COLLECTION, player_id, {
+            "statsTemporada": resumen["statsTemporada"],
+            "promedios": resumen["promedios"],
+            "forma": calcular_forma(jornadas)
+        }))
+        player_writes[player_id] = writes
+    
+    jornadas_cambiadas = sorted({j["jornada"] for js in changed.values() for j in js})
+    result = {
+        "lines": len(lines),
+        "changed": sum(len(js) for js in changed.values()),
+        "players": len(changed),
+        "jornadas": jornadas_cambiadas,
+        "errors": [],
+        "rescoredJornadas": []
+    }
+    if dry_run:
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        return result
+    
+    for player_ids, chunk in _chunk_player_writes(player_writes):
+        try:
+            await run_store(store.batch_write, chunk)
+        except Exception as e:
+            result["errors"].append({"playerIds": player_ids, "error": str(e)})
+            continue
+        for player_id in player_ids:
+            for jornada in changed[player_id]:
+                player_stats.upsert(player_id, jornada)
+                jornada_views.invalidate(jornada["jornada"])
+    if player_writes:
+        player_rankings.invalidate()
+    
+    # Puntos de los usuarios en las jornadas ya puntuadas
+    await load_leaderboards()
+    for jornada in jornadas_cambiadas:
+        if str(jornada) in leaderboards.jornada_periods:
+            await score_jornada(jornada)
+            result["rescoredJornadas"].append(jornada)
+    
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    print(f"🧮 Temporada repuntuada: {result['changed']}/{result['lines']} líneas cambiadas "
+          f"({result['players']} jugadores) en {result['seconds']}s")
+    return result
 
 # =============================================================================
 # FUNCIONES DE INICIALIZACIÓN
@@ -939,20 +2156,45 @@ async def init_demo_user():
             "username": "demo",
             "password": "demo123",
             "email": "demo@fantasybasket.com",
-            "cardIds": ["card_001", "card_002", "card_005", "card_009", "card_013"],
+            **card_inventory.inventory_fields(["card_001", "card_002", "card_005", "card_009", "card_013"]),
             "lineupIds": ["card_002", "card_005"],
             "points": 1250,
             "rank": 156,
             "redeemedCodes": [],
-            "createdAt": firestore.SERVER_TIMESTAMP,
-            "lastLogin": firestore.SERVER_TIMESTAMP
+            "createdAt": SERVER_TIMESTAMP,
+            "lastLogin": SERVER_TIMESTAMP
         }
         
-        db.collection(USERS_COLLECTION).add(user_data)
+        user_id = await run_store(store.add, USERS_COLLECTION, user_data)
+        await run_store(store.batch_write, _user_index_writes(user_id, user_data, "set"))
         print("✅ Usuario demo creado en Firestore")
     else:
         print("ℹ️  Usuario demo ya existe en Firestore")
 
+_background_tasks: List[asyncio.Task] = []
+
+def start_background_tasks():
+    """
+    Lanza las tareas periódicas del servicio (barrido o sincronización de
+    sesiones y envío de escrituras diferidas)
+    """
+    if signed_tokens is not None:
+        _background_tasks.append(asyncio.create_task(run_revocation_sync(SESSION_SWEEP_INTERVAL)))
+    else:
+        _background_tasks.append(asyncio.create_task(run_sweeper(active_sessions, SESSION_SWEEP_INTERVAL)))
+    _background_tasks.append(asyncio.create_task(deferred_writes.run()))
+
+async def stop_background_tasks():
+    """
+    Cancela las tareas periódicas y espera a que terminen
+    Antes envía las escrituras diferidas que queden en la cola
+    """
+    await deferred_writes.close()
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+
 async def initialize_firebase():
     """
     Inicializa datos necesarios en Firebase
@@ -960,7 +2202,9 @@ async def initialize_firebase():
     Los códigos se cargan desde archivo JSON
     """
     print("🔥 Inicializando Firebase...")
-    codes = load_codes()
+    codes = get_all_codes()
     print(f"📋 Códigos disponibles desde JSON: {', '.join(codes.keys())}")
     await init_demo_user()
+    if not await load_leaderboards():
+        await rebuild_leaderboards()
     print("✅ Firebase inicializado correctamente")
@@ -0,0 +1,182 @@
+"""
+Clasificaciones de usuarios materializadas por periodo
+
+Cada periodo (temporada, semana ISO, mes) es una lista ordenada en memoria
+de claves (-puntos, userId) más un dict {userId: (username, puntos)}:
+- top-N y páginas: slice de la lista ordenada (o bisect desde un cursor)
+- "mi posición": bisect sobre la lista, O(log n)
+- cambio de puntos de un usuario: quitar + insertar, O(log n)
+El estado se persiste como snapshot (documentos troceados) para que un
+worker nuevo no tenga que recorrer la colección de usuarios.
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+SEASON = "season"
+PERIOD_KINDS = ("weekly", "monthly", "season")
+
+
+def period_ids(fecha: Optional[str]) -> Dict[str, str]:
+    """
+    Periodos a los que pertenece una jornada según su fecha (YYYY-MM-DD)
+    Sin fecha válida la jornada solo cuenta para la temporada
+    """
+    periods = {"season": SEASON}
+    try:
+        day = date.fromisoformat(str(fecha)[:10])
+    except ValueError:
+        return periods
+    year, week, _ = day.isocalendar()
+    periods["weekly"] = f"week:{year}-W{week:02d}"
+    periods["monthly"] = f"month:{day.year}-{day.month:02d}"
+    return periods
+
+
+def encode_cursor(entry: Dict) -> str:
+    """
+    Cursor opaco de una entrada de página: "<puntos>:<userId>"
+    """
+    return f"{entry['points']!r}:{entry['userId']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """
+    (puntos, userId) de un cursor; ValueError si no es válido
+    """
+    points, sep, user_id = cursor.partition(":")
+    if not sep or not user_id:
+        raise ValueError(f"Cursor no válido: {cursor}")
+    return float(points), user_id
+
+
+class Leaderboard:
+    """
+    Clasificación de un periodo
+    """
+
+    def __init__(self, period_id: str):
+        self.period_id = period_id
+        self._order = SortedList()  # (-puntos, userId)
+        self._entries: Dict[str, Tuple[str, float]] = {}  # {userId: (username, puntos)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def update(self, user_id: str, username: str, points: float):
+        current = self._entries.get(user_id)
+        if current is not None:
+            if current == (username, points):
+                return
+            self._order.remove((-current[1], user_id))
+        self._entries[user_id] = (username, points)
+        self._order.add((-points, user_id))
+
+    def remove(self, user_id: str):
+        current = self._entries.pop(user_id, None)
+        if current is not None:
+            self._order.remove((-current[1], user_id))
+
+    def page(self, offset: int = 0, limit: int = 10,
+             start_after: Optional[Tuple[float, str]] = None) -> List[Dict]:
+        """
+        Entradas [offset, offset + limit) con su posición, o las `limit`
+        siguientes al cursor (puntos, userId) de la última entrada vista
+        Empates: misma posición (1, 2, 2, 4...)
+        """
+        if start_after is not None:
+            points, user_id = start_after
+            offset = self._order.bisect_right((-points, user_id))
+        result = []
+        for neg_points, user_id in self._order[offset:offset + limit]:
+            username, points = self._entries[user_id]
+            result.append({
+                "rank": self._order.bisect_left((neg_points,)) + 1,
+                "userId": user_id,
+                "username": username,
+                "points": points
+            })
+        return result
+
+    def rank(self, user_id: str) -> Optional[Dict]:
+        current = self._entries.get(user_id)
+        if current is None:
+            return None
+        return {
+            "rank": self._order.bisect_left((-current[1],)) + 1,
+            "points": current[1],
+            "total": len(self._entries)
+        }
+
+    def to_entries(self) -> Dict[str, List]:
+        return {user_id: [username, points] for user_id, (username, points) in self._entries.items()}
+
+    @classmethod
+    def from_entries(cls, period_id: str, entries: Dict[str, List]) -> "Leaderboard":
+        board = cls(period_id)
+        board._entries = {user_id: (username, points) for user_id, (username, points) in entries.items()}
+        board._order = SortedList((-points, user_id) for user_id, (_, points) in board._entries.items())
+        return board
+
+
+class LeaderboardSet:
+    """
+    Todas las clasificaciones, el periodo de cada jornada y el periodo vigente
+    de cada tipo (el de la última jornada puntuada)
+    """
+
+    def __init__(self):
+        self.boards: Dict[str, Leaderboard] = {}
+        self.jornada_periods: Dict[str, Dict[str, str]] = {}  # {"<jornada>": {tipo: periodo}}
+        self.current: Dict[str, str] = {"season": SEASON}
+        self.version = 0.0  # marca del snapshot cargado o publicado
+
+    def board(self, period_id: str) -> Leaderboard:
+        board = self.boards.get(period_id)
+        if board is None:
+            board = self.boards[period_id] = Leaderboard(period_id)
+        return board
+
+    def current_board(self, kind: str) -> Optional[Leaderboard]:
+        period_id = self.current.get(kind)
+        return self.boards.get(period_id) if period_id else None
+
+    def register_jornada(self, jornada: int, periods: Dict[str, str], make_current: bool = True):
+        self.jornada_periods[str(jornada)] = periods
+        if make_current:
+            self.current.update(periods)
+
+    def jornadas_in(self, period_id: str) -> List[str]:
+        return [j for j, periods in self.jornada_periods.items() if period_id in periods.values()]
+
+    def update_user(self, user_id: str, username: str, season_points: float,
+                    jornada_points: Dict[str, float], period_ids_: Iterable[str]):
+        """
+        Recalcula los periodos indicados de un usuario a partir de sus puntos por jornada
+        """
+        for period_id in period_ids_:
+            if period_id == SEASON:
+                self.board(period_id).update(user_id, username, season_points)
+                continue
+            # En semanas y meses solo aparecen los usuarios puntuados en alguna de sus jornadas
+            jornadas = [j for j in self.jornadas_in(period_id) if j in jornada_points]
+            if jornadas:
+                points = round(sum(jornada_points[j] for j in jornadas), 2)
+                self.board(period_id).update(user_id, username, points)
+            else:
+                self.board(period_id).remove(user_id)
+
+    def rebuild(self, users: Iterable[Tuple[str, Dict]]):
+        """
+        Reconstruye todas las clasificaciones desde los documentos de usuario
+        """
+        self.boards = {}
+        all_periods = {p for periods in self.jornada_periods.values() for p in periods.values()}
+        all_periods.add(SEASON)
+        for user_id, user in users:
+            self.update_user(
+                user_id, user.get("username", "Usuario"), user.get("points", 0) or 0,
+                user.get("jornadaPoints") or {}, all_periods
+            )
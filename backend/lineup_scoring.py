@@ -0,0 +1,66 @@
+"""
+Puntuación de alineaciones por jornada
+Las alineaciones de todos los usuarios se cargan en matrices (usuarios × posiciones)
+de índices de jugador y multiplicadores; la puntuación de todos los usuarios es
+una sola operación de NumPy: sum(puntos[índices] * multiplicadores, eje posiciones)
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+LINEUP_POSITIONS = ["base", "escolta", "alero", "alaPivot", "pivot"]
+
+
+def jornada_points(players: List[Tuple[str, Dict]], jornada: int) -> Tuple[Dict[str, int], np.ndarray]:
+    """
+    Puntos fantasy de cada jugador en la jornada
+    Devuelve ({playerId: índice}, vector de puntos). El último elemento del
+    vector es 0 y sirve de índice para huecos vacíos o jugadores sin datos
+    """
+    index: Dict[str, int] = {}
+    points = np.zeros(len(players) + 1, dtype=np.float64)
+    for i, (player_id, player) in enumerate(players):
+        index[player_id] = i
+        for jornada_stats in player.get("jornadasStats", []):
+            if jornada_stats.get("jornada") == jornada:
+                points[i] = jornada_stats.get("stats", {}).get("puntosFantasy", 0) or 0
+                break
+    return index, points
+
+
+def _multiplier(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def lineup_matrices(users: List[Tuple[str, Dict]], player_index: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Matrices (usuarios × posiciones) de índice de jugador y multiplicador
+    Las alineaciones antiguas (lista de IDs de carta) no puntúan
+    """
+    empty = len(player_index)
+    slots = np.full((len(users), len(LINEUP_POSITIONS)), empty, dtype=np.int64)
+    multipliers = np.zeros((len(users), len(LINEUP_POSITIONS)), dtype=np.float64)
+
+    for row, (_, user) in enumerate(users):
+        lineup = user.get("lineupIds")
+        if not isinstance(lineup, dict):
+            continue
+        for column, position in enumerate(LINEUP_POSITIONS):
+            entry = lineup.get(position)
+            if not isinstance(entry, dict):
+                continue
+            slots[row, column] = player_index.get(entry.get("playerId"), empty)
+            multipliers[row, column] = _multiplier(entry.get("multiplicador", 1.0))
+
+    return slots, multipliers
+
+
+def score_lineups(points: np.ndarray, slots: np.ndarray, multipliers: np.ndarray) -> np.ndarray:
+    """
+    Puntuación de cada usuario (redondeada a 2 decimales)
+    """
+    return np.round((points[slots] * multipliers).sum(axis=1), 2)
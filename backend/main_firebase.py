@@ -16,10 +16,8 @@ from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from pydantic import BaseModel
 from typing import Optional, Dict
 import secrets
-import random
 import os
 from datetime import datetime
-from google.cloud import firestore
 
 # Importar servicios de Firebase
 import firebase_service as fb
@@ -132,6 +130,18 @@ class OpenPackResponse(BaseModel):
     newCardIds: list[str]
     packType: str
 
+class OpenPacksRequest(BaseModel):
+    count: Optional[int] = None  # None = abrir todos los sobres
+
+class OpenedPack(BaseModel):
+    packType: str
+    newCardIds: list[str]
+
+class OpenPacksResponse(BaseModel):
+    success: bool
+    message: str
+    packs: list[OpenedPack]
+
 class SaveLineupRequest(BaseModel):
     lineup: Dict[str, Dict]  # Dict con posiciones como keys y objetos {id, playerId, multiplicador} como values
 
@@ -169,8 +179,14 @@ class JornadaStatsRequest(BaseModel):
 # FUNCIONES AUXILIARES
 # =============================================================================
 
-def generate_token() -> str:
-    """Genera un token de sesión aleatorio"""
+def generate_token(user_id: str) -> str:
+    """
+    Genera un token de sesión
+    - Modo memory: token aleatorio (la sesión se guarda en este proceso)
+    - Modo stateless: token firmado con userId y expiración
+    """
+    if fb.SESSION_MODE == "stateless":
+        return fb.issue_session_token(user_id)
     return secrets.token_hex(32)
 
 async def get_current_user(credentials: HTTPBasicCredentials = Depends(security)) -> dict:
@@ -187,7 +203,7 @@ async def get_current_user(credentials: HTTPBasicCredentials = Depends(security)
             headers={"WWW-Authenticate": "Basic"},
         )
     
-    # Obtener usuario de Firestore
+    # Obtener usuario (caché de usuarios, Firestore si no está)
     user = await fb.get_user_by_id(session["userId"])
     
     if not user:
@@ -215,7 +231,7 @@ def verify_admin_password(credentials: HTTPBasicCredentials = Depends(security))
     
     return True
 
-def generate_pack_ids(pack_type: str = "standard") -> list[str]:
+def generate_pack_ids(pack_type: str = "standard", seed: Optional[int] = None) -> list[str]:
     """
     Genera un sobre de cartas del pool
     NO devuelve datos completos, solo IDs
@@ -223,46 +239,10 @@ def generate_pack_ids(pack_type: str = "standard") -> list[str]:
     - welcome: 5 cartas (una por posición)
     - standard: 2 cartas aleatorias
     - legendary: 3 cartas especiales
+    
+    Los tipos están en fb.PACK_DEFINITIONS; con `seed` el sobre es reproducible
     """
-    card_ids = []
-    
-    if pack_type == "welcome":
-        # Pack de bienvenida: 5 cartas, una de cada posición (aleatorias)
-        card_ids.append(random.choice(fb.CARDS_BY_POSITION["Base"]))
-        card_ids.append(random.choice(fb.CARDS_BY_POSITION["Escolta"]))
-        card_ids.append(random.choice(fb.CARDS_BY_POSITION["Alero"]))
-        card_ids.append(random.choice(fb.CARDS_BY_POSITION["Ala-Pívot"]))
-        card_ids.append(random.choice(fb.CARDS_BY_POSITION["Pívot"]))
-    elif pack_type == "legendary":
-        # Pack legendario: 3 cartas especiales
-        card_ids.append(random.choice(fb.CARD_ID_POOLS["common"] + fb.CARD_ID_POOLS["rare"]))
-        card_ids.append(random.choice(fb.CARD_ID_POOLS["epic"] + fb.CARD_ID_POOLS["legendary"]))
-        card_ids.append(random.choice(fb.CARD_ID_POOLS["legendary"]))
-    else:
-        # Pack estándar: 2 cartas aleatorias
-        # Primera carta
-        roll1 = random.random() * 100
-        if roll1 < 60:
-            card_ids.append(random.choice(fb.CARD_ID_POOLS["common"]))
-        elif roll1 < 85:
-            card_ids.append(random.choice(fb.CARD_ID_POOLS["rare"]))
-        elif roll1 < 97:
-            card_ids.append(random.choice(fb.CARD_ID_POOLS["epic"]))
-        else:
-            card_ids.append(random.choice(fb.CARD_ID_POOLS["legendary"]))
-        
-        # Segunda carta
-        roll2 = random.random() * 100
-        if roll2 < 60:
-            card_ids.append(random.choice(fb.CARD_ID_POOLS["common"]))
-        elif roll2 < 85:
-            card_ids.append(random.choice(fb.CARD_ID_POOLS["rare"]))
-        elif roll2 < 97:
-            card_ids.append(random.choice(fb.CARD_ID_POOLS["epic"]))
-        else:
-            card_ids.append(random.choice(fb.CARD_ID_POOLS["legendary"]))
-    
-    return card_ids
+    return fb.pack_engine.open(pack_type, seed)
 
 # =============================================================================
 # EVENTOS DE INICIO
@@ -272,6 +252,13 @@ def generate_pack_ids(pack_type: str = "standard") -> list[str]:
 async def startup_event():
     """Inicializa Firebase al arrancar"""
     await fb.initialize_firebase()
+    fb.start_background_tasks()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Detiene las tareas periódicas y espera a las llamadas pendientes a Firebase"""
+    await fb.stop_background_tasks()
+    fb.shutdown_executor()
 
 # =============================================================================
 # ENDPOINTS
@@ -283,7 +270,8 @@ async def root():
     return {
         "status": "ok",
         "message": "Fantasy Basket Club API v2.0 - Firebase + Arquitectura de IDs",
-        "firebase": "✅ Conectado"
+        "firebase": "✅ Conectado",
+        "storage": fb.store.name
     }
 
 # -----------------------------------------------------------------------------
@@ -298,7 +286,8 @@ async def login(request: LoginRequest):
     
     ARQUITECTURA: El backend devuelve SOLO IDs (~200 bytes)
     El frontend expande los IDs usando su catálogo local
-    1 query a Firestore por request
+    1 query a Firestore por request (+1 a Firebase Auth si la cuenta no se ha
+    comprobado en AUTH_CHECK_TTL; lastLogin se escribe en segundo plano)
     """
     # Intentar buscar por email si contiene @, sino por username
     if '@' in request.username:
@@ -314,32 +303,18 @@ async def login(request: LoginRequest):
             detail="Email/Usuario o contraseña incorrectos"
         )
     
-    # Verificar si tiene campo authUid (usuario con Firebase Auth)
-    if user.get("authUid"):
-        # Usuario creado con Firebase Authentication
-        # Verificar que existe en Firebase Auth
-        try:
-            firebase_user = await fb.verify_user_login(user.get("email"), request.password)
-            if not firebase_user:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Usuario o contraseña incorrectos"
-                )
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Usuario o contraseña incorrectos"
-            )
-    else:
-        # Usuario antiguo sin Firebase Auth (demo user)
-        if user.get("password") != request.password:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Usuario o contraseña incorrectos"
-            )
+    # Credenciales contra el documento ya cargado (+ estado de la cuenta de Auth, cacheado)
+    if not await fb.verify_user_login(user, request.password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario o contraseña incorrectos"
+        )
     
-    # Generar token de sesión en memoria (no async)
-    token = generate_token()
+    # Última conexión fuera del camino de la respuesta
+    fb.record_login(user["_id"])
+    
+    # Generar token de sesión (no async)
+    token = generate_token(user["_id"])
     fb.create_session(user["_id"], token)
     
     # Construir respuesta: SOLO IDs, NO datos completos
@@ -347,7 +322,7 @@ async def login(request: LoginRequest):
     user_data = {
         "id": user["_id"],
         "username": user["username"],
-        "cardIds": user.get("cardIds", []),  # SOLO IDs
+        "cardIds": fb.card_inventory.card_ids(user),  # SOLO IDs (expandidos de cardCounts)
         "lineupIds": user.get("lineupIds", []),  # SOLO IDs
         "unopenedPacks": user.get("unopenedPacks", []),  # Sobres sin abrir
         "points": user.get("points", 0),
@@ -381,15 +356,15 @@ async def signup(request: SignUpRequest):
             detail=str(e)
         )
     
-    # Generar token de sesión en memoria (no async)
-    token = generate_token()
+    # Generar token de sesión (no async)
+    token = generate_token(new_user["_id"])
     fb.create_session(new_user["_id"], token)
     
     # Construir respuesta: SOLO IDs, NO datos completos
     user_data = {
         "id": new_user["_id"],
         "username": new_user["username"],
-        "cardIds": new_user.get("cardIds", []),
+        "cardIds": fb.card_inventory.card_ids(new_user),
         "lineupIds": new_user.get("lineupIds", []),
         "unopenedPacks": new_user.get("unopenedPacks", []),  # Sobres sin abrir
         "points": new_user.get("points", 0),
@@ -399,10 +374,12 @@ async def signup(request: SignUpRequest):
     return LoginResponse(token=token, user=user_data)
 
 @app.post("/api/auth/logout")
-async def logout(user: dict = Depends(get_current_user)):
-    """Cierra la sesión del usuario"""
-    # Aquí habría que obtener el token del header para eliminarlo
-    # Por simplicidad, retornamos success
+async def logout(
+    credentials: HTTPBasicCredentials = Depends(security),
+    user: dict = Depends(get_current_user)
+):
+    """Cierra la sesión del usuario (elimina su token del almacén de sesiones)"""
+    fb.delete_session(credentials.password)
     return {"success": True, "message": "Sesión cerrada"}
 
 # -----------------------------------------------------------------------------
@@ -418,7 +395,7 @@ async def get_current_user_data(user: dict = Depends(get_current_user)):
     return {
         "id": user["_id"],
         "username": user["username"],
-        "cardIds": user.get("cardIds", []),
+        "cardIds": fb.card_inventory.card_ids(user),
         "lineupIds": user.get("lineupIds", []),
         "unopenedPacks": user.get("unopenedPacks", []),  # Sobres sin abrir
         "points": user.get("points", 0),
@@ -442,7 +419,6 @@ async def save_lineup(request: SaveLineupRequest, user: dict = Depends(get_curre
             )
     
     # Validar que todas las cartas pertenecen al usuario
-    user_card_ids = user.get("cardIds", [])
     lineup_dict = {}
     for position, position_data in request.lineup.items():
         # position_data es un diccionario simple
@@ -460,7 +436,7 @@ async def save_lineup(request: SaveLineupRequest, user: dict = Depends(get_curre
             )
         
         card_id = position_data.get("id")
-        if card_id and card_id not in user_card_ids:
+        if card_id and not fb.card_inventory.owns(user, card_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"La carta {card_id} no pertenece al usuario"
@@ -555,7 +531,7 @@ async def open_pack(request: OpenPackRequest, user: dict = Depends(get_current_u
     Abre un sobre del inventario y devuelve las cartas obtenidas
     
     ARQUITECTURA: El backend genera IDs del pool y los añade a la colección del usuario
-    1-2 queries a Firestore
+    1 transacción en Firestore (lectura + escritura atómicas)
     """
     unopened_packs = user.get("unopenedPacks", [])
     
@@ -566,20 +542,18 @@ async def open_pack(request: OpenPackRequest, user: dict = Depends(get_current_u
             detail="Índice de sobre inválido"
         )
     
-    # Obtener el tipo de sobre
-    pack = unopened_packs[request.packIndex]
-    pack_type = pack.get("type", "standard")
-    
-    # Generar cartas según el tipo de sobre
-    new_card_ids = generate_pack_ids(pack_type)
+    # Generar cartas, añadirlas a la colección y quitar el sobre en una transacción
+    result = await fb.open_unopened_pack(user["_id"], request.packIndex, generate_pack_ids)
     
-    # Añadir cartas a la colección del usuario
-    current_card_ids = user.get("cardIds", [])
-    updated_card_ids = current_card_ids + new_card_ids
-    await fb.update_user_cards(user["_id"], updated_card_ids)
+    if not result:
+        # El sobre ya no existe (p. ej. abierto desde otra pestaña)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Índice de sobre inválido"
+        )
     
-    # Remover el sobre del inventario
-    await fb.remove_unopened_pack(user["_id"], request.packIndex)
+    pack_type = result["packType"]
+    new_card_ids = result["newCardIds"]
     
     # Mensaje según el tipo de sobre
     pack_names = {
@@ -595,34 +569,90 @@ async def open_pack(request: OpenPackRequest, user: dict = Depends(get_current_u
         packType=pack_type
     )
 
+@app.post("/api/packs/open-all", response_model=OpenPacksResponse)
+async def open_packs(request: OpenPacksRequest, user: dict = Depends(get_current_user)):
+    """
+    Abre varios sobres de una vez (los `count` más antiguos, o todos si no se indica)
+    y devuelve las cartas de cada uno
+    
+    ARQUITECTURA: 1 transacción en Firestore para todos los sobres
+    """
+    if request.count is not None and request.count < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="count debe ser mayor que 0"
+        )
+    
+    if not user.get("unopenedPacks"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No tienes sobres sin abrir"
+        )
+    
+    packs = await fb.open_unopened_packs(user["_id"], generate_pack_ids, request.count)
+    
+    if not packs:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No tienes sobres sin abrir"
+        )
+    
+    return OpenPacksResponse(
+        success=True,
+        message=f"¡Has abierto {len(packs)} {'sobre' if len(packs) == 1 else 'sobres'}!",
+        packs=[OpenedPack(**pack) for pack in packs]
+    )
+
 # -----------------------------------------------------------------------------
 # RANKINGS
 # -----------------------------------------------------------------------------
 
 @app.get("/api/rankings")
-async def get_rankings(period: str = "monthly"):
+async def get_rankings(period: str = "monthly", limit: int = 10, offset: int = 0,
+                       start_after: Optional[str] = None):
     """
-    Obtiene el ranking de jugadores desde Firestore
+    Obtiene el ranking de usuarios del periodo vigente
     period: 'weekly', 'monthly', 'season'
+    start_after: nextCursor de la respuesta anterior (paginación por cursor)
+    Sale de la clasificación materializada en memoria, sin consultar usuarios
     """
-    # Obtener todos los usuarios ordenados por puntos (descendente)
-    users_ref = fb.db.collection(fb.USERS_COLLECTION)
-    query = users_ref.order_by("points", direction=firestore.Query.DESCENDING).limit(10)
+    if period not in fb.leaderboard.PERIOD_KINDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"period debe ser uno de: {', '.join(fb.leaderboard.PERIOD_KINDS)}"
+        )
+    
+    try:
+        board = await fb.get_leaderboard(
+            period, offset=max(offset, 0), limit=min(max(limit, 1), 100), start_after=start_after
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
     rankings = []
-    rank = 1
-    for doc in query.stream():
-        user_data = doc.to_dict()
+    for entry in board["entries"]:
         rankings.append({
-            "rank": rank,
-            "username": user_data.get("username", "Usuario"),
-            "points": user_data.get("points", 0)
+            "rank": entry["rank"],
+            "username": entry["username"],
+            "points": entry["points"]
         })
-        rank += 1
     
     return {
         "period": period,
-        "rankings": rankings
+        "periodId": board["periodId"],
+        "total": board["total"],
+        "rankings": rankings,
+        "nextCursor": board["nextCursor"]
+    }
+
+@app.get("/api/rankings/me")
+async def get_my_rankings(user: dict = Depends(get_current_user)):
+    """
+    Posición del usuario autenticado en cada periodo (null si no está clasificado)
+    """
+    return {
+        "username": user.get("username"),
+        "rankings": await fb.get_user_ranks(user["_id"])
     }
 
 # -----------------------------------------------------------------------------
@@ -661,7 +691,7 @@ async def create_code(request: AddCodeRequest, authorized: bool = Depends(verify
         valid_until = datetime.fromisoformat(request.validUntil)
         
         # Validar packType
-        valid_pack_types = ["welcome", "standard", "legendary"]
+        valid_pack_types = list(fb.PACK_DEFINITIONS)
         if request.packType not in valid_pack_types:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -706,7 +736,7 @@ async def update_code_endpoint(code: str, request: UpdateCodeRequest, authorized
         
         # Validar packType si se proporciona
         if request.packType:
-            valid_pack_types = ["welcome", "standard", "legendary"]
+            valid_pack_types = list(fb.PACK_DEFINITIONS)
             if request.packType not in valid_pack_types:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -756,24 +786,108 @@ async def delete_code_endpoint(code: str, authorized: bool = Depends(verify_admi
         "message": f"Código {code} eliminado exitosamente"
     }
 
+# -----------------------------------------------------------------------------
+# GESTIÓN DE SESIONES (ADMIN)
+# -----------------------------------------------------------------------------
+
+@app.get("/api/admin/sessions/stats")
+async def get_session_stats(authorized: bool = Depends(verify_admin_password)):
+    """
+    Contadores del almacén de sesiones (tamaño, expulsiones LRU, expiraciones)
+    y de la caché de usuarios (aciertos / fallos)
+    Requiere password de administrador
+    """
+    return {
+        "success": True,
+        "stats": fb.get_session_stats(),
+        "userCache": fb.get_user_cache_stats()
+    }
+
+@app.get("/api/admin/write-buffer/stats")
+async def get_write_buffer_stats(authorized: bool = Depends(verify_admin_password)):
+    """
+    Cola de escrituras diferidas (lastLogin...): profundidad, escrituras
+    combinadas y latencia de los envíos
+    Requiere password de administrador
+    """
+    return {
+        "success": True,
+        "stats": fb.get_write_buffer_stats()
+    }
+
+@app.delete("/api/admin/users/{user_id}/sessions")
+async def revoke_user_sessions(user_id: str, authorized: bool = Depends(verify_admin_password)):
+    """
+    Cierra todas las sesiones activas de un usuario
+    Requiere password de administrador
+    """
+    revoked = fb.revoke_user_sessions(user_id)
+    
+    return {
+        "success": True,
+        "message": f"{revoked} sesiones cerradas"
+    }
+
+# -----------------------------------------------------------------------------
+# PUNTUACIÓN DE JORNADAS (ADMIN)
+# -----------------------------------------------------------------------------
+
+@app.post("/api/admin/jornadas/{jornada}/score")
+async def score_jornada(jornada: int, authorized: bool = Depends(verify_admin_password)):
+    """
+    Calcula los puntos de la jornada para todos los usuarios según su alineación
+    Se puede repetir (p. ej. tras corregir estadísticas): sustituye la puntuación anterior
+    Requiere password de administrador
+    """
+    result = await fb.score_jornada(jornada)
+    
+    return {
+        "success": True,
+        "message": f"Jornada {jornada} puntuada: {result['updated']} usuarios actualizados",
+        **result
+    }
+
+@app.get("/api/admin/players/stats-store")
+async def get_player_stats_store(authorized: bool = Depends(verify_admin_password)):
+    """
+    Filas y memoria del almacén columnar de estadísticas por jornada
+    (frente a lo que ocuparían las mismas filas como dicts)
+    Requiere password de administrador
+    """
+    return {
+        "success": True,
+        "stats": fb.get_player_stats_info()
+    }
+
 # -----------------------------------------------------------------------------
 # JUGADORES Y ESTADÍSTICAS
 # -----------------------------------------------------------------------------
 
 @app.get("/api/players")
-async def get_all_players_endpoint():
-    """
-    Obtiene todos los jugadores activos con sus estadísticas
+async def get_all_players_endpoint(summary: bool = False, jornadas: Optional[int] = None):
     """
-    players = await fb.get_all_players(active_only=True)
+    Obtiene todos los jugadores activos con todas sus jornadas
+    
+    Query params:
+    - summary: Solo el resumen de temporada, sin jornadas (default: false)
+    - jornadas: Solo las últimas N jornadas de cada jugador (0 = como summary)
+    """
+    if summary:
+        jornadas = 0
+    elif jornadas is not None:
+        jornadas = max(0, min(jornadas, 50))
+    players = await fb.get_all_players(active_only=True, jornadas=jornadas)
     return {"players": players}
 
 @app.get("/api/players/{player_id}")
-async def get_player_endpoint(player_id: str):
+async def get_player_endpoint(player_id: str, jornadas: Optional[int] = None):
     """
     Obtiene un jugador específico con todas sus jornadas
+    
+    Query params:
+    - jornadas: Solo las últimas N jornadas (0 = solo el resumen de temporada)
     """
-    player = await fb.get_player_by_id(player_id)
+    player = await fb.get_player_by_id(player_id, jornadas=jornadas)
     
     if not player:
         raise HTTPException(
@@ -788,24 +902,37 @@ async def get_player_jornada_endpoint(player_id: str, jornada_num: int):
     """
     Obtiene las estadísticas de un jugador en una jornada específica
     """
-    player = await fb.get_player_by_id(player_id)
+    jornada = await fb.get_player_jornada(player_id, jornada_num)
+    if jornada:
+        return jornada
     
-    if not player:
+    if not await fb.get_player_by_id(player_id, jornadas=0):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Jugador no encontrado"
         )
     
-    jornadas = player.get("jornadasStats", [])
-    for jornada in jornadas:
-        if jornada["jornada"] == jornada_num:
-            return jornada
-    
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail=f"No se encontraron estadísticas para la jornada {jornada_num}"
     )
 
+@app.get("/api/jornadas/{jornada_num}")
+async def get_jornada_endpoint(jornada_num: int):
+    """
+    Obtiene la jornada completa: línea de cada jugador (por puntos fantasy)
+    y totales del equipo. Se sirve desde caché
+    """
+    jornada = await fb.get_jornada(jornada_num)
+    
+    if not jornada:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No se encontraron estadísticas para la jornada {jornada_num}"
+        )
+    
+    return jornada
+
 # NOTA: Las estadísticas se gestionan localmente (directamente en Firestore)
 # Los endpoints solo leen datos, no los modifican
 
@@ -820,7 +947,8 @@ async def get_players_ranking_endpoint(limit: int = 10, order_by: str = "puntosF
     
     Query params:
     - limit: Número de resultados (default: 10)
-    - order_by: Campo de ordenación - "puntosFantasy", "puntos", "valoracion" (default: "puntosFantasy")
+    - order_by: Campo de ordenación - "puntosFantasy", "puntos", "valoracion" o un promedio
+      ("promedios.puntos", "promedios.puntosFantasy"...) (default: "puntosFantasy")
     """
     ranking = await fb.get_players_ranking(limit=limit, order_by=order_by)
     
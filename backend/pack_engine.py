@@ -0,0 +1,189 @@
+"""
+Motor de generación de sobres
+Cada tipo de sobre se define como datos (lista de huecos con pesos por pool)
+y se compila al arrancar en tablas de alias (método de Vose): cada carta
+cuesta O(1) sin importar cuántas cartas o pools tenga el hueco.
+
+- open(): un sobre, con el RNG del motor o con una semilla concreta
+- open_batch(): miles de sobres de una vez con NumPy (simulaciones, auditorías)
+"""
+
+import random
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+# Peso especial: el pool pesa tanto como cartas tiene
+# (equivale a elegir uniformemente de la concatenación de pools)
+BY_SIZE = "size"
+
+Weight = Union[float, str]
+SlotDefinition = Dict[str, Weight]  # {nombre de pool: peso}
+
+
+def build_alias_table(probabilities: np.ndarray):
+    """
+    Construye las tablas (prob, alias) del método de alias de Vose
+    """
+    n = len(probabilities)
+    scaled = probabilities * n / probabilities.sum()
+    prob = np.ones(n, dtype=np.float64)
+    alias = np.arange(n, dtype=np.int64)
+
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+
+    while small and large:
+        s = small.pop()
+        g = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = g
+        scaled[g] = scaled[g] + scaled[s] - 1.0
+        (small if scaled[g] < 1.0 else large).append(g)
+
+    # Los restantes tienen probabilidad 1 (salvo error de redondeo)
+    for i in small + large:
+        prob[i] = 1.0
+
+    return prob, alias
+
+
+class CompiledSlot:
+    """
+    Un hueco del sobre: distribución sobre pares (pool, carta)
+    Una carta presente en varios pools tiene una entrada por pool, así el
+    sorteo sabe también de qué pool (rareza) salió
+    """
+
+    def __init__(self, card_indexes: np.ndarray, pool_indexes: np.ndarray, probabilities: np.ndarray):
+        self.card_indexes = card_indexes  # índice global de carta de cada entrada
+        self.pool_indexes = pool_indexes  # índice del pool de cada entrada
+        self.probabilities = probabilities / probabilities.sum()
+        self.prob, self.alias = build_alias_table(self.probabilities)
+        # Copias en listas de Python: más rápidas para sorteos individuales
+        self._prob_list = self.prob.tolist()
+        self._alias_list = self.alias.tolist()
+        self._cards_list = self.card_indexes.tolist()
+        self._size = len(self._cards_list)
+
+    def draw(self, rng: random.Random) -> int:
+        column = int(rng.random() * self._size)
+        if rng.random() >= self._prob_list[column]:
+            column = self._alias_list[column]
+        return self._cards_list[column]
+
+    def draw_entries(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """
+        `n` sorteos vectorizados; devuelve índices de entrada
+        """
+        columns = rng.integers(0, self._size, size=n)
+        use_alias = rng.random(n) >= self.prob[columns]
+        return np.where(use_alias, self.alias[columns], columns)
+
+
+class PackEngine:
+    """
+    Tipos de sobre compilados
+    """
+
+    def __init__(self, definitions: Dict[str, List[SlotDefinition]], pools: Dict[str, List[str]],
+                 default_type: str = "standard", seed: Optional[int] = None):
+        self.card_ids: List[str] = sorted({card_id for pool in pools.values() for card_id in pool})
+        self._card_ids_array = np.array(self.card_ids)
+        self._index = {card_id: i for i, card_id in enumerate(self.card_ids)}
+        self.pool_names: List[str] = list(pools)
+        self.default_type = default_type
+        self.rng = random.Random(seed)
+        self.pack_types: Dict[str, List[CompiledSlot]] = {
+            pack_type: [self._compile_slot(slot, pools) for slot in slots]
+            for pack_type, slots in definitions.items()
+        }
+        if default_type not in self.pack_types:
+            raise ValueError(f"Tipo de sobre por defecto desconocido: {default_type}")
+
+    def _compile_slot(self, slot: SlotDefinition, pools: Dict[str, List[str]]) -> CompiledSlot:
+        """
+        Reparte el peso de cada pool entre sus cartas y construye la tabla de alias
+        """
+        card_indexes: List[int] = []
+        pool_indexes: List[int] = []
+        weights: List[float] = []
+        for pool_name, weight in slot.items():
+            pool = pools[pool_name]
+            if not pool:
+                continue
+            pool_weight = float(len(pool)) if weight == BY_SIZE else float(weight)
+            for card_id in pool:
+                card_indexes.append(self._index[card_id])
+                pool_indexes.append(self.pool_names.index(pool_name))
+                weights.append(pool_weight / len(pool))
+
+        if not weights or sum(weights) <= 0:
+            raise ValueError(f"Hueco de sobre sin cartas: {slot}")
+        return CompiledSlot(
+            np.array(card_indexes, dtype=np.int64),
+            np.array(pool_indexes, dtype=np.int64),
+            np.array(weights, dtype=np.float64)
+        )
+
+    def _slots(self, pack_type: str) -> List[CompiledSlot]:
+        # Tipos desconocidos se abren como el sobre por defecto
+        return self.pack_types.get(pack_type, self.pack_types[self.default_type])
+
+    def open(self, pack_type: str, seed: Optional[int] = None) -> List[str]:
+        """
+        Abre un sobre. Con `seed` el resultado es reproducible (auditorías)
+        Sin `seed` usa el flujo del motor (el `seed` del constructor solo sirve
+        para pruebas: las aperturas reales pasan siempre su propia semilla)
+        """
+        rng = random.Random(seed) if seed is not None else self.rng
+        return [self.card_ids[slot.draw(rng)] for slot in self._slots(pack_type)]
+
+    def open_batch(self, pack_type: str, n: int,
+                   rng: Optional[Union[np.random.Generator, int]] = None,
+                   with_pools: bool = False):
+        """
+        Abre `n` sobres de una vez con NumPy
+        Devuelve una matriz (n, cartas por sobre) de índices en `card_ids`
+        (y otra de índices en `pool_names` si `with_pools`)
+        `rng` puede ser un Generator o una semilla (flujo reproducible)
+        """
+        if not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng(rng)
+        slots = self._slots(pack_type)
+        cards = np.empty((n, len(slots)), dtype=np.int64)
+        pools = np.empty((n, len(slots)), dtype=np.int64) if with_pools else None
+        for column, slot in enumerate(slots):
+            entries = slot.draw_entries(rng, n)
+            cards[:, column] = slot.card_indexes[entries]
+            if with_pools:
+                pools[:, column] = slot.pool_indexes[entries]
+        return (cards, pools) if with_pools else cards
+
+    def to_card_ids(self, indexes: np.ndarray) -> np.ndarray:
+        """
+        Traduce índices de open_batch a IDs de carta
+        """
+        return self._card_ids_array[indexes]
+
+    def slot_probabilities(self, pack_type: str) -> List[Dict[str, float]]:
+        """
+        Probabilidad exacta de cada carta en cada hueco del sobre
+        """
+        result = []
+        for slot in self._slots(pack_type):
+            per_card = np.bincount(slot.card_indexes, weights=slot.probabilities,
+                                   minlength=len(self.card_ids))
+            result.append({self.card_ids[i]: float(per_card[i]) for i in np.flatnonzero(per_card)})
+        return result
+
+    def pool_probabilities(self, pack_type: str) -> List[Dict[str, float]]:
+        """
+        Probabilidad exacta de que cada hueco salga de cada pool
+        """
+        result = []
+        for slot in self._slots(pack_type):
+            per_pool = np.bincount(slot.pool_indexes, weights=slot.probabilities,
+                                   minlength=len(self.pool_names))
+            result.append({self.pool_names[i]: float(per_pool[i]) for i in np.flatnonzero(per_pool)})
+        return result
@@ -0,0 +1,84 @@
+"""
+Forma reciente de un jugador: medias de las últimas jornadas, regularidad y rachas
+
+Se calcula al escribir estadísticas (a partir de todas las jornadas del
+jugador) y se guarda en el documento junto a promedios, así que leerla no
+cuesta nada. Las medias móviles salen de ventanas deslizantes de NumPy sobre
+la matriz jornadas × estadísticas.
+
+Racha: jornadas consecutivas más recientes por encima ("caliente") o por
+debajo ("fria") de la media de puntos fantasy de la temporada.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+FORM_STATS = ["puntos", "asistencias", "rebotes", "valoracion", "puntosFantasy"]
+FORM_WINDOWS = (3, 5)
+FANTASY = FORM_STATS.index("puntosFantasy")
+
+
+def _round(values) -> List[float]:
+    return [round(v, 2) for v in np.asarray(values, dtype=np.float64).tolist()]
+
+
+def _racha_actual(signos: np.ndarray) -> Dict:
+    """
+    Longitud de la racha que termina en la última jornada (signo +1 / -1)
+    """
+    if signos.size == 0 or signos[-1] == 0:
+        return {"tipo": None, "jornadas": 0}
+    rotas = np.flatnonzero(signos != signos[-1])
+    longitud = signos.size - 1 - int(rotas[-1]) if rotas.size else signos.size
+    return {"tipo": "caliente" if signos[-1] > 0 else "fria", "jornadas": longitud}
+
+
+def _racha_maxima(mask: np.ndarray) -> int:
+    """
+    Racha más larga de jornadas consecutivas que cumplen la máscara
+    """
+    if not mask.any():
+        return 0
+    bordes = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return int((np.flatnonzero(bordes == -1) - np.flatnonzero(bordes == 1)).max())
+
+
+def calcular_forma(jornadas: List[Dict]) -> Dict:
+    """
+    Métricas de forma a partir de las entradas de jornadasStats
+    {
+        "ultimas3": {puntos, asistencias, rebotes, valoracion, puntosFantasy},
+        "ultimas5": {...},
+        "desviacionFantasy": desviación típica de puntos fantasy en la temporada,
+        "tendencia": media fantasy de las últimas 3 - media de la temporada,
+        "racha": {"tipo": "caliente" | "fria" | None, "jornadas": n},
+        "mejorRacha": racha caliente más larga de la temporada
+    }
+    """
+    jornadas = sorted(jornadas, key=lambda j: j["jornada"])
+    m = np.array(
+        [[j.get("stats", {}).get(stat, 0) or 0 for stat in FORM_STATS] for j in jornadas],
+        dtype=np.float64
+    ).reshape(len(jornadas), len(FORM_STATS))
+    n = len(jornadas)
+
+    forma: Dict = {}
+    for window in FORM_WINDOWS:
+        if n == 0:
+            medias = np.zeros(len(FORM_STATS))
+        else:
+            # Medias de todas las ventanas de la temporada; la vigente es la última
+            medias = sliding_window_view(m, min(window, n), axis=0).mean(axis=-1)[-1]
+        forma[f"ultimas{window}"] = dict(zip(FORM_STATS, _round(medias)))
+
+    fantasy = m[:, FANTASY]
+    media = fantasy.mean() if n else 0.0
+    signos = np.sign(np.round(fantasy - media, 2)).astype(np.int8)
+
+    forma["desviacionFantasy"] = round(float(fantasy.std()), 2) if n else 0.0
+    forma["tendencia"] = round(forma["ultimas3"]["puntosFantasy"] - float(media), 2)
+    forma["racha"] = _racha_actual(signos)
+    forma["mejorRacha"] = _racha_maxima(signos > 0)
+    return forma
@@ -0,0 +1,161 @@
+"""
+Almacén columnar en memoria de las estadísticas por jornada
+
+Una fila por (jugador, jornada) y un array de NumPy por columna (puntos,
+rebotes, tiros2Anotados...). Los totales de temporada y los rankings salen
+de reducciones sobre los arrays (bincount) en lugar de recorrer los dicts de
+jornadasStats de cada documento.
+
+Memoria por fila: 16 columnas float32 (exactas para enteros, admiten minutos
+fraccionarios) + valoración y puntos fantasy float64 + jugador/jornada int32
++ victoria = 89 bytes, frente a ~1.2 KB medidos para la misma línea como dict anidado.
+"""
+
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from box_score import STAT_COLUMNS
+
+SCORE_COLUMNS = ["valoracion", "puntosFantasy"]
+COLUMNS = STAT_COLUMNS + SCORE_COLUMNS
+
+
+class PlayerStatsColumns:
+    """
+    Filas (jugador, jornada) en arrays que crecen por duplicación
+    Los borrados mueven la última fila al hueco (O(1))
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._reset(capacity)
+
+    def _reset(self, capacity: int):
+        self._capacity = capacity
+        self._size = 0
+        self.player_ids: List[str] = []  # índice de jugador -> playerId
+        self._player_index: Dict[str, int] = {}
+        self.meta: Dict[str, Dict] = {}  # {playerId: {nombre, posicion, activo}}
+        self._rows: Dict[Tuple[int, int], int] = {}  # (índice de jugador, jornada) -> fila
+        self.player = np.zeros(capacity, dtype=np.int32)
+        self.jornada = np.zeros(capacity, dtype=np.int32)
+        self.victoria = np.zeros(capacity, dtype=bool)
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.zeros(capacity, dtype=np.float64 if name in SCORE_COLUMNS else np.float32)
+            for name in COLUMNS
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    # -------------------------------------------------------------------------
+    # Escritura
+    # -------------------------------------------------------------------------
+
+    def _grow(self):
+        self._capacity *= 2
+        self.player = np.resize(self.player, self._capacity)
+        self.jornada = np.resize(self.jornada, self._capacity)
+        self.victoria = np.resize(self.victoria, self._capacity)
+        self.columns = {name: np.resize(array, self._capacity) for name, array in self.columns.items()}
+
+    def _player(self, player_id: str) -> int:
+        index = self._player_index.get(player_id)
+        if index is None:
+            index = self._player_index[player_id] = len(self.player_ids)
+            self.player_ids.append(player_id)
+        return index
+
+    def set_player(self, player_id: str, player: Dict):
+        self._player(player_id)
+        self.meta[player_id] = {
+            "nombre": player.get("nombre"),
+            "posicion": player.get("posicion"),
+            "activo": player.get("activo", True)
+        }
+
+    def upsert(self, player_id: str, jornada: Dict):
+        """
+        Inserta o sustituye la fila de una jornada (entrada de jornadasStats)
+        """
+        key = (self._player(player_id), jornada["jornada"])
+        row = self._rows.get(key)
+        if row is None:
+            if self._size == self._capacity:
+                self._grow()
+            row = self._rows[key] = self._size
+            self._size += 1
+        stats = jornada.get("stats", {})
+        self.player[row] = key[0]
+        self.jornada[row] = key[1]
+        self.victoria[row] = bool(jornada.get("victoria", False))
+        for name, array in self.columns.items():
+            array[row] = stats.get(name, 0) or 0
+
+    def delete(self, player_id: str, jornada_num: int) -> bool:
+        index = self._player_index.get(player_id)
+        row = self._rows.pop((index, jornada_num), None) if index is not None else None
+        if row is None:
+            return False
+        last = self._size - 1
+        if row != last:
+            self.player[row] = self.player[last]
+            self.jornada[row] = self.jornada[last]
+            self.victoria[row] = self.victoria[last]
+            for array in self.columns.values():
+                array[row] = array[last]
+            self._rows[(int(self.player[row]), int(self.jornada[row]))] = row
+        self._size = last
+        return True
+
+    def load(self, players: Iterable[Tuple[str, Dict]]):
+        """
+        Carga inicial desde los documentos de jugador
+        """
+        self._reset(self._capacity)
+        for player_id, player in players:
+            self.set_player(player_id, player)
+            for jornada in player.get("jornadasStats", []):
+                self.upsert(player_id, jornada)
+
+    # -------------------------------------------------------------------------
+    # Reducciones
+    # -------------------------------------------------------------------------
+
+    def row(self, player_id: str, jornada_num: int) -> Optional[int]:
+        index = self._player_index.get(player_id)
+        return self._rows.get((index, jornada_num)) if index is not None else None
+
+    def season_totals(self) -> Dict[str, np.ndarray]:
+        """
+        {columna: total por jugador} más "partidosJugados", indexado como player_ids
+        """
+        n = self._size
+        players = self.player[:n]
+        minlength = len(self.player_ids)
+        totals = {
+            name: np.bincount(players, weights=array[:n], minlength=minlength)
+            for name, array in self.columns.items()
+        }
+        totals["partidosJugados"] = np.bincount(players, minlength=minlength)
+        return totals
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """
+        Memoria de los arrays frente a la de las mismas filas como dicts anidados
+        """
+        per_row = (
+            self.player.itemsize + self.jornada.itemsize + self.victoria.itemsize +
+            sum(array.itemsize for array in self.columns.values())
+        )
+        stats = {name: 0.0 for name in COLUMNS}
+        jornada = {"jornada": 0, "fecha": "", "rival": "", "local": True,
+                   "resultado": "", "victoria": False, "stats": stats}
+        dict_row = sys.getsizeof(jornada) + sys.getsizeof(stats) + sum(sys.getsizeof(v) for v in stats.values())
+        return {
+            "rows": self._size,
+            "bytesPerRow": per_row,
+            "dictBytesPerRow": dict_row,
+            "columnarBytes": per_row * self._size
+        }
@@ -0,0 +1,109 @@
+"""
+Reglas de puntuación fantasy definidas como datos
+
+Archivo JSON (SCORING_RULES_PATH, por defecto backend/scoring_rules.json):
+    pesos: {estadística: peso}, términos lineales que se suman en ese orden
+    bonus: [{nombre, stats, umbral, minimo, puntos}], `puntos` extra si al
+           menos `minimo` de las `stats` llegan a `umbral` (doble-doble...)
+    victoria: puntos extra si el equipo gana
+
+ScoringRules compila las reglas una vez y las evalúa sobre columnas de NumPy
+(una entrada por fila). Los términos se acumulan en el mismo orden que la
+fórmula escrita a mano, así que una fila da exactamente el mismo float.
+"""
+
+import json
+import pathlib
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from box_score import STAT_COLUMNS
+
+DEFAULT_RULES_PATH = pathlib.Path(__file__).parent / "scoring_rules.json"
+
+
+class ScoringRules:
+    """
+    Reglas compiladas: pesos con su signo y bonus con sus columnas
+    """
+
+    def __init__(self, rules: Dict):
+        self.rules = rules
+        self.pesos: List[Tuple[str, float]] = []
+        for stat, peso in rules.get("pesos", {}).items():
+            self._check_stat(stat)
+            self.pesos.append((stat, float(peso)))
+
+        self.bonus: List[Tuple[List[str], float, int, float]] = []
+        self.bonus_names: List[str] = []
+        for bonus in rules.get("bonus", []):
+            stats = list(bonus["stats"])
+            for stat in stats:
+                self._check_stat(stat)
+            minimo = int(bonus.get("minimo", 1))
+            if not 1 <= minimo <= len(stats):
+                raise ValueError(f"Bonus {bonus.get('nombre')}: minimo debe estar entre 1 y {len(stats)}")
+            self.bonus.append((stats, float(bonus["umbral"]), minimo, float(bonus["puntos"])))
+            self.bonus_names.append(bonus.get("nombre") or f"bonus{len(self.bonus)}")
+
+        self.victoria = float(rules.get("victoria", 0.0))
+        # Columnas que necesita la evaluación
+        self.stats = sorted({stat for stat, _ in self.pesos} | {s for stats, *_ in self.bonus for s in stats})
+
+    @staticmethod
+    def _check_stat(stat: str):
+        if stat not in STAT_COLUMNS:
+            raise ValueError(f"Estadística desconocida en las reglas: {stat}")
+
+    @classmethod
+    def load(cls, path: Union[str, pathlib.Path, None] = None) -> "ScoringRules":
+        path = pathlib.Path(path or DEFAULT_RULES_PATH)
+        return cls(json.loads(path.read_text(encoding="utf-8")))
+
+    @staticmethod
+    def _cumple(columns: Dict[str, np.ndarray], stats: List[str], umbral: float, minimo: int) -> np.ndarray:
+        """
+        Filas que consiguen un bonus: al menos `minimo` de las `stats` llegan a `umbral`
+        """
+        return sum(columns[stat] >= umbral for stat in stats) >= minimo
+
+    def evaluate(self, columns: Dict[str, np.ndarray], victoria: np.ndarray) -> np.ndarray:
+        """
+        Puntos fantasy (sin redondear) de todas las filas a la vez
+        columns: {estadística: array float64}, victoria: array bool
+        """
+        total = np.zeros(len(victoria), dtype=np.float64)
+        for stat, peso in self.pesos:
+            # Restar el término en vez de sumar su negativo: mismo orden y signo que la fórmula original
+            if peso >= 0:
+                total = total + columns[stat] * peso
+            else:
+                total = total - columns[stat] * -peso
+
+        for stats, umbral, minimo, puntos in self.bonus:
+            total = total + np.where(self._cumple(columns, stats, umbral, minimo), puntos, 0.0)
+
+        if self.victoria:
+            total = total + np.where(victoria, self.victoria, 0.0)
+        return total
+
+    def _row(self, stats: Dict) -> Dict[str, np.ndarray]:
+        return {stat: np.array([stats.get(stat, 0) or 0], dtype=np.float64) for stat in self.stats}
+
+    def score(self, stats: Dict, victoria: bool = False) -> float:
+        """
+        Puntos fantasy de una sola línea de estadísticas (sin redondear)
+        """
+        return float(self.evaluate(self._row(stats), np.array([bool(victoria)]))[0])
+
+    def achieved(self, stats: Dict) -> Dict[str, bool]:
+        """
+        Bonus conseguidos por una línea de estadísticas {nombre: bool}
+        Misma condición que evaluate(): coincide con los puntos otorgados
+        """
+        columns = self._row(stats)
+        return {
+            name: bool(self._cumple(columns, stats_, umbral, minimo)[0])
+            for name, (stats_, umbral, minimo, _) in zip(self.bonus_names, self.bonus)
+        }
@@ -0,0 +1,80 @@
+"""
+Crea las reservas de username y email de los usuarios existentes
+
+Los usuarios registrados antes de las colecciones usernames / userEmails no
+tienen reserva, y buscarlos por username o email cae en la query antigua.
+Este script crea las reservas que faltan (solo si no existen, así que no pisa
+un registro simultáneo). Si dos usuarios antiguos comparten username o email,
+no se reserva ninguno y se listan para resolverlo a mano.
+Se puede repetir. Después se puede arrancar con USER_INDEX_FALLBACK=0.
+
+Uso:
+    python backend/scripts/backfill_user_index.py [--dry-run]
+"""
+
+import argparse
+import asyncio
+import pathlib
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import firebase_service as fb  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Crea las reservas de username y email que faltan")
+    parser.add_argument("--dry-run", action="store_true", help="Solo cuenta lo que se crearía")
+    args = parser.parse_args()
+
+    users = await fb.run_store(fb.store.query, fb.USERS_COLLECTION)
+    reserved = set()
+    for collection in (fb.USERNAMES_COLLECTION, fb.USER_EMAILS_COLLECTION):
+        for key, _ in await fb.run_store(fb.store.query, collection):
+            reserved.add((collection, key))
+
+    # {(colección, clave): [escrituras de cada usuario que la reclama]}
+    claims = defaultdict(list)
+    for user_id, user in users:
+        for write in fb._user_index_writes(user_id, user):
+            claims[(write[1], write[2])].append(write)
+
+    writes = []
+    duplicates = []
+    for key, claimed in claims.items():
+        if key in reserved:
+            continue
+        if len(claimed) > 1:
+            duplicates.append((key, [write[3]["uid"] for write in claimed]))
+            continue
+        writes.append(claimed[0])
+
+    print(f"👤 {len(users)} usuarios, {len(reserved)} reservas existentes, {len(writes)} por crear")
+    for (collection, key), uids in duplicates:
+        print(f"   ⚠️  {collection}/{key} reclamado por {len(uids)} usuarios: {', '.join(uids)}")
+
+    created = 0
+    conflicts = 0
+    if not args.dry_run:
+        for start in range(0, len(writes), fb.WRITE_BATCH_SIZE):
+            chunk = writes[start:start + fb.WRITE_BATCH_SIZE]
+            try:
+                await fb.run_store(fb.store.batch_write, chunk)
+                created += len(chunk)
+            except fb.DocumentAlreadyExists:
+                # Alguien reservó una clave entre la lectura y el lote: una a una
+                for _, collection, key, data in chunk:
+                    try:
+                        await fb.run_store(fb.store.create, collection, key, data)
+                        created += 1
+                    except fb.DocumentAlreadyExists:
+                        conflicts += 1
+        print(f"   ✅ {created} reservas creadas ({conflicts} ya existían)")
+
+    fb.shutdown_executor()
+    sys.exit(1 if duplicates else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
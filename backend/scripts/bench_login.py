@@ -0,0 +1,93 @@
+"""
+Latencia de /api/auth/login con latencia de red simulada en el backend
+
+Envuelve el backend de almacenamiento en memoria con un retardo fijo por
+llamada (el tiempo de ida y vuelta a Firestore / Firebase Auth) y cuenta las
+llamadas que cada login hace antes de responder. Llama al endpoint
+directamente, sin servidor HTTP, para medir solo el camino del login.
+
+Uso:
+    python backend/scripts/bench_login.py --users 200 --logins 500 --latency-ms 25
+"""
+
+import argparse
+import asyncio
+import os
+import pathlib
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+
+class LatencyStore:
+    """
+    Proxy del backend: cada llamada espera `latency` segundos y se cuenta
+    """
+
+    blocking = True
+
+    def __init__(self, inner, latency: float):
+        self._inner = inner
+        self._latency = latency
+        self.name = f"{inner.name}+{latency * 1000:.0f}ms"
+        self.calls = 0
+
+    def __getattr__(self, attr):
+        value = getattr(self._inner, attr)
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            self.calls += 1
+            time.sleep(self._latency)
+            return value(*args, **kwargs)
+        return call
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark del login")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=25.0, help="Retardo por llamada al backend")
+    args = parser.parse_args()
+
+    os.environ["STORAGE_BACKEND"] = "memory"
+    import firebase_service as fb
+    import main_firebase as api
+
+    usernames = []
+    for i in range(args.users):
+        user = await fb.create_user(f"bench{i}", "secret123", f"bench{i}@example.com")
+        usernames.append(user["username"])
+
+    proxy = LatencyStore(fb.store, args.latency_ms / 1000)
+    fb.store = proxy
+
+    latencies = []
+    path_calls = []
+    calls_before = proxy.calls
+    for i in range(args.logins):
+        request = api.LoginRequest(username=usernames[i % len(usernames)], password="secret123")
+        start = time.perf_counter()
+        calls = proxy.calls
+        await api.login(request)
+        latencies.append((time.perf_counter() - start) * 1000)
+        path_calls.append(proxy.calls - calls)
+        # Envía las escrituras diferidas antes del siguiente login para no mezclar la cuenta
+        await fb.deferred_writes.flush()
+
+    await fb.stop_background_tasks()
+    latencies.sort()
+    print(f"🔐 {args.logins} logins, {args.latency_ms:.0f} ms por llamada al backend")
+    print(f"   llamadas antes de responder: {statistics.mean(path_calls):.1f} "
+          f"(total con segundo plano: {(proxy.calls - calls_before) / args.logins:.1f} por login)")
+    print(f"   p50 {statistics.median(latencies):.1f} ms · "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} ms · "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.1f} ms")
+    fb.shutdown_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+Coste de las clasificaciones de usuarios por el camino real: lecturas y bytes
+que cada operación pide al backend de almacenamiento
+
+- Reconstrucción (arranque sin snapshot): rebuild_leaderboards, con
+  proyección, frente a los documentos de usuario completos que leía antes
+- Páginas de /api/rankings: get_leaderboard sale de la clasificación en
+  memoria; se cuentan las lecturas al backend y el tiempo por página, con
+  offset frente a cursor (start_after) en un recorrido en profundidad
+- Puntuar jornada: el recorrido de usuarios de score_jornada, con y sin proyección
+
+Genera usuarios con colecciones grandes (cardIds, redeemedCodes...) en el
+backend en memoria y mide lo que devuelve cada lectura serializado como JSON
+(lo que viajaría desde Firestore).
+
+Uso:
+    python backend/scripts/bench_rankings.py --users 5000 --cards 300 --pages 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import random
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+
+def _size(docs) -> int:
+    return len(json.dumps(docs, default=str, separators=(",", ":")).encode("utf-8"))
+
+
+class ByteCountingStore:
+    """
+    Proxy del backend: cuenta documentos y bytes devueltos por get() y query()
+    """
+
+    def __init__(self, inner):
+        self._inner = inner
+        self.docs = 0
+        self.bytes = 0
+
+    def __getattr__(self, attr):
+        return getattr(self._inner, attr)
+
+    def get(self, *args, **kwargs):
+        doc = self._inner.get(*args, **kwargs)
+        if doc is not None:
+            self.docs += 1
+            self.bytes += _size(doc)
+        return doc
+
+    def query(self, *args, **kwargs):
+        docs = self._inner.query(*args, **kwargs)
+        self.docs += len(docs)
+        self.bytes += _size(docs)
+        return docs
+
+    async def measure(self, coro_fn, *args, **kwargs):
+        docs, size = self.docs, self.bytes
+        await coro_fn(*args, **kwargs)
+        return self.docs - docs, self.bytes - size
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark de lecturas por operación de clasificación")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--cards", type=int, default=300, help="Cartas por usuario")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=50, help="Páginas recorridas en profundidad")
+    args = parser.parse_args()
+
+    os.environ["STORAGE_BACKEND"] = "memory"
+    import firebase_service as fb
+
+    random.seed(7)
+    writes = []
+    for i in range(args.users):
+        writes.append(("set", fb.USERS_COLLECTION, f"bench_{i:06d}", {
+            "username": f"fan{i:06d}",
+            "email": f"fan{i:06d}@example.com",
+            "cardIds": [f"card_{random.randint(1, 400):03d}" for _ in range(args.cards)],
+            "unopenedPacks": [{"id": f"pack_{j}", "type": "standard"} for j in range(5)],
+            "redeemedCodes": [f"CODE{j:04d}" for j in range(20)],
+            "lineupIds": {"base": {"id": "card_001", "playerId": "p1", "multiplicador": 1.5}},
+            "jornadaPoints": {str(j): random.randint(0, 60) for j in range(1, 11)},
+            "points": random.randint(0, 5000)
+        }))
+    fb.store.batch_write(writes)
+
+    store = fb.store = ByteCountingStore(fb.store)
+    users = fb.USERS_COLLECTION
+    size = args.page_size
+
+    print(f"🏆 {args.users} usuarios con {args.cards} cartas, páginas de {size}")
+
+    # Reconstrucción: lo que lee rebuild_leaderboards frente a los documentos completos
+    full = await store.measure(fb.run_store, store.query, users)
+    rebuilt = await store.measure(fb.rebuild_leaderboards)
+    print(f"   reconstrucción: documentos completos {full[1] / 1e6:.1f} MB · "
+          f"rebuild_leaderboards {rebuilt[0]:,} docs / {rebuilt[1] / 1e6:.2f} MB")
+
+    # Páginas de /api/rankings: sin lecturas de usuarios; offset frente a cursor
+    fb._leaderboard_checked_at = time.monotonic()
+    for label, use_cursor in (("offset", False), ("cursor", True)):
+        docs, size_bytes = store.docs, store.bytes
+        cursor = None
+        start = time.perf_counter()
+        for page in range(args.pages):
+            if use_cursor:
+                result = await fb.get_leaderboard("season", limit=size, start_after=cursor)
+                cursor = result["nextCursor"]
+            else:
+                result = await fb.get_leaderboard("season", offset=page * size, limit=size)
+        elapsed_us = (time.perf_counter() - start) * 1e6 / args.pages
+        print(f"   {args.pages} páginas con {label}: {store.docs - docs} docs / "
+              f"{store.bytes - size_bytes:,} B leídos del backend · {elapsed_us:.0f} µs por página")
+
+    # Puntuar jornada: recorrido completo de usuarios
+    full = await store.measure(fb.run_store, store.query, users)
+    projected = await store.measure(fb.run_store, store.query, users, fields=fb.SCORING_FIELDS)
+    print(f"   puntuar jornada: documentos completos {full[1] / 1e6:.1f} MB · "
+          f"proyección {projected[1] / 1e6:.2f} MB")
+
+    fb.shutdown_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
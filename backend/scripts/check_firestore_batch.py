@@ -0,0 +1,113 @@
+"""
+Comprueba FirestoreStore.batch_write contra un cliente de Firestore falso
+
+Los backends memory y sqlite sustituyen batch_write, así que las pruebas
+locales nunca pasan por el camino de Firestore. Este script lo ejecuta sin
+credenciales ni red: el cliente falso registra cada WriteBatch y sus commits.
+Verifica el troceado en lotes de BATCH_LIMIT, la traducción de cada op y de
+las transformaciones de campo, y el mapeo de errores NotFound / Conflict.
+
+Uso:
+    python backend/scripts/check_firestore_batch.py
+"""
+
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from firebase_admin import firestore  # noqa: E402
+from google.api_core import exceptions as google_exceptions  # noqa: E402
+
+from storage import DELETE_FIELD, DocumentAlreadyExists, DocumentNotFound, Increment  # noqa: E402
+from storage.firestore_backend import BATCH_LIMIT, FirestoreStore  # noqa: E402
+
+
+class FakeBatch:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def set(self, ref, data):
+        self.ops.append(("set", ref, data))
+
+    def create(self, ref, data):
+        self.ops.append(("create", ref, data))
+
+    def update(self, ref, data):
+        self.ops.append(("update", ref, data))
+
+    def delete(self, ref):
+        self.ops.append(("delete", ref, None))
+
+    def commit(self):
+        if self.client.fail_with is not None:
+            raise self.client.fail_with("commit rechazado")
+        self.client.commits.append(self.ops)
+
+
+class FakeCollection:
+    def __init__(self, name):
+        self.name = name
+
+    def document(self, doc_id):
+        return f"{self.name}/{doc_id}"
+
+
+class FakeClient:
+    def __init__(self, fail_with=None):
+        self.fail_with = fail_with
+        self.commits = []
+
+    def collection(self, name):
+        return FakeCollection(name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+def _store(client) -> FirestoreStore:
+    # Sin __init__: no inicializa Firebase Admin ni carga credenciales
+    store = FirestoreStore.__new__(FirestoreStore)
+    store.db = client
+    return store
+
+
+def main():
+    checks = []
+
+    def check(name, ok):
+        checks.append(ok)
+        print(f"   {'✅' if ok else '❌'} {name}")
+
+    client = FakeClient()
+    ops = ("set", "create", "update", "delete")
+    writes = [(ops[i % 4], "users", f"u{i}", {"n": i}) for i in range(2 * BATCH_LIMIT + 34)]
+    _store(client).batch_write(writes)
+    check("un commit por cada BATCH_LIMIT escrituras",
+          [len(ops_) for ops_ in client.commits] == [BATCH_LIMIT, BATCH_LIMIT, 34])
+    flat = [op for commit in client.commits for op in commit]
+    check("op y referencia de cada escritura en orden",
+          [(op, ref) for op, ref, _ in flat] == [(op, f"users/{doc_id}") for op, _, doc_id, _ in writes])
+
+    client = FakeClient()
+    _store(client).batch_write([("update", "users", "u1", {"a": DELETE_FIELD, "b": Increment(2)})])
+    data = client.commits[0][0][2]
+    check("DELETE_FIELD e Increment traducidos a Firestore",
+          data["a"] is firestore.DELETE_FIELD and isinstance(data["b"], firestore.Increment))
+
+    for error, expected in ((google_exceptions.NotFound, DocumentNotFound),
+                            (google_exceptions.Conflict, DocumentAlreadyExists)):
+        try:
+            _store(FakeClient(fail_with=error)).batch_write([("create", "users", "u1", {})])
+            raised = None
+        except Exception as e:
+            raised = type(e)
+        check(f"{error.__name__} -> {expected.__name__}", raised is expected)
+
+    print(f"🔥 FirestoreStore.batch_write: {sum(checks)}/{len(checks)} comprobaciones correctas")
+    sys.exit(0 if all(checks) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Aperturas de sobres simultáneas de un mismo usuario: sin cartas perdidas ni
+sobres quitados dos veces
+
+Lanza N llamadas a open_unopened_pack a la vez (índice 0) contra un usuario
+con 2N sobres, en los backends memory y sqlite, y comprueba:
+- todas las aperturas terminan con un sobre
+- cardCounts final = inventario inicial + las cartas de todos los sobres abiertos
+- quedan exactamente los N últimos sobres: cada uno de los N primeros se quitó
+  una sola vez y ninguno de los demás
+- cada sobre tiene su semilla en packOpenings y la semilla reproduce sus cartas
+Informa de la latencia p50/p95 de cada apertura frente a PACK_OPEN_BUDGET_MS.
+
+Uso:
+    python backend/scripts/check_pack_concurrency.py --opens 200 --backends memory,sqlite
+"""
+
+import argparse
+import asyncio
+import os
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+# El import de firebase_service crea un backend: que no sea Firestore
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+import firebase_service as fb  # noqa: E402
+import storage  # noqa: E402
+
+INITIAL_COUNTS = {"card_001": 2, "card_002": 1}
+
+
+async def run_backend(backend: str, opens: int, check) -> None:
+    fb.store = storage.create_store(backend)
+    user_id = f"concurrency_{backend}"
+    packs = [{"type": ("standard", "legendary", "welcome")[i % 3], "timestamp": f"pack-{i:05d}"}
+             for i in range(2 * opens)]
+    fb.store.set(fb.USERS_COLLECTION, user_id, {
+        "username": user_id,
+        "cardCounts": dict(INITIAL_COUNTS),
+        "recentCardIds": [],
+        "unopenedPacks": packs
+    })
+
+    latencies = []
+
+    async def open_one():
+        start = time.perf_counter()
+        result = await fb.open_unopened_pack(user_id, 0, fb.pack_engine.open)
+        latencies.append((time.perf_counter() - start) * 1000)
+        return result
+
+    results = await asyncio.gather(*(open_one() for _ in range(opens)))
+    user = fb.store.get(fb.USERS_COLLECTION, user_id)
+
+    opened = [result for result in results if result is not None]
+    expected = Counter(INITIAL_COUNTS)
+    for result in opened:
+        expected.update(result["newCardIds"])
+    remaining = [pack["timestamp"] for pack in user["unopenedPacks"]]
+
+    print(f"🎁 {backend}: {opens} aperturas simultáneas")
+    check("todas las aperturas abren un sobre", len(opened) == opens)
+    check("cardCounts = inicial + cartas de los sobres abiertos", Counter(user["cardCounts"]) == expected)
+    check("cada sobre abierto se quitó una sola vez",
+          remaining == [pack["timestamp"] for pack in packs[opens:]])
+    check("tipos abiertos = tipos de los sobres quitados",
+          Counter(result["packType"] for result in opened) == Counter(pack["type"] for pack in packs[:opens]))
+    audited = [pack for _, opening in fb.store.query(fb.PACK_OPENINGS_COLLECTION, [("userId", "==", user_id)])
+               for pack in opening["packs"]]
+    check("una semilla guardada por sobre y cada una reproduce sus cartas",
+          len(audited) == len(opened)
+          and all(fb.pack_engine.open(pack["packType"], pack["seed"]) == pack["cardIds"] for pack in audited))
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    within = "✅" if p95 <= fb.PACK_OPEN_BUDGET_MS else "⚠️ "
+    print(f"   {within} p50 {p50:.1f} ms · p95 {p95:.1f} ms (presupuesto {fb.PACK_OPEN_BUDGET_MS:.0f} ms)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Aperturas de sobres simultáneas de un usuario")
+    parser.add_argument("--opens", type=int, default=200, help="Aperturas simultáneas")
+    parser.add_argument("--backends", default="memory,sqlite")
+    args = parser.parse_args()
+
+    checks = []
+
+    def check(name, ok):
+        checks.append(ok)
+        print(f"   {'✅' if ok else '❌'} {name}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SQLITE_PATH"] = str(pathlib.Path(tmp) / "packs.db")
+        for backend in args.backends.split(","):
+            await run_backend(backend.strip(), args.opens, check)
+            fb.store.close()
+
+    fb.shutdown_executor()
+    print(f"🎁 {sum(checks)}/{len(checks)} comprobaciones correctas")
+    sys.exit(0 if all(checks) else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
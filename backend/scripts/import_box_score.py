@@ -0,0 +1,64 @@
+"""
+Importa el box score de una jornada completa (CSV o JSON) en el backend configurado
+
+CSV: una fila por jugador con playerId y las estadísticas en columnas
+(puntos, rebotes, tiros2Anotados...). Los datos del partido pueden ir en
+columnas o pasarse como opciones para todas las filas:
+    python backend/scripts/import_box_score.py jornada12.csv \\
+        --jornada 12 --fecha 2025-12-14 --rival "CB Rival" --victoria
+
+JSON: lista de filas con forma de JornadaStatsRequest más playerId, o un objeto
+{"jornada": 12, "fecha": ..., "rival": ..., "players": [{"playerId": ..., "stats": {...}}]}
+
+Las filas inválidas se listan al final; las válidas se guardan igualmente.
+"""
+
+import argparse
+import asyncio
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import box_score  # noqa: E402
+import firebase_service as fb  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Importa el box score de una jornada")
+    parser.add_argument("path", help="Archivo .csv o .json")
+    parser.add_argument("--format", choices=["csv", "json"], default=None, help="Por defecto, según la extensión")
+    parser.add_argument("--jornada", type=int, default=None)
+    parser.add_argument("--fecha", default=None)
+    parser.add_argument("--rival", default=None)
+    parser.add_argument("--resultado", default=None)
+    parser.add_argument("--victoria", action="store_true", default=None)
+    parser.add_argument("--visitante", action="store_true", help="Partido fuera de casa (local = false)")
+    args = parser.parse_args()
+
+    path = pathlib.Path(args.path)
+    fmt = args.format or path.suffix.lstrip(".").lower()
+    defaults = {
+        "jornada": args.jornada,
+        "fecha": args.fecha,
+        "rival": args.rival,
+        "resultado": args.resultado,
+        "victoria": args.victoria,
+        "local": False if args.visitante else None
+    }
+    defaults = {k: v for k, v in defaults.items() if v is not None}
+
+    rows = box_score.parse_rows(path.read_text(encoding="utf-8-sig"), fmt, defaults)
+    result = await fb.import_box_score(rows)
+
+    print(f"📊 {result['imported']}/{result['rows']} filas importadas "
+          f"({result['players']} jugadores) en {result['seconds']}s")
+    for error in result["errors"]:
+        print(f"   ❌ fila {error['row']} ({error['playerId']}): {error['error']}")
+
+    fb.shutdown_executor()
+    sys.exit(1 if result["errors"] else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
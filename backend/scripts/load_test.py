@@ -0,0 +1,112 @@
+"""
+Prueba de carga de la API - latencias p50/p95/p99 por nivel de concurrencia
+
+Lanza N peticiones simultáneas contra un servidor en marcha y repite con
+niveles crecientes de concurrencia. Con las llamadas a Firestore fuera del
+event loop, el p99 debe mantenerse estable aunque aumenten las peticiones
+en vuelo.
+
+Uso:
+    python backend/scripts/load_test.py --url http://localhost:8000 \\
+        --path /api/user/me --token <TOKEN> --concurrency 1,8,32,64
+"""
+
+import argparse
+import base64
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+
+def do_request(url: str, token: Optional[str], method: str, body: Optional[bytes]) -> Tuple[float, int, int]:
+    """
+    Ejecuta una petición y devuelve (latencia en ms, status, bytes recibidos)
+    """
+    request = urllib.request.Request(url, data=body, method=method)
+    request.add_header("Content-Type", "application/json")
+    if token:
+        # get_current_user lee el token del password de HTTP Basic
+        credentials = base64.b64encode(f"token:{token}".encode()).decode()
+        request.add_header("Authorization", f"Basic {credentials}")
+
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            payload = response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        payload = e.read()
+        status = e.code
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    return elapsed_ms, status, len(payload)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Percentil por rango más cercano
+    """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_level(url: str, token: Optional[str], method: str, body: Optional[bytes],
+              concurrency: int, requests_per_level: int) -> dict:
+    """
+    Lanza `requests_per_level` peticiones con `concurrency` en vuelo
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(
+            lambda _: do_request(url, token, method, body),
+            range(requests_per_level)
+        ))
+        wall = time.perf_counter() - start
+
+    latencies = [r[0] for r in results]
+    errors = sum(1 for r in results if r[1] >= 400)
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "errors": errors,
+        "rps": len(results) / wall if wall > 0 else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "mean": statistics.mean(latencies),
+        "bytes": statistics.mean(r[2] for r in results)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de Fantasy Basket")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/user/me")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--body", default=None, help="Cuerpo JSON de la petición")
+    parser.add_argument("--token", default=None, help="Token de sesión para endpoints autenticados")
+    parser.add_argument("--concurrency", default="1,8,32,64")
+    parser.add_argument("--requests", type=int, default=500, help="Peticiones por nivel")
+    args = parser.parse_args()
+
+    url = args.url.rstrip("/") + args.path
+    body = args.body.encode() if args.body else None
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    print(f"🏀 Prueba de carga: {args.method} {url}")
+    print(f"{'en vuelo':>9} {'req':>6} {'err':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'bytes':>8}")
+    for level in levels:
+        r = run_level(url, args.token, args.method, body, level, args.requests)
+        print(
+            f"{r['concurrency']:>9} {r['requests']:>6} {r['errors']:>5} {r['rps']:>9.1f} "
+            f"{r['p50']:>9.1f} {r['p95']:>9.1f} {r['p99']:>9.1f} {r['bytes']:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
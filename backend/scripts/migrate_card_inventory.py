@@ -0,0 +1,76 @@
+"""
+Pasa el inventario de los usuarios antiguos de cardIds a cardCounts
+
+cardIds guarda un ID por copia de cada carta; cardCounts guarda
+{cardId: copias}. Cada usuario se migra en su propia transacción (lee el
+documento y escribe cardCounts quitando cardIds), así que una apertura de
+sobres simultánea no pierde cartas. Se puede repetir: los usuarios ya
+migrados se saltan. La API sigue respondiendo cardIds expandido.
+
+Uso:
+    python backend/scripts/migrate_card_inventory.py [--dry-run] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import json
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import firebase_service as fb  # noqa: E402
+from card_inventory import card_counts, migration_update  # noqa: E402
+
+
+def _migrate(transaction, user_id: str):
+    user = transaction.get(fb.USERS_COLLECTION, user_id)
+    changes = migration_update(user) if user else None
+    if changes:
+        transaction.update(fb.USERS_COLLECTION, user_id, changes)
+    return changes
+
+
+async def _migrate_user(user_id: str) -> bool:
+    changes = await fb.run_store(fb.store.run_transaction, lambda transaction: _migrate(transaction, user_id))
+    if changes:
+        fb.user_cache.apply(user_id, changes)
+    return bool(changes)
+
+
+def _size(value) -> int:
+    return len(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Migra cardIds a cardCounts")
+    parser.add_argument("--dry-run", action="store_true", help="Solo cuenta lo que se migraría")
+    parser.add_argument("--concurrency", type=int, default=32, help="Transacciones simultáneas")
+    args = parser.parse_args()
+
+    users = await fb.run_store(fb.store.query, fb.USERS_COLLECTION, fields=("cardIds", "cardCounts"))
+    legacy = [(user_id, user) for user_id, user in users if "cardIds" in user]
+    before = sum(_size(user["cardIds"]) for _, user in legacy)
+    after = sum(_size(card_counts(user)) for _, user in legacy)
+    print(f"🎴 {len(users)} usuarios, {len(legacy)} por migrar "
+          f"(inventario {before / 1024:.1f} KB -> {after / 1024:.1f} KB)")
+
+    migrated = failed = 0
+    if not args.dry_run:
+        for start in range(0, len(legacy), args.concurrency):
+            chunk = [user_id for user_id, _ in legacy[start:start + args.concurrency]]
+            results = await asyncio.gather(*(_migrate_user(user_id) for user_id in chunk), return_exceptions=True)
+            for user_id, result in zip(chunk, results):
+                if isinstance(result, Exception):
+                    failed += 1
+                    print(f"   ❌ {user_id}: {result}")
+                elif result:
+                    migrated += 1
+        print(f"   ✅ {migrated} usuarios migrados")
+
+    fb.shutdown_executor()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
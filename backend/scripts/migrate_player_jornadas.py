@@ -0,0 +1,53 @@
+"""
+Migra las jornadas embebidas en los documentos de jugador a playerJornadas
+
+Los jugadores antiguos guardan todo su histórico en el array jornadasStats
+del propio documento. Este script crea un documento por jornada
+("{playerId}#{n}") y quita el array del jugador; las escrituras de cada
+jugador van en el mismo lote, así que un jugador nunca queda a medias.
+Se puede repetir: los jugadores ya migrados se saltan.
+
+Uso:
+    python backend/scripts/migrate_player_jornadas.py [--dry-run]
+"""
+
+import argparse
+import asyncio
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import firebase_service as fb  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Migra jornadasStats a la colección playerJornadas")
+    parser.add_argument("--dry-run", action="store_true", help="Solo cuenta lo que se migraría")
+    args = parser.parse_args()
+
+    players = await fb.run_store(fb.store.query, fb.PLAYERS_COLLECTION)
+    player_writes = {
+        player_id: writes
+        for player_id, player in players
+        if (writes := fb._migration_writes(player_id, player))
+    }
+    jornadas = sum(len(writes) - 1 for writes in player_writes.values())
+    print(f"📦 {len(players)} jugadores, {len(player_writes)} por migrar ({jornadas} jornadas)")
+
+    failed = 0
+    if not args.dry_run:
+        for player_ids, chunk in fb._chunk_player_writes(player_writes):
+            try:
+                await fb.run_store(fb.store.batch_write, chunk)
+                print(f"   ✅ {len(player_ids)} jugadores migrados")
+            except Exception as e:
+                failed += len(player_ids)
+                print(f"   ❌ Lote de {len(player_ids)} jugadores: {e}")
+
+    fb.shutdown_executor()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+"""
+Recalcula los puntos fantasy de toda la temporada con las reglas actuales
+
+Tras cambiar scoring_rules.json (o apuntar SCORING_RULES_PATH a otro archivo)
+las jornadas ya guardadas conservan sus puntos antiguos. Este script los
+recalcula todos en una pasada, actualiza el resumen de los jugadores afectados
+y vuelve a puntuar para los usuarios las jornadas que ya estaban puntuadas.
+Reinicia los workers después para que las jornadas nuevas usen las mismas reglas.
+
+Uso:
+    python backend/scripts/rescore_season.py [--rules reglas.json] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import os
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Recalcula los puntos fantasy de todas las jornadas")
+    parser.add_argument("--rules", default=None, help="Archivo de reglas (por defecto SCORING_RULES_PATH o scoring_rules.json)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo cuenta las líneas que cambiarían")
+    args = parser.parse_args()
+
+    if args.rules:
+        os.environ["SCORING_RULES_PATH"] = args.rules
+    import firebase_service as fb
+
+    result = await fb.rescore_season(dry_run=args.dry_run)
+
+    print(f"📊 {result['changed']}/{result['lines']} líneas {'cambiarían' if args.dry_run else 'actualizadas'} "
+          f"({result['players']} jugadores, jornadas {result['jornadas']}) en {result['seconds']}s")
+    if result["rescoredJornadas"]:
+        print(f"🏀 Jornadas repuntuadas para los usuarios: {result['rescoredJornadas']}")
+    for error in result["errors"]:
+        print(f"   ❌ Lote de {len(error['playerIds'])} jugadores: {error['error']}")
+
+    fb.shutdown_executor()
+    sys.exit(1 if result["errors"] else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Genera datos sintéticos en el backend de almacenamiento configurado
+
+Pensado para probar la API en local con volúmenes realistas:
+    STORAGE_BACKEND=sqlite SQLITE_PATH=/tmp/fantasy.db \\
+        python backend/scripts/seed_store.py --users 20000 --players 15 --jornadas 30
+"""
+
+import argparse
+import asyncio
+import pathlib
+import random
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import firebase_service as fb  # noqa: E402
+
+LINEUP_POSITIONS = ["base", "escolta", "alero", "alaPivot", "pivot"]
+ALL_CARD_IDS = sorted({card_id for pool in fb.CARD_ID_POOLS.values() for card_id in pool})
+
+
+def random_stats() -> dict:
+    """Línea estadística aleatoria pero coherente (anotados <= intentados)"""
+    t2i, t3i, tli = random.randint(0, 14), random.randint(0, 9), random.randint(0, 8)
+    t2a, t3a, tla = random.randint(0, t2i), random.randint(0, t3i), random.randint(0, tli)
+    ro, rd = random.randint(0, 5), random.randint(0, 9)
+    return {
+        "minutosJugados": random.randint(5, 40),
+        "puntos": t2a * 2 + t3a * 3 + tla,
+        "asistencias": random.randint(0, 10),
+        "rebotes": ro + rd,
+        "rebotesOfensivos": ro,
+        "rebotesDefensivos": rd,
+        "robos": random.randint(0, 5),
+        "tapones": random.randint(0, 4),
+        "perdidas": random.randint(0, 6),
+        "faltas": random.randint(0, 5),
+        "tiros2Anotados": t2a,
+        "tiros2Intentados": t2i,
+        "tiros3Anotados": t3a,
+        "tiros3Intentados": t3i,
+        "tirosLibresAnotados": tla,
+        "tirosLibresIntentados": tli
+    }
+
+
+async def seed_players(count: int, jornadas: int) -> list:
+    """Crea jugadores y les añade jornadas por el camino normal de la API"""
+    positions = list(fb.CARDS_BY_POSITION.keys())
+    player_ids = []
+    for i in range(count):
+        player_id = await fb.create_player({
+            "nombre": f"Jugador {i + 1}",
+            "numero": i + 1,
+            "posicion": positions[i % len(positions)],
+            "cardIds": [ALL_CARD_IDS[i % len(ALL_CARD_IDS)]]
+        })
+        for j in range(1, jornadas + 1):
+            victoria = random.random() < 0.5
+            await fb.add_jornada_stats(player_id, {
+                "jornada": j,
+                "fecha": f"2025-{(j // 4) % 12 + 1:02d}-{(j * 7) % 28 + 1:02d}",
+                "rival": f"Rival {j}",
+                "local": j % 2 == 0,
+                "resultado": "",
+                "victoria": victoria,
+                "stats": random_stats()
+            })
+        player_ids.append(player_id)
+    return player_ids
+
+
+async def seed_users(count: int, player_ids: list, cards_per_user: int):
+    """Crea usuarios con colección, alineación y puntos aleatorios"""
+    for i in range(count):
+        card_ids = random.choices(ALL_CARD_IDS, k=cards_per_user)
+        lineup = {}
+        for position in LINEUP_POSITIONS:
+            lineup[position] = {
+                "id": random.choice(card_ids),
+                "playerId": random.choice(player_ids) if player_ids else None,
+                "multiplicador": random.choice([1.0, 1.5, 2.0, 3.0])
+            }
+        user_id = f"seed_user_{i:06d}"
+        user = {
+            "username": f"fan{i:06d}",
+            "email": f"fan{i:06d}@example.com",
+            "password": "seed123",
+            **fb.card_inventory.inventory_fields(card_ids),
+            "lineupIds": lineup,
+            "unopenedPacks": [],
+            "points": random.randint(0, 5000),
+            "rank": 0,
+            "redeemedCodes": [],
+            "createdAt": fb.SERVER_TIMESTAMP,
+            "lastLogin": fb.SERVER_TIMESTAMP
+        }
+        await fb.run_store(
+            fb.store.batch_write,
+            [("set", fb.USERS_COLLECTION, user_id, user)] + fb._user_index_writes(user_id, user, "set")
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos para pruebas de carga")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=11)
+    parser.add_argument("--jornadas", type=int, default=20)
+    parser.add_argument("--cards-per-user", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    print(f"🌱 Generando datos en backend '{fb.store.name}'...")
+    start = time.perf_counter()
+    player_ids = await seed_players(args.players, args.jornadas)
+    print(f"✅ {len(player_ids)} jugadores con {args.jornadas} jornadas")
+    await seed_users(args.users, player_ids, args.cards_per_user)
+    print(f"✅ {args.users} usuarios")
+    print(f"⏱️  {time.perf_counter() - start:.1f}s")
+    fb.shutdown_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,159 @@
+"""
+Simulación Monte Carlo de los sobres - probabilidades empíricas por carta y rareza
+
+Abre decenas de millones de sobres con el motor compilado (fb.pack_engine),
+repartidos en bloques entre todos los núcleos, y compara la frecuencia de cada
+carta y de cada pool con la probabilidad exacta de las definiciones, con
+intervalos de confianza de Wilson. También mide el rendimiento (sobres/s).
+
+Uso:
+    python backend/scripts/simulate_packs.py --packs 20000000 --types standard,legendary
+    python backend/scripts/simulate_packs.py --packs 5000000 --output bench.jsonl
+"""
+
+import argparse
+import json
+import math
+import os
+import pathlib
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+# La simulación no toca datos: el backend en memoria evita conectar con Firestore
+os.environ["STORAGE_BACKEND"] = "memory"
+
+import firebase_service as fb  # noqa: E402
+
+Z_SCORES = {0.90: 1.6449, 0.95: 1.9600, 0.99: 2.5758}
+
+
+def wilson_interval(successes: int, trials: int, z: float) -> Tuple[float, float]:
+    """
+    Intervalo de Wilson (se comporta bien con probabilidades pequeñas)
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def simulate_chunk(pack_type: str, n: int, seed: np.random.SeedSequence) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Abre `n` sobres y devuelve (conteo por carta, conteo por pool)
+    """
+    engine = fb.pack_engine
+    cards, pools = engine.open_batch(pack_type, n, rng=np.random.default_rng(seed), with_pools=True)
+    return (
+        np.bincount(cards.ravel(), minlength=len(engine.card_ids)),
+        np.bincount(pools.ravel(), minlength=len(engine.pool_names))
+    )
+
+
+def expected_per_draw(per_slot: List[dict]) -> dict:
+    """
+    Probabilidad exacta por carta sacada (media de los huecos del sobre)
+    """
+    result: dict = {}
+    for slot in per_slot:
+        for key, p in slot.items():
+            result[key] = result.get(key, 0.0) + p / len(per_slot)
+    return result
+
+
+def simulate_type(pool: ProcessPoolExecutor, pack_type: str, packs: int, chunk: int,
+                  seed: Optional[int]) -> dict:
+    engine = fb.pack_engine
+    sizes = [chunk] * (packs // chunk) + ([packs % chunk] if packs % chunk else [])
+    # Flujos independientes y reproducibles por bloque
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    start = time.perf_counter()
+    card_counts = np.zeros(len(engine.card_ids), dtype=np.int64)
+    pool_counts = np.zeros(len(engine.pool_names), dtype=np.int64)
+    for cards, pools in pool.map(simulate_chunk, [pack_type] * len(sizes), sizes, seeds):
+        card_counts += cards
+        pool_counts += pools
+    elapsed = time.perf_counter() - start
+
+    return {
+        "packType": pack_type,
+        "packs": packs,
+        "draws": int(card_counts.sum()),
+        "seconds": elapsed,
+        "packsPerSecond": packs / elapsed if elapsed > 0 else 0.0,
+        "cards": dict(zip(engine.card_ids, card_counts.tolist())),
+        "pools": dict(zip(engine.pool_names, pool_counts.tolist()))
+    }
+
+
+def print_table(title: str, counts: dict, expected: dict, draws: int, z: float) -> int:
+    """
+    Imprime la tabla y devuelve cuántas probabilidades exactas quedan fuera del intervalo
+    """
+    print(f"\n  {title:<12} {'esperada':>10} {'empírica':>10} {'IC inferior':>12} {'IC superior':>12}")
+    outside = 0
+    for key in sorted(set(counts) | set(expected)):
+        count = counts.get(key, 0)
+        exact = expected.get(key, 0.0)
+        if count == 0 and exact == 0.0:
+            continue
+        low, high = wilson_interval(count, draws, z)
+        flag = "" if low <= exact <= high else "  ⚠️"
+        outside += bool(flag)
+        print(f"  {key:<12} {exact:>10.5f} {count / draws:>10.5f} {low:>12.5f} {high:>12.5f}{flag}")
+    return outside
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación Monte Carlo de los sobres")
+    parser.add_argument("--packs", type=int, default=10_000_000, help="Sobres por tipo")
+    parser.add_argument("--types", default=",".join(fb.PACK_DEFINITIONS))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=int, default=1_000_000, help="Sobres por bloque de trabajo")
+    parser.add_argument("--confidence", type=float, default=0.99, choices=sorted(Z_SCORES))
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Añade el resultado como línea JSON (seguimiento del rendimiento)")
+    args = parser.parse_args()
+
+    z = Z_SCORES[args.confidence]
+    engine = fb.pack_engine
+    print(f"🎲 {args.packs:,} sobres por tipo · {args.workers} procesos · IC {args.confidence:.0%}")
+
+    outside = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for pack_type in args.types.split(","):
+            result = simulate_type(pool, pack_type, args.packs, args.chunk, args.seed)
+            print(f"\n📦 {pack_type}: {result['packsPerSecond']:,.0f} sobres/s "
+                  f"({result['seconds']:.2f}s, {result['draws']:,} cartas)")
+            outside += print_table("carta", result["cards"],
+                                   expected_per_draw(engine.slot_probabilities(pack_type)),
+                                   result["draws"], z)
+            outside += print_table("pool", result["pools"],
+                                   expected_per_draw(engine.pool_probabilities(pack_type)),
+                                   result["draws"], z)
+
+            if args.output:
+                record = {
+                    "date": datetime.now().isoformat(timespec="seconds"),
+                    "workers": args.workers,
+                    **{k: v for k, v in result.items() if k not in ("cards", "pools")}
+                }
+                with open(args.output, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    # Con muchas filas es normal que alguna caiga fuera por azar (1 - confianza)
+    print(f"\n{'✅' if outside == 0 else '⚠️'} Probabilidades fuera del intervalo: {outside}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Comprueba los agregados de temporada de los jugadores contra un recálculo completo
+
+add/update/delete_jornada_stats mantienen statsTemporada, promedios y
+mejorPartido con deltas (y recalculan la forma reciente); este script
+verifica que coinciden con fb.recalcular_temporada(jornadasStats) y
+fb.calcular_forma(jornadasStats). --fix también rellena la forma de los
+jugadores anteriores a ella.
+
+Uso:
+    # Revisar los datos del backend configurado (--fix corrige las diferencias)
+    python backend/scripts/verify_player_aggregates.py [--fix]
+
+    # Prueba aleatoria en memoria: secuencias de altas, ediciones y borrados
+    python backend/scripts/verify_player_aggregates.py --fuzz 2000 --seed 7
+"""
+
+import argparse
+import asyncio
+import os
+import pathlib
+import random
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+AGGREGATE_FIELDS = ("statsTemporada", "promedios", "mejorPartido", "forma")
+
+
+def recompute(player: dict, fb) -> dict:
+    jornadas = player.get("jornadasStats", [])
+    return {**fb.recalcular_temporada(jornadas), "forma": fb.calcular_forma(jornadas)}
+
+
+def differences(player: dict, fb) -> dict:
+    """
+    {campo: (guardado, recalculado)} de los agregados que no coinciden
+    """
+    expected = recompute(player, fb)
+    return {
+        field: (player.get(field), expected[field])
+        for field in AGGREGATE_FIELDS
+        if player.get(field) != expected[field]
+    }
+
+
+async def check_store(fix: bool):
+    import firebase_service as fb
+
+    players = await fb.get_all_players(active_only=False)
+    wrong = 0
+    for player in players:
+        diff = differences(player, fb)
+        if not diff:
+            continue
+        wrong += 1
+        print(f"❌ {player['playerId']} ({player.get('nombre')}): {', '.join(diff)}")
+        if fix:
+            expected = recompute(player, fb)
+            expected["valoracionesJornada"] = fb._indice_valoraciones(player.get("jornadasStats", []))
+            await fb.run_store(fb.store.update, fb.PLAYERS_COLLECTION, player["playerId"], expected)
+
+    print(f"{'✅' if wrong == 0 else '⚠️'} {len(players)} jugadores revisados, {wrong} con diferencias"
+          f"{' (corregidos)' if fix and wrong else ''}")
+    return wrong
+
+
+async def fuzz(operations: int, players_count: int):
+    import firebase_service as fb
+    from seed_store import random_stats
+
+    player_ids = [await fb.create_player({"nombre": f"Fuzz {i}", "posicion": "Base"})
+                  for i in range(players_count)]
+
+    for step in range(operations):
+        player_id = random.choice(player_ids)
+        player = await fb.get_player_by_id(player_id)
+        existing = [j["jornada"] for j in player.get("jornadasStats", [])]
+        action = random.choice(["add", "add", "update", "delete"]) if existing else "add"
+
+        if action == "add":
+            jornada = random.choice([n for n in range(1, 41) if n not in existing] or [41 + step])
+            await fb.add_jornada_stats(player_id, {
+                "jornada": jornada,
+                "fecha": f"2025-10-{jornada % 28 + 1:02d}",
+                "rival": "Fuzz",
+                "victoria": random.random() < 0.5,
+                "stats": random_stats()
+            })
+        elif action == "update":
+            stats = random_stats()
+            keys = random.sample(list(stats), random.randint(1, len(stats)))
+            await fb.update_jornada_stats(player_id, random.choice(existing), {k: stats[k] for k in keys})
+        else:
+            await fb.delete_jornada_stats(player_id, random.choice(existing))
+
+        diff = differences(await fb.get_player_by_id(player_id), fb)
+        if diff:
+            print(f"❌ Paso {step} ({action}) en {player_id}:")
+            for field, (stored, expected) in diff.items():
+                print(f"   {field}: guardado={stored} recalculado={expected}")
+            return 1
+
+    print(f"✅ {operations} operaciones aleatorias sin diferencias con el recálculo completo")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica los agregados de temporada de los jugadores")
+    parser.add_argument("--fix", action="store_true", help="Reescribe los agregados con el recálculo completo")
+    parser.add_argument("--fuzz", type=int, default=0, help="Operaciones aleatorias en un backend en memoria")
+    parser.add_argument("--players", type=int, default=5, help="Jugadores para --fuzz")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if args.fuzz:
+        # La prueba aleatoria nunca toca datos reales
+        os.environ["STORAGE_BACKEND"] = "memory"
+        sys.exit(asyncio.run(fuzz(args.fuzz, args.players)))
+    sys.exit(1 if asyncio.run(check_store(args.fix)) else 0)
+
+
+if __name__ == "__main__":
+    main()
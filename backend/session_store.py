@@ -0,0 +1,298 @@
+"""
+Sesiones de usuario
+
+SessionStore - almacén en memoria acotado (un solo proceso)
+- Tamaño máximo con expulsión LRU (la sesión usada hace más tiempo sale primero)
+- Heap de expiraciones recorrido por un barrido periódico en segundo plano
+- Índice por usuario: logout y "cerrar todas las sesiones" sin recorrer el dict
+
+SignedSessionTokens - tokens firmados con HMAC (sin estado, varios procesos)
+- El token lleva userId, expiración e identificador; cualquier worker con el
+  mismo secreto lo valida sin consultar nada
+- Lista compacta de revocaciones (por token y por usuario) que solo guarda
+  entradas hasta que el token revocado habría expirado de todos modos
+"""
+
+import asyncio
+import base64
+import hashlib
+import heapq
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class SessionStore:
+    """
+    Sesiones {token: {userId, expiresAt}} con límite de tamaño y TTL
+    """
+
+    def __init__(self, max_sessions: int = 100_000, ttl: timedelta = timedelta(days=7)):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()  # orden LRU
+        self._by_user: Dict[str, Set[str]] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []  # (expira en epoch, token)
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    # -------------------------------------------------------------------------
+    # Internos (con el lock tomado)
+    # -------------------------------------------------------------------------
+
+    def _remove(self, token: str) -> Optional[Dict]:
+        session = self._sessions.pop(token, None)
+        if session is None:
+            return None
+        tokens = self._by_user.get(session["userId"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[session["userId"]]
+        return session
+
+    def _compact_heap(self):
+        """
+        Las entradas del heap de sesiones ya borradas se descartan de forma
+        perezosa; si se acumulan demasiadas se reconstruye el heap
+        """
+        if len(self._expiry_heap) > 2 * len(self._sessions) + 1024:
+            self._expiry_heap = [
+                (session["expiresAt"].timestamp(), token)
+                for token, session in self._sessions.items()
+            ]
+            heapq.heapify(self._expiry_heap)
+
+    # -------------------------------------------------------------------------
+    # API
+    # -------------------------------------------------------------------------
+
+    def create(self, user_id: str, token: str) -> Dict:
+        expires_at = datetime.now() + self.ttl
+        session = {"userId": user_id, "expiresAt": expires_at}
+
+        with self._lock:
+            self._remove(token)
+            self._sessions[token] = session
+            self._by_user.setdefault(user_id, set()).add(token)
+            heapq.heappush(self._expiry_heap, (expires_at.timestamp(), token))
+
+            while len(self._sessions) > self.max_sessions:
+                oldest_token = next(iter(self._sessions))
+                self._remove(oldest_token)
+                self.evictions += 1
+
+            self._compact_heap()
+
+        return session
+
+    def get(self, token: str) -> Optional[Dict]:
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+
+            # Verificar si ha expirado
+            if datetime.now() > session["expiresAt"]:
+                self._remove(token)
+                self.expirations += 1
+                return None
+
+            self._sessions.move_to_end(token)
+            return session
+
+    def delete(self, token: str) -> bool:
+        with self._lock:
+            return self._remove(token) is not None
+
+    def revoke_user(self, user_id: str) -> int:
+        """
+        Cierra todas las sesiones de un usuario
+        """
+        with self._lock:
+            tokens = list(self._by_user.get(user_id, ()))
+            for token in tokens:
+                self._remove(token)
+            return len(tokens)
+
+    def sweep(self) -> int:
+        """
+        Elimina las sesiones expiradas en orden de expiración
+        Solo recorre las entradas vencidas del heap, no todo el almacén
+        """
+        now = time.time()
+        removed = 0
+
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_ts, token = heapq.heappop(self._expiry_heap)
+                session = self._sessions.get(token)
+                # Entrada obsoleta: sesión ya borrada o recreada con otra expiración
+                if session is None or session["expiresAt"].timestamp() != expires_ts:
+                    continue
+                self._remove(token)
+                self.expirations += 1
+                removed += 1
+
+        return removed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": len(self._sessions),
+                "users": len(self._by_user),
+                "maxSessions": self.max_sessions,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "heapEntries": len(self._expiry_heap)
+            }
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class SignedSessionTokens:
+    """
+    Tokens "<payload>.<firma>" con payload = base64url("userId|iat|exp|jti")
+    y firma = HMAC-SHA256(secreto, payload)
+    """
+
+    def __init__(self, secret: bytes, ttl: timedelta = timedelta(days=7)):
+        self._secret = secret
+        self.ttl = ttl
+        self._revoked_tokens: Dict[str, float] = {}  # {jti: exp}
+        self._user_not_before: Dict[str, Tuple[float, float]] = {}  # {userId: (notBefore, exp)}
+        self._pending: List[Dict] = []  # revocaciones locales aún no publicadas
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _sign(self, payload: str) -> str:
+        digest = hmac.new(self._secret, payload.encode("ascii"), hashlib.sha256).digest()
+        return _b64encode(digest)
+
+    def _decode(self, token: str) -> Optional[Tuple[str, float, float, str]]:
+        """
+        Devuelve (userId, iat, exp, jti) si la firma es válida
+        """
+        try:
+            payload, signature = token.split(".", 1)
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                return None
+            user_id, iat, exp, jti = _b64decode(payload).decode("utf-8").rsplit("|", 3)
+            return user_id, float(iat), float(exp), jti
+        except (ValueError, TypeError, UnicodeError):
+            # Token mal formado (sin separador, no ASCII, base64 inválido...)
+            return None
+
+    # -------------------------------------------------------------------------
+    # API
+    # -------------------------------------------------------------------------
+
+    def issue(self, user_id: str) -> str:
+        now = time.time()
+        exp = now + self.ttl.total_seconds()
+        payload = _b64encode(f"{user_id}|{now:.3f}|{exp:.0f}|{secrets.token_hex(8)}".encode("utf-8"))
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, token: str) -> Optional[Dict]:
+        decoded = self._decode(token)
+        if decoded is None:
+            self.rejected += 1
+            return None
+
+        user_id, iat, exp, jti = decoded
+        if time.time() > exp or jti in self._revoked_tokens:
+            return None
+        not_before = self._user_not_before.get(user_id)
+        if not_before is not None and iat <= not_before[0]:
+            return None
+
+        return {"userId": user_id, "expiresAt": datetime.fromtimestamp(exp)}
+
+    def revoke(self, token: str) -> bool:
+        decoded = self._decode(token)
+        if decoded is None:
+            return False
+        user_id, _, exp, jti = decoded
+        with self._lock:
+            self._revoked_tokens[jti] = exp
+            self._pending.append({"id": jti, "type": "token", "userId": user_id, "exp": exp})
+        return True
+
+    def revoke_user(self, user_id: str) -> None:
+        """
+        Invalida todos los tokens del usuario emitidos hasta ahora
+        """
+        now = time.time()
+        exp = now + self.ttl.total_seconds()
+        with self._lock:
+            self._user_not_before[user_id] = (now, exp)
+            self._pending.append({
+                "id": f"user:{user_id}", "type": "user", "userId": user_id,
+                "notBefore": now, "exp": exp
+            })
+
+    def merge_revocations(self, entries: Iterable[Dict]) -> None:
+        """
+        Incorpora revocaciones publicadas por otros workers
+        """
+        with self._lock:
+            for entry in entries:
+                if entry.get("type") == "user":
+                    current = self._user_not_before.get(entry["userId"])
+                    if current is None or entry["notBefore"] > current[0]:
+                        self._user_not_before[entry["userId"]] = (entry["notBefore"], entry["exp"])
+                else:
+                    self._revoked_tokens[entry["id"]] = entry["exp"]
+
+    def take_pending(self) -> List[Dict]:
+        with self._lock:
+            pending, self._pending = self._pending, []
+            return pending
+
+    def prune(self) -> int:
+        """
+        Descarta las revocaciones cuyo token ya habría expirado
+        """
+        now = time.time()
+        with self._lock:
+            expired_tokens = [jti for jti, exp in self._revoked_tokens.items() if exp <= now]
+            for jti in expired_tokens:
+                del self._revoked_tokens[jti]
+            expired_users = [uid for uid, (_, exp) in self._user_not_before.items() if exp <= now]
+            for uid in expired_users:
+                del self._user_not_before[uid]
+            return len(expired_tokens) + len(expired_users)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "revokedTokens": len(self._revoked_tokens),
+                "revokedUsers": len(self._user_not_before),
+                "pendingRevocations": len(self._pending),
+                "rejected": self.rejected
+            }
+
+
+async def run_sweeper(session_store: SessionStore, interval: float):
+    """
+    Bucle de barrido periódico (se lanza como tarea de asyncio al arrancar)
+    """
+    while True:
+        await asyncio.sleep(interval)
+        removed = session_store.sweep()
+        if removed:
+            print(f"🧹 Sesiones expiradas eliminadas: {removed}")
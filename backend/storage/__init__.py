@@ -0,0 +1,66 @@
+"""
+Backends de almacenamiento intercambiables
+
+Se elige con la variable de entorno STORAGE_BACKEND:
+- firestore (por defecto): Firestore + Firebase Authentication
+- memory: todo en memoria del proceso (pruebas de carga / profiling)
+- sqlite: archivo SQLite en modo WAL (ruta en SQLITE_PATH)
+"""
+
+import os
+import pathlib
+from typing import Optional
+
+from .base import (
+    DELETE_FIELD,
+    SERVER_TIMESTAMP,
+    ArrayRemove,
+    ArrayUnion,
+    DocumentAlreadyExists,
+    DocumentNotFound,
+    DocumentStore,
+    EmailAlreadyExists,
+    Increment,
+    StorageError,
+)
+
+BACKENDS = ("firestore", "memory", "sqlite")
+
+DEFAULT_SQLITE_PATH = pathlib.Path(__file__).parent.parent / "fantasy.db"
+
+
+def create_store(backend: Optional[str] = None) -> DocumentStore:
+    """
+    Crea el backend configurado
+    Los módulos de cada backend se importan bajo demanda para que memory y
+    sqlite funcionen sin credenciales de Firebase
+    """
+    backend = (backend or os.getenv("STORAGE_BACKEND", "firestore")).lower()
+
+    if backend == "firestore":
+        from .firestore_backend import FirestoreStore
+        return FirestoreStore()
+    if backend == "memory":
+        from .memory_backend import MemoryStore
+        return MemoryStore()
+    if backend == "sqlite":
+        from .sqlite_backend import SQLiteStore
+        return SQLiteStore(os.getenv("SQLITE_PATH", str(DEFAULT_SQLITE_PATH)))
+
+    raise ValueError(f"STORAGE_BACKEND debe ser uno de: {', '.join(BACKENDS)}")
+
+
+__all__ = [
+    "BACKENDS",
+    "DELETE_FIELD",
+    "SERVER_TIMESTAMP",
+    "ArrayRemove",
+    "ArrayUnion",
+    "DocumentAlreadyExists",
+    "DocumentNotFound",
+    "DocumentStore",
+    "EmailAlreadyExists",
+    "Increment",
+    "StorageError",
+    "create_store",
+]
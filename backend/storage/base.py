@@ -0,0 +1,352 @@
+"""
+Interfaz común de almacenamiento de documentos
+Modelo tipo Firestore: colecciones de documentos (dicts) identificados por ID
+"""
+
+import copy
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# =============================================================================
+# ERRORES
+# =============================================================================
+
+class StorageError(Exception):
+    """Error genérico del backend de almacenamiento"""
+
+
+class DocumentNotFound(StorageError):
+    """El documento a actualizar no existe"""
+
+
+class DocumentAlreadyExists(StorageError):
+    """El documento a crear ya existe"""
+
+
+class EmailAlreadyExists(StorageError):
+    """Ya existe un usuario de autenticación con ese email"""
+
+# =============================================================================
+# TRANSFORMACIONES DE CAMPO
+# Equivalentes neutrales de firestore.SERVER_TIMESTAMP, ArrayUnion, Increment...
+# Cada backend las traduce a su representación nativa
+# =============================================================================
+
+class _Sentinel:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+SERVER_TIMESTAMP = _Sentinel("SERVER_TIMESTAMP")
+
+# Valor de update() que elimina el campo del documento
+DELETE_FIELD = _Sentinel("DELETE_FIELD")
+
+
+class ArrayUnion:
+    """Añade valores a un array si no están ya presentes"""
+
+    def __init__(self, values: Iterable[Any]):
+        self.values = list(values)
+
+
+class ArrayRemove:
+    """Quita del array todas las apariciones de los valores"""
+
+    def __init__(self, values: Iterable[Any]):
+        self.values = list(values)
+
+
+class Increment:
+    """Suma `amount` al valor numérico actual del campo (0 si no existe)"""
+
+    def __init__(self, amount: float):
+        self.amount = amount
+
+
+# Filtro de query: (campo, operador, valor)
+Filter = Tuple[str, str, Any]
+
+FILTER_OPERATORS = ("==", "!=", "<", "<=", ">", ">=", "in", "array_contains")
+
+# Cursor de paginación: (valor del campo de ordenación, id) del último documento
+# de la página anterior; la siguiente página empieza justo después
+Cursor = Tuple[Any, str]
+
+# Escritura de un lote: (op, colección, id, datos) con op "set", "create", "update" o "delete"
+Write = Tuple[str, str, str, Dict]
+
+# =============================================================================
+# UTILIDADES PARA BACKENDS LOCALES (MEMORIA / SQLITE)
+# =============================================================================
+
+MISSING = object()
+
+
+def get_field(doc: Dict, path: str) -> Any:
+    """
+    Lee un campo con notación de puntos ("promedios.puntos")
+    Devuelve MISSING si no existe
+    """
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return MISSING
+        value = value[part]
+    return value
+
+
+def set_field(doc: Dict, path: str, value: Any) -> None:
+    """
+    Escribe un campo con notación de puntos creando los dicts intermedios
+    """
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def project(doc: Dict, fields: Iterable[str]) -> Dict:
+    """
+    Copia solo los campos pedidos (proyección); los que no existen se omiten
+    """
+    result: Dict = {}
+    for field in fields:
+        value = get_field(doc, field)
+        if value is not MISSING:
+            set_field(result, field, copy.deepcopy(value))
+    return result
+
+
+def _resolve_value(value: Any, current: Any = MISSING) -> Any:
+    """
+    Resuelve una transformación de campo contra el valor actual
+    """
+    if value is SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    if isinstance(value, ArrayUnion):
+        result = list(current) if isinstance(current, list) else []
+        for item in value.values:
+            if item not in result:
+                result.append(copy.deepcopy(item))
+        return result
+    if isinstance(value, Increment):
+        numeric = isinstance(current, (int, float)) and not isinstance(current, bool)
+        return (current if numeric else 0) + value.amount
+    if isinstance(value, ArrayRemove):
+        if not isinstance(current, list):
+            return []
+        return [item for item in current if item not in value.values]
+    if isinstance(value, dict):
+        return {k: _resolve_value(v) for k, v in value.items()}
+    return copy.deepcopy(value)
+
+
+def resolve_set(data: Dict) -> Dict:
+    """
+    Prepara los datos de un set(): resuelve transformaciones y copia
+    """
+    return {key: _resolve_value(value) for key, value in data.items() if value is not DELETE_FIELD}
+
+
+def apply_update(doc: Dict, data: Dict) -> Dict:
+    """
+    Aplica un update() sobre un documento (in place)
+    Las claves con puntos actualizan campos anidados, como en Firestore
+    """
+    for key, value in data.items():
+        parts = key.split(".")
+        target = doc
+        if value is DELETE_FIELD:
+            for part in parts[:-1]:
+                target = target.get(part)
+                if not isinstance(target, dict):
+                    break
+            else:
+                target.pop(parts[-1], None)
+            continue
+        for part in parts[:-1]:
+            if not isinstance(target.get(part), dict):
+                target[part] = {}
+            target = target[part]
+        target[parts[-1]] = _resolve_value(value, target.get(parts[-1], MISSING))
+    return doc
+
+
+def matches(doc: Dict, filters: Iterable[Filter]) -> bool:
+    """
+    Evalúa los filtros de una query sobre un documento
+    Un campo inexistente nunca cumple el filtro (igual que en Firestore)
+    """
+    for field, op, expected in filters:
+        value = get_field(doc, field)
+        if value is MISSING:
+            return False
+        if op == "==":
+            ok = value == expected
+        elif op == "!=":
+            ok = value != expected
+        elif op == "<":
+            ok = value < expected
+        elif op == "<=":
+            ok = value <= expected
+        elif op == ">":
+            ok = value > expected
+        elif op == ">=":
+            ok = value >= expected
+        elif op == "in":
+            ok = value in expected
+        elif op == "array_contains":
+            ok = isinstance(value, list) and expected in value
+        else:
+            raise StorageError(f"Operador no soportado: {op}")
+        if not ok:
+            return False
+    return True
+
+# =============================================================================
+# INTERFAZ
+# =============================================================================
+
+class Transaction(ABC):
+    """
+    Transacción de lectura-modificación-escritura
+    Como en Firestore, todas las lecturas van antes que las escrituras y la
+    función de la transacción puede reintentarse: no debe tener efectos fuera
+    """
+
+    @abstractmethod
+    def get(self, collection: str, doc_id: str) -> Optional[Dict]:
+        """Lee un documento dentro de la transacción"""
+
+    @abstractmethod
+    def set(self, collection: str, doc_id: str, data: Dict) -> None:
+        """Crea o sobrescribe un documento al confirmar"""
+
+    @abstractmethod
+    def update(self, collection: str, doc_id: str, data: Dict) -> None:
+        """Actualiza campos de un documento al confirmar"""
+
+
+class BufferedTransaction(Transaction):
+    """
+    Transacción de los backends locales: las escrituras se acumulan y el
+    backend las aplica todas juntas al confirmar
+    """
+
+    def __init__(self, read: Callable[[str, str], Optional[Dict]]):
+        self._read = read
+        self.writes: List[Write] = []
+
+    def get(self, collection: str, doc_id: str) -> Optional[Dict]:
+        return self._read(collection, doc_id)
+
+    def set(self, collection: str, doc_id: str, data: Dict) -> None:
+        self.writes.append(("set", collection, doc_id, data))
+
+    def update(self, collection: str, doc_id: str, data: Dict) -> None:
+        self.writes.append(("update", collection, doc_id, data))
+
+class DocumentStore(ABC):
+    """
+    Backend de almacenamiento de usuarios, jugadores y autenticación
+
+    Los métodos son síncronos. Si `blocking` es True, firebase_service los
+    ejecuta en su pool de hilos para no bloquear el event loop.
+    """
+
+    name = "base"
+    blocking = True
+
+    # -------------------------------------------------------------------------
+    # Documentos
+    # -------------------------------------------------------------------------
+
+    @abstractmethod
+    def get(self, collection: str, doc_id: str) -> Optional[Dict]:
+        """Devuelve el documento o None si no existe"""
+
+    @abstractmethod
+    def query(self, collection: str, filters: Iterable[Filter] = (),
+              order_by: Optional[str] = None, descending: bool = False,
+              limit: Optional[int] = None, fields: Optional[Iterable[str]] = None,
+              start_after: Optional[Cursor] = None) -> List[Tuple[str, Dict]]:
+        """
+        Devuelve una lista de (id, documento)
+        - order_by ordena por el campo y, a igualdad, por ID (mismo sentido)
+        - fields: solo esos campos de cada documento (proyección)
+        - start_after: cursor del último documento de la página anterior
+          (requiere order_by)
+        """
+
+    @abstractmethod
+    def set(self, collection: str, doc_id: str, data: Dict) -> None:
+        """Crea o sobrescribe un documento"""
+
+    @abstractmethod
+    def create(self, collection: str, doc_id: str, data: Dict) -> None:
+        """Crea un documento solo si no existe (DocumentAlreadyExists si ya existe)"""
+
+    @abstractmethod
+    def add(self, collection: str, data: Dict) -> str:
+        """Crea un documento con ID autogenerado y devuelve el ID"""
+
+    @abstractmethod
+    def update(self, collection: str, doc_id: str, data: Dict) -> None:
+        """Actualiza campos de un documento existente (DocumentNotFound si no existe)"""
+
+    @abstractmethod
+    def delete(self, collection: str, doc_id: str) -> None:
+        """Elimina un documento (no falla si no existe)"""
+
+    @abstractmethod
+    def run_transaction(self, fn: Callable[[Transaction], T]) -> T:
+        """Ejecuta fn(transacción) de forma atómica y devuelve su resultado"""
+
+    def batch_write(self, writes: List[Write]) -> None:
+        """
+        Aplica un lote de escrituras (op "set", "create", "update" o "delete")
+        Implementación por defecto: una a una; los backends la sustituyen por
+        escrituras agrupadas (WriteBatch, una sola transacción SQLite...)
+        """
+        for op, collection, doc_id, data in writes:
+            if op == "set":
+                self.set(collection, doc_id, data)
+            elif op == "create":
+                self.create(collection, doc_id, data)
+            elif op == "delete":
+                self.delete(collection, doc_id)
+            else:
+                self.update(collection, doc_id, data)
+
+    def ensure_index(self, collection: str, field: str) -> None:
+        """Declara un campo consultado con frecuencia (solo lo usan los backends locales)"""
+
+    # -------------------------------------------------------------------------
+    # Autenticación
+    # -------------------------------------------------------------------------
+
+    @abstractmethod
+    def auth_create_user(self, email: str, password: str, display_name: str) -> str:
+        """Crea un usuario de autenticación y devuelve su UID (EmailAlreadyExists si ya existe)"""
+
+    @abstractmethod
+    def auth_delete_user(self, uid: str) -> None:
+        """Elimina un usuario de autenticación (no falla si no existe)"""
+
+    @abstractmethod
+    def auth_user_active(self, uid: str) -> bool:
+        """True si el usuario de autenticación existe y no está deshabilitado"""
+
+    @abstractmethod
+    def auth_get_uid_by_email(self, email: str) -> Optional[str]:
+        """Devuelve el UID del usuario de autenticación con ese email, o None"""
+
+    def close(self) -> None:
+        """Libera los recursos del backend"""
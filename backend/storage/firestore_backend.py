@@ -0,0 +1,232 @@
+"""
+Backend Firestore + Firebase Authentication (producción)
+"""
+
+import json
+import os
+import pathlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import firebase_admin
+from firebase_admin import auth, credentials, firestore
+from google.api_core import exceptions as google_exceptions
+
+from .base import (
+    DELETE_FIELD,
+    SERVER_TIMESTAMP,
+    ArrayRemove,
+    ArrayUnion,
+    Cursor,
+    DocumentAlreadyExists,
+    DocumentNotFound,
+    DocumentStore,
+    EmailAlreadyExists,
+    Filter,
+    Increment,
+    StorageError,
+    T,
+    Transaction,
+    Write,
+)
+
+# Máximo de escrituras por WriteBatch de Firestore
+BATCH_LIMIT = 500
+
+CONFIG_PATH = (
+    pathlib.Path(__file__).parent.parent
+    / "firebase_config"
+    / "fantasy-de-dalt-firebase-adminsdk-fbsvc-061b5456f9.json"
+)
+
+
+def load_credentials() -> credentials.Certificate:
+    """
+    Carga las credenciales del Firebase Admin SDK
+    Soporta dos métodos de configuración:
+    1. Variable de entorno FIREBASE_CONFIG con JSON como string
+    2. Archivo JSON en firebase_config/ (fallback)
+    """
+    firebase_config_env = os.getenv("FIREBASE_CONFIG")
+
+    if firebase_config_env:
+        # Cargar desde variable de entorno
+        try:
+            config_dict = json.loads(firebase_config_env)
+            cred = credentials.Certificate(config_dict)
+            print("✅ Firebase config cargada desde variable de entorno FIREBASE_CONFIG")
+            return cred
+        except json.JSONDecodeError as e:
+            print(f"❌ Error al parsear FIREBASE_CONFIG: {e}")
+            raise Exception("FIREBASE_CONFIG contiene JSON inválido")
+
+    # Cargar desde archivo (método tradicional)
+    cred = credentials.Certificate(str(CONFIG_PATH))
+    print(f"✅ Firebase config cargada desde archivo: {CONFIG_PATH}")
+    return cred
+
+
+def _to_native(value: Any) -> Any:
+    """Traduce las transformaciones neutrales a las de Firestore"""
+    if value is SERVER_TIMESTAMP:
+        return firestore.SERVER_TIMESTAMP
+    if value is DELETE_FIELD:
+        return firestore.DELETE_FIELD
+    if isinstance(value, ArrayUnion):
+        return firestore.ArrayUnion(value.values)
+    if isinstance(value, ArrayRemove):
+        return firestore.ArrayRemove(value.values)
+    if isinstance(value, Increment):
+        return firestore.Increment(value.amount)
+    if isinstance(value, dict):
+        return {k: _to_native(v) for k, v in value.items()}
+    return value
+
+
+class _FirestoreTransaction(Transaction):
+    def __init__(self, db, transaction):
+        self._db = db
+        self._transaction = transaction
+
+    def get(self, collection: str, doc_id: str) -> Optional[Dict]:
+        doc = self._db.collection(collection).document(doc_id).get(transaction=self._transaction)
+        return doc.to_dict() if doc.exists else None
+
+    def set(self, collection: str, doc_id: str, data: Dict) -> None:
+        self._transaction.set(self._db.collection(collection).document(doc_id), _to_native(data))
+
+    def update(self, collection: str, doc_id: str, data: Dict) -> None:
+        self._transaction.update(self._db.collection(collection).document(doc_id), _to_native(data))
+
+
+class FirestoreStore(DocumentStore):
+    """
+    Inicializa Firebase Admin al construirse (no al importar el módulo)
+    """
+
+    name = "firestore"
+    blocking = True
+
+    def __init__(self):
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(load_credentials())
+        self.db = firestore.client()
+
+    # -------------------------------------------------------------------------
+    # Documentos
+    # -------------------------------------------------------------------------
+
+    def get(self, collection: str, doc_id: str) -> Optional[Dict]:
+        doc = self.db.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def query(self, collection: str, filters: Iterable[Filter] = (),
+              order_by: Optional[str] = None, descending: bool = False,
+              limit: Optional[int] = None, fields: Optional[Iterable[str]] = None,
+              start_after: Optional[Cursor] = None) -> List[Tuple[str, Dict]]:
+        if start_after is not None and not order_by:
+            raise StorageError("start_after requiere order_by")
+        ref = self.db.collection(collection)
+        query = ref
+
+        for field, op, value in filters:
+            query = query.where(field, op, value)
+
+        if fields is not None:
+            # Proyección en el servidor: solo viajan esos campos
+            query = query.select(list(fields))
+
+        if order_by:
+            direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+            # Desempate explícito por ID para que el cursor sea estable
+            query = query.order_by(order_by, direction=direction).order_by("__name__", direction=direction)
+            if start_after is not None:
+                value, doc_id = start_after
+                query = query.start_after({order_by: value, "__name__": ref.document(doc_id)})
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        return [(doc.id, doc.to_dict()) for doc in query.stream()]
+
+    def set(self, collection: str, doc_id: str, data: Dict) -> None:
+        self.db.collection(collection).document(doc_id).set(_to_native(data))
+
+    def create(self, collection: str, doc_id: str, data: Dict) -> None:
+        try:
+            self.db.collection(collection).document(doc_id).create(_to_native(data))
+        except google_exceptions.Conflict:
+            raise DocumentAlreadyExists(f"{collection}/{doc_id}")
+
+    def add(self, collection: str, data: Dict) -> str:
+        _, doc_ref = self.db.collection(collection).add(_to_native(data))
+        return doc_ref.id
+
+    def update(self, collection: str, doc_id: str, data: Dict) -> None:
+        try:
+            self.db.collection(collection).document(doc_id).update(_to_native(data))
+        except google_exceptions.NotFound:
+            raise DocumentNotFound(f"{collection}/{doc_id}")
+
+    def batch_write(self, writes: List[Write]) -> None:
+        # Cada WriteBatch es atómico; lotes mayores se parten en varios commits
+        for start in range(0, len(writes), BATCH_LIMIT):
+            batch = self.db.batch()
+            for op, collection, doc_id, data in writes[start:start + BATCH_LIMIT]:
+                ref = self.db.collection(collection).document(doc_id)
+                if op == "set":
+                    batch.set(ref, _to_native(data))
+                elif op == "create":
+                    batch.create(ref, _to_native(data))
+                elif op == "delete":
+                    batch.delete(ref)
+                else:
+                    batch.update(ref, _to_native(data))
+            try:
+                batch.commit()
+            except google_exceptions.NotFound as e:
+                raise DocumentNotFound(str(e))
+            except google_exceptions.Conflict as e:
+                raise DocumentAlreadyExists(str(e))
+
+    def delete(self, collection: str, doc_id: str) -> None:
+        self.db.collection(collection).document(doc_id).delete()
+
+    def run_transaction(self, fn: Callable[[Transaction], T]) -> T:
+        @firestore.transactional
+        def _run(transaction):
+            return fn(_FirestoreTransaction(self.db, transaction))
+
+        return _run(self.db.transaction())
+
+    # -------------------------------------------------------------------------
+    # Autenticación
+    # -------------------------------------------------------------------------
+
+    def auth_create_user(self, email: str, password: str, display_name: str) -> str:
+        try:
+            firebase_user = auth.create_user(
+                email=email,
+                password=password,
+                display_name=display_name
+            )
+        except auth.EmailAlreadyExistsError:
+            raise EmailAlreadyExists(email)
+        return firebase_user.uid
+
+    def auth_delete_user(self, uid: str) -> None:
+        try:
+            auth.delete_user(uid)
+        except auth.UserNotFoundError:
+            pass
+
+    def auth_user_active(self, uid: str) -> bool:
+        try:
+            return not auth.get_user(uid).disabled
+        except auth.UserNotFoundError:
+            return False
+
+    def auth_get_uid_by_email(self, email: str) -> Optional[str]:
+        try:
+            return auth.get_user_by_email(email).uid
+        except auth.UserNotFoundError:
+            return None
@@ -0,0 +1,179 @@
+"""
+Backend en memoria - sin dependencias externas
+Pensado para pruebas de carga y profiling local sin proyecto de Firebase
+"""
+
+import copy
+import secrets
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .base import (
+    MISSING,
+    BufferedTransaction,
+    Cursor,
+    DocumentAlreadyExists,
+    DocumentNotFound,
+    DocumentStore,
+    EmailAlreadyExists,
+    Filter,
+    StorageError,
+    T,
+    Transaction,
+    Write,
+    apply_update,
+    get_field,
+    matches,
+    project,
+    resolve_set,
+)
+
+
+def _new_id() -> str:
+    """ID aleatorio de 20 caracteres, como los autogenerados por Firestore"""
+    return secrets.token_hex(10)
+
+
+class MemoryStore(DocumentStore):
+    """
+    Colecciones como dicts {id: documento}
+    Lecturas y escrituras copian los documentos para imitar la semántica de
+    Firestore (modificar un dict leído no altera lo almacenado)
+    """
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self):
+        self._collections: Dict[str, Dict[str, Dict]] = {}
+        self._auth_users: Dict[str, str] = {}  # {email: uid}
+        self._lock = threading.RLock()
+
+    def _collection(self, collection: str) -> Dict[str, Dict]:
+        return self._collections.setdefault(collection, {})
+
+    # -------------------------------------------------------------------------
+    # Documentos
+    # -------------------------------------------------------------------------
+
+    def get(self, collection: str, doc_id: str) -> Optional[Dict]:
+        with self._lock:
+            doc = self._collection(collection).get(doc_id)
+            return copy.deepcopy(doc) if doc is not None else None
+
+    def query(self, collection: str, filters: Iterable[Filter] = (),
+              order_by: Optional[str] = None, descending: bool = False,
+              limit: Optional[int] = None, fields: Optional[Iterable[str]] = None,
+              start_after: Optional[Cursor] = None) -> List[Tuple[str, Dict]]:
+        filters = list(filters)
+        if start_after is not None and not order_by:
+            raise StorageError("start_after requiere order_by")
+        with self._lock:
+            items = [
+                (doc_id, doc)
+                for doc_id, doc in self._collection(collection).items()
+                if matches(doc, filters)
+            ]
+
+            if order_by:
+                # Firestore excluye los documentos sin el campo de ordenación
+                keyed = [(get_field(doc, order_by), doc_id, doc) for doc_id, doc in items]
+                keyed = [item for item in keyed if item[0] is not MISSING]
+                if start_after is not None:
+                    cursor = tuple(start_after)
+                    if descending:
+                        keyed = [item for item in keyed if item[:2] < cursor]
+                    else:
+                        keyed = [item for item in keyed if item[:2] > cursor]
+                keyed.sort(key=lambda item: item[:2], reverse=descending)
+                items = [(doc_id, doc) for _, doc_id, doc in keyed]
+
+            if limit is not None:
+                items = items[:limit]
+
+            if fields is not None:
+                fields = list(fields)
+                return [(doc_id, project(doc, fields)) for doc_id, doc in items]
+            return [(doc_id, copy.deepcopy(doc)) for doc_id, doc in items]
+
+    def set(self, collection: str, doc_id: str, data: Dict) -> None:
+        with self._lock:
+            self._collection(collection)[doc_id] = resolve_set(data)
+
+    def create(self, collection: str, doc_id: str, data: Dict) -> None:
+        with self._lock:
+            if doc_id in self._collection(collection):
+                raise DocumentAlreadyExists(f"{collection}/{doc_id}")
+            self.set(collection, doc_id, data)
+
+    def add(self, collection: str, data: Dict) -> str:
+        doc_id = _new_id()
+        self.set(collection, doc_id, data)
+        return doc_id
+
+    def update(self, collection: str, doc_id: str, data: Dict) -> None:
+        with self._lock:
+            doc = self._collection(collection).get(doc_id)
+            if doc is None:
+                raise DocumentNotFound(f"{collection}/{doc_id}")
+            apply_update(doc, data)
+
+    def delete(self, collection: str, doc_id: str) -> None:
+        with self._lock:
+            self._collection(collection).pop(doc_id, None)
+
+    def run_transaction(self, fn: Callable[[Transaction], T]) -> T:
+        # El lock (reentrante) se mantiene durante toda la transacción:
+        # nadie puede escribir entre la lectura y la confirmación
+        with self._lock:
+            transaction = BufferedTransaction(self.get)
+            result = fn(transaction)
+            for op, collection, doc_id, data in transaction.writes:
+                if op == "update" and doc_id not in self._collection(collection):
+                    raise DocumentNotFound(f"{collection}/{doc_id}")
+            for op, collection, doc_id, data in transaction.writes:
+                if op == "set":
+                    self.set(collection, doc_id, data)
+                else:
+                    self.update(collection, doc_id, data)
+            return result
+
+    def batch_write(self, writes: List[Write]) -> None:
+        with self._lock:
+            # Se comprueba todo antes de escribir nada: el lote falla entero
+            created = set()
+            for op, collection, doc_id, data in writes:
+                if op == "update" and doc_id not in self._collection(collection):
+                    raise DocumentNotFound(f"{collection}/{doc_id}")
+                if op == "create":
+                    if doc_id in self._collection(collection) or (collection, doc_id) in created:
+                        raise DocumentAlreadyExists(f"{collection}/{doc_id}")
+                    created.add((collection, doc_id))
+            super().batch_write(writes)
+
+    # -------------------------------------------------------------------------
+    # Autenticación
+    # -------------------------------------------------------------------------
+
+    def auth_create_user(self, email: str, password: str, display_name: str) -> str:
+        with self._lock:
+            key = email.lower()
+            if key in self._auth_users:
+                raise EmailAlreadyExists(email)
+            uid = secrets.token_hex(14)
+            self._auth_users[key] = uid
+            return uid
+
+    def auth_delete_user(self, uid: str) -> None:
+        with self._lock:
+            for email, auth_uid in list(self._auth_users.items()):
+                if auth_uid == uid:
+                    del self._auth_users[email]
+
+    def auth_user_active(self, uid: str) -> bool:
+        with self._lock:
+            return uid in self._auth_users.values()
+
+    def auth_get_uid_by_email(self, email: str) -> Optional[str]:
+        with self._lock:
+            return self._auth_users.get(email.lower())
@@ -0,0 +1,310 @@
+"""
+Backend SQLite (modo WAL)
+Cada documento se guarda como JSON en una única tabla; las queries usan
+json_extract y los campos declarados con ensure_index tienen índice de expresión
+"""
+
+import json
+import re
+import secrets
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .base import (
+    BufferedTransaction,
+    Cursor,
+    DocumentAlreadyExists,
+    DocumentNotFound,
+    DocumentStore,
+    EmailAlreadyExists,
+    Filter,
+    StorageError,
+    T,
+    Transaction,
+    Write,
+    apply_update,
+    resolve_set,
+    set_field,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (collection, id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS auth_users (
+    email TEXT PRIMARY KEY,
+    uid TEXT NOT NULL,
+    display_name TEXT
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_auth_users_uid ON auth_users (uid);
+"""
+
+_SQL_OPERATORS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+def _json_default(value: Any) -> Any:
+    """Serializa los tipos que JSON no soporta (timestamps)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def _dumps(doc: Dict) -> str:
+    return json.dumps(doc, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def _json_path(field: str) -> str:
+    """
+    Ruta JSON literal para un campo con notación de puntos
+    Va literal (no como parámetro) para que SQLite pueda usar los índices de expresión
+    """
+    parts = ".".join('"{}"'.format(part.replace('"', '""')) for part in field.split("."))
+    return "'$.{}'".format(parts.replace("'", "''"))
+
+
+def _projected(fields: List[str], values: Tuple) -> Dict:
+    """
+    Reconstruye un documento proyectado a partir de los pares
+    (json_type, json_extract) de cada campo; json_type NULL = no existe
+    """
+    doc: Dict = {}
+    for field, kind, value in zip(fields, values[::2], values[1::2]):
+        if kind is None:
+            continue
+        if kind in ("object", "array"):
+            value = json.loads(value)
+        elif kind in ("true", "false"):
+            value = kind == "true"
+        set_field(doc, field, value)
+    return doc
+
+
+class SQLiteStore(DocumentStore):
+    """
+    Una conexión por hilo: en modo WAL los lectores no bloquean al escritor,
+    de modo que las lecturas concurrentes del pool de hilos escalan
+    """
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._indexed: set = set()
+
+        conn = self._conn()
+        mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if mode.lower() != "wal":
+            raise StorageError(f"SQLite no pudo activar el modo WAL en {path} (modo: {mode})")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Transacción de escritura (BEGIN IMMEDIATE toma el lock de escritura al inicio)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    # -------------------------------------------------------------------------
+    # Documentos
+    # -------------------------------------------------------------------------
+
+    def get(self, collection: str, doc_id: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT data FROM documents WHERE collection = ? AND id = ?",
+            (collection, doc_id)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(self, collection: str, filters: Iterable[Filter] = (),
+              order_by: Optional[str] = None, descending: bool = False,
+              limit: Optional[int] = None, fields: Optional[Iterable[str]] = None,
+              start_after: Optional[Cursor] = None) -> List[Tuple[str, Dict]]:
+        if start_after is not None and not order_by:
+            raise StorageError("start_after requiere order_by")
+        if fields is not None:
+            # Solo se leen y decodifican los campos pedidos, no el JSON entero
+            fields = list(fields)
+            columns = ", ".join(
+                f"json_type(data, {_json_path(field)}), json_extract(data, {_json_path(field)})"
+                for field in fields
+            )
+            sql = [f"SELECT id{', ' + columns if columns else ''} FROM documents WHERE collection = ?"]
+        else:
+            sql = ["SELECT id, data FROM documents WHERE collection = ?"]
+        params: List[Any] = [collection]
+
+        for field, op, value in filters:
+            path = _json_path(field)
+            if op in _SQL_OPERATORS:
+                sql.append(f"AND json_extract(data, {path}) {_SQL_OPERATORS[op]} ?")
+                params.append(value)
+            elif op == "in":
+                values = list(value)
+                if not values:
+                    return []
+                sql.append(f"AND json_extract(data, {path}) IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+            elif op == "array_contains":
+                sql.append(f"AND EXISTS (SELECT 1 FROM json_each(data, {path}) WHERE json_each.value = ?)")
+                params.append(value)
+            else:
+                raise StorageError(f"Operador no soportado: {op}")
+
+        if order_by:
+            path = _json_path(order_by)
+            direction = "DESC" if descending else "ASC"
+            sql.append(f"AND json_extract(data, {path}) IS NOT NULL")
+            if start_after is not None:
+                sql.append(f"AND (json_extract(data, {path}), id) {'<' if descending else '>'} (?, ?)")
+                params.extend(start_after)
+            sql.append(f"ORDER BY json_extract(data, {path}) {direction}, id {direction}")
+
+        if limit is not None:
+            sql.append("LIMIT ?")
+            params.append(limit)
+
+        rows = self._conn().execute(" ".join(sql), params).fetchall()
+        if fields is not None:
+            return [(row[0], _projected(fields, row[1:])) for row in rows]
+        return [(doc_id, json.loads(data)) for doc_id, data in rows]
+
+    def set(self, collection: str, doc_id: str, data: Dict) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO documents (collection, id, data) VALUES (?, ?, ?)",
+            (collection, doc_id, _dumps(resolve_set(data)))
+        )
+
+    def _create_in(self, conn: sqlite3.Connection, collection: str, doc_id: str, data: Dict) -> None:
+        try:
+            conn.execute(
+                "INSERT INTO documents (collection, id, data) VALUES (?, ?, ?)",
+                (collection, doc_id, _dumps(resolve_set(data)))
+            )
+        except sqlite3.IntegrityError:
+            raise DocumentAlreadyExists(f"{collection}/{doc_id}")
+
+    def create(self, collection: str, doc_id: str, data: Dict) -> None:
+        self._create_in(self._conn(), collection, doc_id, data)
+
+    def add(self, collection: str, data: Dict) -> str:
+        doc_id = secrets.token_hex(10)
+        self.set(collection, doc_id, data)
+        return doc_id
+
+    def _update_in(self, conn: sqlite3.Connection, collection: str, doc_id: str, data: Dict) -> None:
+        row = conn.execute(
+            "SELECT data FROM documents WHERE collection = ? AND id = ?",
+            (collection, doc_id)
+        ).fetchone()
+        if row is None:
+            raise DocumentNotFound(f"{collection}/{doc_id}")
+        doc = apply_update(json.loads(row[0]), data)
+        conn.execute(
+            "UPDATE documents SET data = ? WHERE collection = ? AND id = ?",
+            (_dumps(doc), collection, doc_id)
+        )
+
+    def update(self, collection: str, doc_id: str, data: Dict) -> None:
+        with self._transaction() as conn:
+            self._update_in(conn, collection, doc_id, data)
+
+    def run_transaction(self, fn: Callable[[Transaction], T]) -> T:
+        # BEGIN IMMEDIATE: el lock de escritura se toma antes de leer,
+        # así ninguna otra conexión puede escribir entre lectura y confirmación
+        with self._transaction() as conn:
+            transaction = BufferedTransaction(self.get)
+            result = fn(transaction)
+            for op, collection, doc_id, data in transaction.writes:
+                if op == "set":
+                    self.set(collection, doc_id, data)
+                else:
+                    self._update_in(conn, collection, doc_id, data)
+            return result
+
+    def batch_write(self, writes: List[Write]) -> None:
+        # Todo el lote en una transacción: un solo fsync del WAL
+        with self._transaction() as conn:
+            for op, collection, doc_id, data in writes:
+                if op == "set":
+                    self.set(collection, doc_id, data)
+                elif op == "create":
+                    self._create_in(conn, collection, doc_id, data)
+                elif op == "delete":
+                    self.delete(collection, doc_id)
+                else:
+                    self._update_in(conn, collection, doc_id, data)
+
+    def delete(self, collection: str, doc_id: str) -> None:
+        self._conn().execute(
+            "DELETE FROM documents WHERE collection = ? AND id = ?",
+            (collection, doc_id)
+        )
+
+    def ensure_index(self, collection: str, field: str) -> None:
+        if (collection, field) in self._indexed:
+            return
+        name = re.sub(r"\W", "_", f"idx_{collection}_{field}")
+        self._conn().execute(
+            f"CREATE INDEX IF NOT EXISTS {name} "
+            f"ON documents (collection, json_extract(data, {_json_path(field)}))"
+        )
+        self._indexed.add((collection, field))
+
+    # -------------------------------------------------------------------------
+    # Autenticación
+    # -------------------------------------------------------------------------
+
+    def auth_create_user(self, email: str, password: str, display_name: str) -> str:
+        uid = secrets.token_hex(14)
+        try:
+            self._conn().execute(
+                "INSERT INTO auth_users (email, uid, display_name) VALUES (?, ?, ?)",
+                (email.lower(), uid, display_name)
+            )
+        except sqlite3.IntegrityError:
+            raise EmailAlreadyExists(email)
+        return uid
+
+    def auth_delete_user(self, uid: str) -> None:
+        self._conn().execute("DELETE FROM auth_users WHERE uid = ?", (uid,))
+
+    def auth_user_active(self, uid: str) -> bool:
+        row = self._conn().execute("SELECT 1 FROM auth_users WHERE uid = ?", (uid,)).fetchone()
+        return row is not None
+
+    def auth_get_uid_by_email(self, email: str) -> Optional[str]:
+        row = self._conn().execute(
+            "SELECT uid FROM auth_users WHERE email = ?", (email.lower(),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
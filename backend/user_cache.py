@@ -0,0 +1,113 @@
+"""
+Caché de documentos de usuario por ID
+- TTL corto: acota cuánto puede durar un dato escrito por otro worker
+- Versión por usuario: cada escritura le asigna el siguiente valor de un
+  contador global, y una lectura que empezó antes de la escritura no puede
+  guardar en caché el documento antiguo
+- Las versiones también tienen límite LRU: al descartar la de un usuario, su
+  valor pasa a ser el suelo que devuelven los usuarios sin versión (una
+  lectura en curso de ese usuario ya no coincide y no se guarda)
+- Las escrituras propias se aplican sobre la copia en caché (mismas
+  transformaciones que el backend) en lugar de forzar otra lectura
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from storage.base import apply_update
+
+
+class UserCache:
+    """
+    {userId: (versión, expira en monotonic, documento)} con límite LRU
+    """
+
+    def __init__(self, ttl: float = 10.0, max_entries: int = 50_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[int, float, Dict]]" = OrderedDict()
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._clock = 0  # contador global de escrituras
+        self._floor = 0  # versión de los usuarios sin entrada en _versions
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def version(self, user_id: str) -> int:
+        """
+        Versión actual del usuario: se captura antes de leer del backend
+        """
+        with self._lock:
+            return self._versions.get(user_id, self._floor)
+
+    def _bump(self, user_id: str) -> int:
+        """
+        Nueva versión del usuario (con el lock tomado)
+        """
+        self._clock += 1
+        self._versions[user_id] = self._clock
+        self._versions.move_to_end(user_id)
+        while len(self._versions) > self.max_entries:
+            _, dropped = self._versions.popitem(last=False)
+            self._floor = max(self._floor, dropped)
+        return self._clock
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return copy.deepcopy(entry[2])
+
+    def put(self, user_id: str, user_data: Dict, version: int) -> bool:
+        """
+        Guarda un documento leído del backend si nadie ha escrito desde que
+        se capturó `version`
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            if self._versions.get(user_id, self._floor) != version:
+                return False
+            self._entries[user_id] = (version, time.monotonic() + self.ttl, copy.deepcopy(user_data))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def apply(self, user_id: str, data: Dict):
+        """
+        Refleja una escritura ya confirmada en el backend
+        Incrementa la versión y actualiza la copia en caché si existe
+        """
+        with self._lock:
+            version = self._bump(user_id)
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries[user_id] = (version, entry[1], apply_update(entry[2], data))
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._bump(user_id)
+            self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "versions": len(self._versions),
+                "hits": self.hits,
+                "misses": self.misses
+            }
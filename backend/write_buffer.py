@@ -0,0 +1,113 @@
+"""
+Buffer de escritura diferida (write-behind) para campos no críticos
+
+Escrituras como lastLogin no necesitan confirmarse antes de responder:
+se encolan y una tarea en segundo plano las envía en lotes cada `interval`
+segundos o en cuanto hay `max_entries` documentos pendientes.
+- Varias escrituras al mismo documento antes del envío se combinan en un
+  solo update (la última gana por campo)
+- Al apagar se envía todo lo pendiente
+- Contadores: profundidad de la cola, escrituras combinadas, latencia de envío
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from storage.base import Write
+
+
+class WriteBehindBuffer:
+    """
+    {(colección, id): campos} pendientes de enviar
+    `flush` recibe la lista de escrituras ("update", colección, id, campos)
+    y devuelve cuántas se aplicaron
+    """
+
+    def __init__(self, flush: Callable[[List[Write]], Awaitable[int]],
+                 interval: float = 1.0, max_entries: int = 500):
+        self.interval = interval
+        self.max_entries = max_entries
+        self._flush_fn = flush
+        self._pending: Dict[Tuple[str, str], Dict] = {}
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._closed = False
+        self.queued = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.written = 0
+        self.failed = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, collection: str, doc_id: str, data: Dict):
+        key = (collection, doc_id)
+        self.queued += 1
+        if key in self._pending:
+            self.coalesced += 1
+            self._pending[key].update(data)
+        else:
+            self._pending[key] = dict(data)
+        if len(self._pending) >= self.max_entries:
+            self._wakeup.set()
+
+    async def flush(self):
+        """
+        Envía todo lo pendiente (los envíos no se solapan)
+        """
+        async with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            writes = [("update", collection, doc_id, data) for (collection, doc_id), data in pending.items()]
+            start = time.perf_counter()
+            try:
+                applied = await self._flush_fn(writes)
+                self.written += applied
+                self.failed += len(writes) - applied
+            except Exception as e:
+                self.failed += len(writes)
+                print(f"❌ Error enviando {len(writes)} escrituras diferidas: {str(e)}")
+            elapsed = (time.perf_counter() - start) * 1000
+            self.flushes += 1
+            self.last_flush_ms = elapsed
+            self.max_flush_ms = max(self.max_flush_ms, elapsed)
+            self._total_flush_ms += elapsed
+
+    async def run(self):
+        """
+        Bucle de envío (se lanza como tarea de asyncio al arrancar)
+        """
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def close(self):
+        """
+        Detiene el bucle y envía lo que quede en la cola
+        """
+        self._closed = True
+        self._wakeup.set()
+        await self.flush()
+
+    def stats(self) -> Dict:
+        return {
+            "queueDepth": len(self._pending),
+            "queued": self.queued,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "written": self.written,
+            "failed": self.failed,
+            "lastFlushMs": round(self.last_flush_ms, 2),
+            "avgFlushMs": round(self._total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            "maxFlushMs": round(self.max_flush_ms, 2)
+        }
@@ -197,9 +197,11 @@ export async function openPack(packIndex) {
 /**
  * Obtiene el ranking
  * @param {string} period - 'weekly', 'monthly', 'season'
+ * @param {string|null} startAfter - nextCursor de la página anterior
  */
-export async function getRankings(period = 'monthly') {
-  return apiRequest(`/api/rankings?period=${period}`)
+export async function getRankings(period = 'monthly', startAfter = null) {
+  const cursor = startAfter ? `&start_after=${encodeURIComponent(startAfter)}` : ''
+  return apiRequest(`/api/rankings?period=${period}${cursor}`)
 }
 
 // =============================================================================
@@ -207,8 +209,23 @@ export async function getRankings(period = 'monthly') {
 // =============================================================================
 
 /**
- * Obtiene la lista de jugadores del club
+ * Obtiene la lista de jugadores del club (solo el resumen de temporada:
+ * las jornadas de cada jugador se piden con getPlayer)
  */
 export async function getPlayers() {
-  return apiRequest('/api/players')
+  return apiRequest('/api/players?summary=1')
+}
+
+/**
+ * Obtiene un jugador con todas sus jornadas
+ */
+export async function getPlayer(playerId) {
+  return apiRequest(`/api/players/${playerId}`)
+}
+
+/**
+ * Obtiene las estadísticas de todos los jugadores en una jornada y los totales del equipo
+ */
+export async function getJornada(jornada) {
+  return apiRequest(`/api/jornadas/${jornada}`)
 }